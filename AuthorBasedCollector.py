@@ -1,57 +1,92 @@
 import os
 
 import requests
-import time
-from collections import deque
 from tqdm import tqdm
 import datetime
+import time
 
-from OpenalexCheckpoints import load_checkpoint, save_checkpoint_author_based
+from OpenalexAsync import AsyncOpenalexClient, BatchPrefetcher
+from OpenalexPipeline import BackgroundWriter
+from OpenalexPlanner import AuthorBatchPlanner, WORKS_COUNT_SELECT
+from OpenalexCheckpoints import CheckpointJournal, JournaledQueue, TrackedSet
+from OpenalexFrontier import (
+    PriorityFrontier,
+    fifo_checkpoint_queue,
+    score_fields,
+    work_score,
+)
 from OpenalexUtils import (
-    get_data_works_from_openalex,
-    get_author_works,
+    OpenAlexClient,
     batch_size,
-    sleep_time,
 )
 from OpenalexWriter import (
-    write_works_to_csv,
-    write_citations_to_csv,
-    write_related_works_to_csv,
-    write_authors_to_csv,
-    write_concepts_to_csv,
-    write_topics_to_csv,
-    write_keywords_to_csv,
     generate_progress_report,
+    open_dataset_sink,
+    output_paths,
+    profile_filenames,
+    work_select,
 )
 
 
-def main(record_limit, checkpoint_size, initial_work_id):
+def main(
+    record_limit,
+    checkpoint_size,
+    initial_work_id,
+    client=None,
+    max_in_flight=1,
+    output_format="csv",
+    priority=None,
+    profile="full",
+    plan_author_batches=False,
+):
     print(f"Record limit: {record_limit}")
     print(f"Checkpoint size: {checkpoint_size}")
     print(f"Initial work ID: {initial_work_id}")
+    print(f"Max in flight: {max_in_flight}")
+    print(f"Output format: {output_format}")
+    print(f"Priority: {priority or 'fifo'}")
+    print(f"Profile: {profile}")
+    print(f"Plan author batches: {plan_author_batches}")
+
+    client = client or OpenAlexClient()
 
     csv_base_folder = f"{initial_work_id}_author_based_database"
 
     if not os.path.exists(csv_base_folder):
         os.makedirs(csv_base_folder)
 
-    csv_works_filename = f"{csv_base_folder}/openalex_works.csv"
-    csv_authors_filename = f"{csv_base_folder}/openalex_authors.csv"
-    csv_citations_filename = f"{csv_base_folder}/openalex_citations.csv"
-    csv_related_works_filename = f"{csv_base_folder}/openalex_related_works.csv"
-    csv_concepts_filename = f"{csv_base_folder}/openalex_concepts.csv"
-    csv_topics_filename = f"{csv_base_folder}/openalex_topics.csv"
-    csv_keywords_filename = f"{csv_base_folder}/openalex_keywords.csv"
+    csv_filenames = {
+        "works": f"{csv_base_folder}/openalex_works.csv",
+        "authors": f"{csv_base_folder}/openalex_authors.csv",
+        "citations": f"{csv_base_folder}/openalex_citations.csv",
+        "related_works": f"{csv_base_folder}/openalex_related_works.csv",
+        "concepts": f"{csv_base_folder}/openalex_concepts.csv",
+        "topics": f"{csv_base_folder}/openalex_topics.csv",
+        "keywords": f"{csv_base_folder}/openalex_keywords.csv",
+    }
+
+    # Só as tabelas do perfil são gravadas, e só os campos delas são pedidos
+    csv_filenames = profile_filenames(csv_filenames, profile)
+    select = work_select(profile, ["authorships", *score_fields(priority)])
 
     progress_report_file = f"{csv_base_folder}/openalex_progress_report.csv"
+    metrics_file = f"{csv_base_folder}/openalex_metrics.jsonl"
     checkpoint_file = f"{csv_base_folder}/openalex_checkpoint.pkl"
 
-    # Carrega o estado salvo, se existir
-    checkpoint = load_checkpoint(checkpoint_file)
+    # Carrega o estado salvo, se existir. As saídas voltam ao tamanho que
+    # tinham no checkpoint: o que foi gravado depois será buscado de novo.
+    checkpoint_journal = CheckpointJournal(
+        checkpoint_file, outputs=output_paths(csv_filenames, output_format)
+    )
+    checkpoint = checkpoint_journal.load()
+    checkpoint_journal.restore_outputs(checkpoint)
     if checkpoint:
-        author_queue = deque(checkpoint["queue"])
-        work_visited = set(checkpoint["work_visited"])
-        author_visited = set(checkpoint["author_visited"])
+        if priority:
+            author_queue = PriorityFrontier.from_checkpoint(checkpoint)
+        else:
+            author_queue = JournaledQueue(*fifo_checkpoint_queue(checkpoint))
+        work_visited = TrackedSet(checkpoint["work_visited"])
+        author_visited = TrackedSet(checkpoint["author_visited"])
         work_counts = checkpoint["count"]
         authors_count = checkpoint["authors_count"]
         citations_count = checkpoint["citations_count"]
@@ -60,12 +95,17 @@ def main(record_limit, checkpoint_size, initial_work_id):
         topics_count = checkpoint["topics_count"]
         keywords_count = checkpoint["keywords_count"]
     else:
-        data = get_data_works_from_openalex([initial_work_id])
+        data = client.get_data_works([initial_work_id], select)
         work = data["results"][0]
 
-        author_queue = deque([author["author"]["id"] for author in work["authorships"]])
-        work_visited = set()
-        author_visited = set()
+        initial_authors = [author["author"]["id"] for author in work["authorships"]]
+        if priority:
+            author_queue = PriorityFrontier()
+            author_queue.extend(initial_authors)
+        else:
+            author_queue = JournaledQueue(initial_authors)
+        work_visited = TrackedSet()
+        author_visited = TrackedSet()
         work_counts = 0
         authors_count = 0
         citations_count = 0
@@ -74,25 +114,69 @@ def main(record_limit, checkpoint_size, initial_work_id):
         topics_count = 0
         keywords_count = 0
 
+    # Registro incremental do checkpoint: só o que mudou desde o anterior
+    def checkpoint_record(pending):
+        return checkpoint_journal.delta(
+            author_queue,
+            pending,
+            {
+                "work_visited": work_visited.drain(),
+                "author_visited": author_visited.drain(),
+            },
+            {
+                "count": work_counts,
+                "authors_count": authors_count,
+                "citations_count": citations_count,
+                "related_works_count": related_works_count,
+                "concepts_count": concepts_count,
+                "topics_count": topics_count,
+                "keywords_count": keywords_count,
+            },
+        )
+
+    # Contadores gravados junto com as métricas de cada etapa
+    def metric_counts():
+        return {
+            "works": work_counts,
+            "authors": authors_count,
+            "citations": citations_count,
+            "related_works": related_works_count,
+            "concepts": concepts_count,
+            "topics": topics_count,
+            "keywords": keywords_count,
+        }
+
     # Início da coleta
     start_time = datetime.datetime.now()
 
-    # Coleta os dados
+    # Coleta os dados (até max_in_flight lotes em voo ao mesmo tempo)
+    async_client = AsyncOpenalexClient(client, max_in_flight)
+    metrics = client.metrics
+    writer = BackgroundWriter()
+    sink = open_dataset_sink(csv_filenames, output_format, profile)
+    # Lotes montados pelo works_count dos autores em vez de tamanho fixo
+    planner = (
+        AuthorBatchPlanner(lambda ids: client.get_data_authors(ids, WORKS_COUNT_SELECT))
+        if plan_author_batches
+        else None
+    )
+    prefetcher = BatchPrefetcher(
+        author_queue,
+        lambda ids: async_client.submit(async_client.get_author_works(ids, select)),
+        author_visited.__contains__,
+        planner.max_ids if planner else batch_size,
+        depth=max_in_flight,
+        should_stop=lambda: work_counts >= record_limit,
+        planner=planner,
+    )
     with tqdm(total=record_limit, desc="Collecting data") as pbar:
         pbar.update(work_counts)
-        while author_queue and work_counts < record_limit:
-            batch_ids = []
-            while author_queue and len(batch_ids) < batch_size:
-                current_author_id = author_queue.popleft()
-                if current_author_id not in author_visited:
-                    batch_ids.append(current_author_id)
-                    author_visited.add(current_author_id)
-
-            if not batch_ids:
-                continue
+        for batch_ids, future in prefetcher:
+            author_visited.update(batch_ids)
 
             try:
-                data = get_author_works(batch_ids)
+                with metrics.stage("wait"):
+                    data = future.result()
             except requests.exceptions.RequestException as e:
                 print(f"Failed to retrieve data for batch {batch_ids}: {e}")
                 continue
@@ -102,15 +186,9 @@ def main(record_limit, checkpoint_size, initial_work_id):
                 if work["id"] not in work_visited:
                     works.append(work)
 
-            write_works_to_csv(csv_works_filename, works, mode="a")
-            write_authors_to_csv(
-                csv_authors_filename, works, only_authors=batch_ids, mode="a"
-            )
-            write_citations_to_csv(csv_citations_filename, works, mode="a")
-            write_related_works_to_csv(csv_related_works_filename, works, mode="a")
-            write_concepts_to_csv(csv_concepts_filename, works, mode="a")
-            write_topics_to_csv(csv_topics_filename, works, mode="a")
-            write_keywords_to_csv(csv_keywords_filename, works, mode="a")
+            # A escrita roda na thread do writer enquanto o próximo lote é baixado
+            writer.submit(metrics.timed("write", sink.write), works, batch_ids)
+            transform_start = time.perf_counter()
 
             authors_count += len(batch_ids)
 
@@ -124,33 +202,31 @@ def main(record_limit, checkpoint_size, initial_work_id):
                 keywords_count += len(work.get("keywords", []))
 
                 # Adicionar trabalhos dos autores do trabalho atual à fila
+                score = work_score(work, priority)
                 for author in work["authorships"]:
                     author_work_id = author["author"]["id"]
                     if author_work_id not in author_visited:
-                        author_queue.append(author_work_id)
+                        author_queue.append(author_work_id, score)
+
+            metrics.add("transform", time.perf_counter() - transform_start)
 
             # Atualiza o progresso
             pbar.update(len(works))
 
-            # Salva o checkpoint
+            # Salva o checkpoint (lotes ainda em voo voltam para o início da fila).
+            # Ele entra na fila do writer depois das escritas (e do flush) deste
+            # lote, então só registra trabalhos já persistidos.
             if (
                 work_counts // checkpoint_size
                 > (work_counts - len(works)) // checkpoint_size
             ):
-                save_checkpoint_author_based(
-                    list(author_queue),
-                    list(work_visited),
-                    list(author_visited),
-                    work_counts,
-                    authors_count,
-                    citations_count,
-                    related_works_count,
-                    concepts_count,
-                    topics_count,
-                    keywords_count,
-                    checkpoint_file,
+                writer.submit(metrics.timed("write", sink.flush))
+                writer.submit(
+                    metrics.timed("checkpoint", checkpoint_journal.append),
+                    checkpoint_record(prefetcher.pending_items()),
                 )
-                generate_progress_report(
+                writer.submit(
+                    generate_progress_report,
                     start_time,
                     work_counts,
                     authors_count,
@@ -161,26 +237,20 @@ def main(record_limit, checkpoint_size, initial_work_id):
                     keywords_count,
                     progress_report_file,
                 )
+                writer.submit(metrics.emit, metrics_file, metric_counts())
+
+    prefetcher.close()
+    async_client.close()
 
-            # Espera entre as requisições para não sobrecarregar a API
-            time.sleep(sleep_time)
+    writer.submit(metrics.timed("write", sink.close))
 
     # Salva o checkpoint final
-    save_checkpoint_author_based(
-        list(author_queue),
-        list(work_visited),
-        list(author_visited),
-        work_counts,
-        authors_count,
-        citations_count,
-        related_works_count,
-        concepts_count,
-        topics_count,
-        keywords_count,
-        checkpoint_file,
+    writer.submit(
+        metrics.timed("checkpoint", checkpoint_journal.append), checkpoint_record([])
     )
     print(f"Data collection complete: {work_counts} records collected.")
-    generate_progress_report(
+    writer.submit(
+        generate_progress_report,
         start_time,
         work_counts,
         authors_count,
@@ -191,4 +261,6 @@ def main(record_limit, checkpoint_size, initial_work_id):
         keywords_count,
         progress_report_file,
     )
+    writer.submit(metrics.emit, metrics_file, metric_counts())
+    writer.close()
     print("Progress report generated.")
@@ -1,51 +1,92 @@
 import os
 
 import requests
-import time
-from collections import deque
 from tqdm import tqdm
 import datetime
+import time
 
-from OpenalexCheckpoints import load_checkpoint, save_checkpoint_citations_based
-from OpenalexUtils import get_data_works_from_openalex, batch_size, sleep_time
+from OpenalexAsync import AsyncOpenalexClient, BatchPrefetcher
+from OpenalexPipeline import BackgroundWriter
+from OpenalexCheckpoints import CheckpointJournal, TrackedSet
+from OpenalexFrontier import (
+    PriorityFrontier,
+    SpillingFrontier,
+    fifo_checkpoint_queue,
+    score_fields,
+    work_score,
+)
+from OpenalexUtils import OpenAlexClient, batch_size
 from OpenalexWriter import (
-    write_works_to_csv,
-    write_citations_to_csv,
-    write_related_works_to_csv,
-    write_authors_to_csv,
-    write_concepts_to_csv,
-    write_topics_to_csv,
-    write_keywords_to_csv,
     generate_progress_report,
+    open_dataset_sink,
+    output_paths,
+    profile_filenames,
+    work_select,
 )
 
 
-def main(record_limit, checkpoint_size, initial_work_id):
+def main(
+    record_limit,
+    checkpoint_size,
+    initial_work_id,
+    client=None,
+    max_in_flight=1,
+    output_format="csv",
+    priority=None,
+    profile="full",
+):
     print(f"Record limit: {record_limit}")
     print(f"Checkpoint size: {checkpoint_size}")
     print(f"Initial work ID: {initial_work_id}")
+    print(f"Max in flight: {max_in_flight}")
+    print(f"Output format: {output_format}")
+    print(f"Priority: {priority or 'fifo'}")
+    print(f"Profile: {profile}")
+
+    client = client or OpenAlexClient()
 
     csv_base_folder = f"{initial_work_id}_citations_based_database"
 
     if not os.path.exists(csv_base_folder):
         os.makedirs(csv_base_folder)
 
-    csv_works_filename = f"{csv_base_folder}/openalex_works.csv"
-    csv_authors_filename = f"{csv_base_folder}/openalex_authors.csv"
-    csv_citations_filename = f"{csv_base_folder}/openalex_citations.csv"
-    csv_related_works_filename = f"{csv_base_folder}/openalex_related_works.csv"
-    csv_concepts_filename = f"{csv_base_folder}/openalex_concepts.csv"
-    csv_topics_filename = f"{csv_base_folder}/openalex_topics.csv"
-    csv_keywords_filename = f"{csv_base_folder}/openalex_keywords.csv"
+    csv_filenames = {
+        "works": f"{csv_base_folder}/openalex_works.csv",
+        "authors": f"{csv_base_folder}/openalex_authors.csv",
+        "citations": f"{csv_base_folder}/openalex_citations.csv",
+        "related_works": f"{csv_base_folder}/openalex_related_works.csv",
+        "concepts": f"{csv_base_folder}/openalex_concepts.csv",
+        "topics": f"{csv_base_folder}/openalex_topics.csv",
+        "keywords": f"{csv_base_folder}/openalex_keywords.csv",
+    }
+
+    # Só as tabelas do perfil são gravadas, e só os campos delas são pedidos
+    csv_filenames = profile_filenames(csv_filenames, profile)
+    select = work_select(profile, ["referenced_works", *score_fields(priority)])
 
     progress_report_file = f"{csv_base_folder}/openalex_progress_report.csv"
+    metrics_file = f"{csv_base_folder}/openalex_metrics.jsonl"
     checkpoint_file = f"{csv_base_folder}/openalex_checkpoint.pkl"
+    frontier_dir = f"{csv_base_folder}/openalex_frontier"
 
-    # Carrega o estado salvo, se existir
-    checkpoint = load_checkpoint(checkpoint_file)
+    # Carrega o estado salvo, se existir. As saídas voltam ao tamanho que
+    # tinham no checkpoint: o que foi gravado depois será buscado de novo.
+    checkpoint_journal = CheckpointJournal(
+        checkpoint_file, outputs=output_paths(csv_filenames, output_format)
+    )
+    checkpoint = checkpoint_journal.load()
+    checkpoint_journal.restore_outputs(checkpoint)
     if checkpoint:
-        queue = deque(checkpoint["queue"])
-        work_visited = set(checkpoint["visited"])
+        if priority:
+            queue = PriorityFrontier.from_checkpoint(checkpoint)
+        else:
+            # Checkpoints antigos não guardam os IDs já enfileirados
+            queue = SpillingFrontier(
+                frontier_dir,
+                *fifo_checkpoint_queue(checkpoint),
+                seen=TrackedSet(checkpoint.get("queued", ())),
+            )
+        work_visited = TrackedSet(checkpoint["visited"])
         works_count = checkpoint["count"]
         authors_count = checkpoint["authors_count"]
         citations_count = checkpoint["citations_count"]
@@ -54,8 +95,12 @@ def main(record_limit, checkpoint_size, initial_work_id):
         topics_count = checkpoint["topics_count"]
         keywords_count = checkpoint["keywords_count"]
     else:
-        queue = deque([initial_work_id])
-        work_visited = set()
+        if priority:
+            queue = PriorityFrontier()
+            queue.append(initial_work_id)
+        else:
+            queue = SpillingFrontier(frontier_dir, [initial_work_id], seen=TrackedSet())
+        work_visited = TrackedSet()
         works_count = 0
         authors_count = 0
         citations_count = 0
@@ -64,36 +109,71 @@ def main(record_limit, checkpoint_size, initial_work_id):
         topics_count = 0
         keywords_count = 0
 
+    # Registro incremental do checkpoint: só o que mudou desde o anterior
+    def checkpoint_record(pending):
+        visited = {"visited": work_visited.drain()}
+        if priority is None:
+            visited["queued"] = queue.seen.drain()
+        return checkpoint_journal.delta(
+            queue,
+            pending,
+            visited,
+            {
+                "count": works_count,
+                "authors_count": authors_count,
+                "citations_count": citations_count,
+                "related_works_count": related_works_count,
+                "concepts_count": concepts_count,
+                "topics_count": topics_count,
+                "keywords_count": keywords_count,
+            },
+        )
+
+    # Contadores gravados junto com as métricas de cada etapa
+    def metric_counts():
+        return {
+            "works": works_count,
+            "authors": authors_count,
+            "citations": citations_count,
+            "related_works": related_works_count,
+            "concepts": concepts_count,
+            "topics": topics_count,
+            "keywords": keywords_count,
+        }
+
     # Início da coleta
     start_time = datetime.datetime.now()
 
-    # Coleta os dados
+    # Coleta os dados (até max_in_flight lotes em voo ao mesmo tempo).
+    # A fila pode conter IDs repetidos dentro de um mesmo lote, como no laço
+    # sequencial, por isso unique_in_batch=False.
+    async_client = AsyncOpenalexClient(client, max_in_flight)
+    metrics = client.metrics
+    writer = BackgroundWriter()
+    sink = open_dataset_sink(csv_filenames, output_format, profile)
+    prefetcher = BatchPrefetcher(
+        queue,
+        lambda ids: async_client.submit(async_client.get_data_works(ids, select)),
+        work_visited.__contains__,
+        batch_size,
+        depth=max_in_flight,
+        unique_in_batch=False,
+        should_stop=lambda: works_count >= record_limit,
+    )
     with tqdm(total=record_limit, desc="Collecting data") as pbar:
         pbar.update(works_count)
-        while queue and works_count < record_limit:
-            batch_ids = []
-            while queue and len(batch_ids) < batch_size:
-                current_work_id = queue.popleft()
-                if current_work_id not in work_visited:
-                    batch_ids.append(current_work_id)
-
-            if not batch_ids:
-                continue
-
+        for batch_ids, future in prefetcher:
             try:
-                data = get_data_works_from_openalex(batch_ids)
+                with metrics.stage("wait"):
+                    data = future.result()
             except requests.exceptions.RequestException as e:
                 print(f"Failed to retrieve data for batch {batch_ids}: {e}")
                 continue
 
             works = data["results"]
-            write_works_to_csv(csv_works_filename, works, mode="a")
-            write_authors_to_csv(csv_authors_filename, works, mode="a")
-            write_citations_to_csv(csv_citations_filename, works, mode="a")
-            write_related_works_to_csv(csv_related_works_filename, works, mode="a")
-            write_concepts_to_csv(csv_concepts_filename, works, mode="a")
-            write_topics_to_csv(csv_topics_filename, works, mode="a")
-            write_keywords_to_csv(csv_keywords_filename, works, mode="a")
+            # A escrita roda na thread do writer enquanto o próximo lote é baixado
+            writer.submit(metrics.timed("write", sink.write), works)
+            transform_start = time.perf_counter()
 
             for work in works:
                 work_visited.add(work["id"])
@@ -105,31 +185,32 @@ def main(record_limit, checkpoint_size, initial_work_id):
                 topics_count += len(work.get("topics", []))
                 keywords_count += len(work.get("keywords", []))
 
+                # A fila FIFO descarta IDs que já foram enfileirados antes; a
+                # fronteira por prioridade soma a pontuação de cada citação
+                score = work_score(work, priority)
                 for cited_work_id in work.get("referenced_works", []):
                     if cited_work_id not in work_visited:
-                        queue.append(cited_work_id)
+                        queue.append(cited_work_id, score)
+
+            metrics.add("transform", time.perf_counter() - transform_start)
 
             # Atualiza o progresso
             pbar.update(len(works))
 
-            # Salva o checkpoint
+            # Salva o checkpoint (lotes ainda em voo voltam para o início da fila).
+            # Ele entra na fila do writer depois das escritas (e do flush) deste
+            # lote, então só registra trabalhos já persistidos.
             if (
                 works_count // checkpoint_size
                 > (works_count - len(works)) // checkpoint_size
             ):
-                save_checkpoint_citations_based(
-                    list(queue),
-                    list(work_visited),
-                    works_count,
-                    authors_count,
-                    citations_count,
-                    related_works_count,
-                    concepts_count,
-                    topics_count,
-                    keywords_count,
-                    checkpoint_file,
+                writer.submit(metrics.timed("write", sink.flush))
+                writer.submit(
+                    metrics.timed("checkpoint", checkpoint_journal.append),
+                    checkpoint_record(prefetcher.pending_items()),
                 )
-                generate_progress_report(
+                writer.submit(
+                    generate_progress_report,
                     start_time,
                     works_count,
                     authors_count,
@@ -140,25 +221,22 @@ def main(record_limit, checkpoint_size, initial_work_id):
                     keywords_count,
                     progress_report_file,
                 )
+                writer.submit(metrics.emit, metrics_file, metric_counts())
+
+    prefetcher.close()
+    async_client.close()
 
-            # Espera entre as requisições para não sobrecarregar a API
-            time.sleep(sleep_time)
+    writer.submit(metrics.timed("write", sink.close))
 
     # Salva o checkpoint final
-    save_checkpoint_citations_based(
-        list(queue),
-        list(work_visited),
-        works_count,
-        authors_count,
-        citations_count,
-        related_works_count,
-        concepts_count,
-        topics_count,
-        keywords_count,
-        checkpoint_file,
+    writer.submit(
+        metrics.timed("checkpoint", checkpoint_journal.append), checkpoint_record([])
     )
+    if priority is None:
+        queue.close()
     print(f"Data collection complete: {works_count} records collected.")
-    generate_progress_report(
+    writer.submit(
+        generate_progress_report,
         start_time,
         works_count,
         authors_count,
@@ -169,4 +247,6 @@ def main(record_limit, checkpoint_size, initial_work_id):
         keywords_count,
         progress_report_file,
     )
+    writer.submit(metrics.emit, metrics_file, metric_counts())
+    writer.close()
     print("Progress report generated.")
@@ -0,0 +1,141 @@
+import os
+
+try:
+    import numpy as np
+except ImportError:  # Dependência opcional: só é exigida pelas análises
+    np = None
+
+from OpenalexCoauthors import require_numpy, sorted_unique
+from OpenalexGraph import GRAPH_META, GraphStore, build_csr, find_table, read_edges
+from OpenalexIds import openalex_url_prefix
+
+WORK_METRICS_FIELDNAMES = [
+    "work_id",
+    "local_cited_by_count",
+    "local_references_count",
+    "pagerank",
+]
+
+
+def pagerank(indptr, indices, damping=0.85, tol=1e-8, max_iter=100):
+    """PageRank by power iteration over a CSR graph (edges point to the cited).
+
+    Each iteration is one weighted `bincount` over the edges. Nodes without
+    out-edges spread their rank uniformly. Returns `(ranks, iterations)`;
+    the ranks sum to 1 and iteration stops when the L1 change is below `tol`.
+    """
+    require_numpy()
+    node_count = len(indptr) - 1
+    if node_count == 0:
+        return np.zeros(0), 0
+    out_degree = np.diff(indptr)
+    sources = np.repeat(np.arange(node_count, dtype=np.int32), out_degree)
+    dangling = out_degree == 0
+    inverse_degree = np.zeros(node_count)
+    np.divide(1.0, out_degree, out=inverse_degree, where=~dangling)
+
+    ranks = np.full(node_count, 1.0 / node_count)
+    for iteration in range(1, max_iter + 1):
+        spread = ranks * inverse_degree
+        new_ranks = np.bincount(indices, weights=spread[sources], minlength=node_count)
+        new_ranks *= damping
+        new_ranks += (1.0 - damping + damping * ranks[dangling].sum()) / node_count
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change < tol:
+            break
+    return ranks, iteration
+
+
+def citation_subgraph(work_codes, indptr, indices):
+    """Keep only the works with citation edges, renumbering the graph.
+
+    The saved graph's `works` space also holds works that only appear in
+    related_works; as isolated nodes they would change PageRank. The kept
+    works stay in the same (sorted) order, as when reading the table.
+    """
+    out_degree = np.diff(indptr)
+    keep = out_degree > 0
+    keep[indices] = True
+    new_index = np.cumsum(keep) - 1
+    new_indptr = np.zeros(int(keep.sum()) + 1, dtype=np.int64)
+    np.cumsum(out_degree[keep], out=new_indptr[1:])
+    return (
+        np.asarray(work_codes)[keep],
+        new_indptr,
+        new_index[indices].astype(np.int32),
+    )
+
+
+def load_citation_graph(folder):
+    """`(work_codes, indptr, indices)` of a collection's citation graph.
+
+    Uses the graph saved by build_graph.py when it is newer than the
+    citation table; otherwise reads the table.
+    """
+    require_numpy()
+    table = find_table(folder, "citations")
+    graph_dir = os.path.join(folder, "openalex_graph")
+    meta_file = os.path.join(graph_dir, GRAPH_META)
+    if os.path.exists(meta_file) and (
+        table is None or os.path.getmtime(meta_file) >= os.path.getmtime(table)
+    ):
+        graph = GraphStore(graph_dir)
+        if "citations" in graph.relations:
+            print(f"Usando o grafo salvo em {graph_dir}")
+            indptr, indices = graph.csr("citations")
+            return citation_subgraph(graph.nodes("works"), indptr, indices)
+    if table is None:
+        raise FileNotFoundError(f"Tabela de citações não encontrada em {folder}")
+
+    print(f"Lendo citações de: {table} ...")
+    sources, targets = read_edges(table, "work_id", "cited_work_id")
+    work_codes = sorted_unique(np.concatenate([sources, targets]))
+    indptr, indices = build_csr(
+        np.searchsorted(work_codes, sources),
+        np.searchsorted(work_codes, targets),
+        len(work_codes),
+    )
+    return work_codes, indptr, indices
+
+
+def citation_metrics(folder, damping=0.85, tol=1e-8, max_iter=100):
+    """Per-work local citation counts and PageRank, as numpy columns."""
+    work_codes, indptr, indices = load_citation_graph(folder)
+    ranks, iterations = pagerank(indptr, indices, damping, tol, max_iter)
+    return {
+        "work_codes": work_codes,
+        "local_cited_by_count": np.bincount(indices, minlength=len(work_codes)),
+        "local_references_count": np.diff(indptr),
+        "pagerank": ranks,
+        "iterations": iterations,
+    }
+
+
+def write_work_metrics(filename, metrics):
+    """Write the metrics table, highest PageRank first.
+
+    `work_id` is the full URL, as in openalex_works.csv, so the tables join
+    on it directly.
+    """
+    order = np.argsort(-metrics["pagerank"], kind="stable")
+    codes = metrics["work_codes"][order]
+    # Os IDs são montados a partir dos códigos, sem chamar decode_id por linha
+    prefixes = {
+        letter: f"{openalex_url_prefix}{chr(letter)}"
+        for letter in np.unique(codes >> 56).tolist()
+    }
+    columns = zip(
+        (codes >> 56).tolist(),
+        (codes & 0xFFFFFFFFFFFFFF).tolist(),
+        metrics["local_cited_by_count"][order].tolist(),
+        metrics["local_references_count"][order].tolist(),
+        metrics["pagerank"][order].tolist(),
+    )
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        f.write(",".join(WORK_METRICS_FIELDNAMES) + "\n")
+        f.writelines(
+            f"{prefixes[letter]}{number},{cited_by},{references},{rank:.6e}\n"
+            for letter, number, cited_by, references, rank in columns
+        )
+    return len(codes)
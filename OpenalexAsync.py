@@ -0,0 +1,233 @@
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import OpenalexUtils
+
+
+class AsyncOpenalexClient:
+    """Executa as chamadas de um OpenAlexClient em um event loop próprio, com
+    limite de requisições simultâneas.
+
+    O loop roda em uma thread de fundo, então os coletores (síncronos) só
+    precisam chamar `submit` e consumir os `concurrent.futures.Future`. As
+    chamadas bloqueantes do cliente rodam em um pool de `max_in_flight`
+    threads, que é o que limita as requisições simultâneas; as demais esperam
+    na fila do pool. O ritmo das requisições fica a cargo do limitador de taxa
+    do cliente.
+    """
+
+    def __init__(self, client=None, max_in_flight=4):
+        self.client = client or OpenalexUtils.get_default_client()
+        self.max_in_flight = max(1, max_in_flight)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight, thread_name_prefix="openalex-fetch"
+        )
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._executor)
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="openalex-loop", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def _call(self, func, *args):
+        return await self._loop.run_in_executor(None, func, *args)
+
+    async def get_data_works(self, work_urls: list[str], select: str = None) -> dict:
+        """Get works from OpenAlex API."""
+        return await self._call(self.client.get_data_works, work_urls, select)
+
+    async def get_author_works(
+        self, author_urls: list[str], select: str = None
+    ) -> list[dict]:
+        """Get author works from OpenAlex API."""
+        return await self._call(self.client.get_author_works, author_urls, select)
+
+    async def get_data_authors(
+        self, author_urls: list[str], select: str = None
+    ) -> dict:
+        """Get authors from OpenAlex API."""
+        return await self._call(self.client.get_data_authors, author_urls, select)
+
+    async def get_data_institutions(self, institution_urls: list[str]) -> dict:
+        """Get institutions from OpenAlex API."""
+        return await self._call(self.client.get_data_institutions, institution_urls)
+
+    def submit(self, coro):
+        """Agenda uma corrotina no loop e devolve um concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def imap(self, coro_func, items):
+        """Gera os futures de `coro_func(item)` na ordem de `items`, mantendo
+        no máximo 2 * max_in_flight agendados ao mesmo tempo."""
+        window = deque()
+        for item in items:
+            window.append(self.submit(coro_func(item)))
+            if len(window) >= 2 * self.max_in_flight:
+                yield window.popleft()
+        while window:
+            yield window.popleft()
+
+
+class _Batch:
+    __slots__ = ("raw", "accepted", "skipped", "future")
+
+    def __init__(self, raw, accepted, skipped):
+        self.raw = raw
+        self.accepted = accepted
+        self.skipped = skipped
+        self.future = None
+
+
+class BatchPrefetcher:
+    """Forma e busca lotes à frente do consumidor, entregando-os na mesma ordem
+    (e com o mesmo conteúdo) do laço sequencial.
+
+    Os lotes seguintes são montados a partir da fila atual enquanto o lote
+    corrente ainda está sendo processado. Antes de entregar um lote especulativo
+    ele é validado contra o estado já confirmado; se o laço sequencial teria
+    formado um lote diferente, todos os lotes pendentes voltam para o início da
+    fila e são refeitos.
+
+    O consumidor deve marcar os IDs de cada lote entregue como visitados antes
+    de pedir o próximo. `should_stop` é consultado antes de cada lote, como a
+    condição do `while` sequencial.
+
+    Com um `planner` (AuthorBatchPlanner), até `batch_size` IDs são retirados
+    da fila e o planejador decide quantos deles formam o lote; o resto volta
+    para o início da fila.
+    """
+
+    def __init__(
+        self,
+        queue,
+        fetch,
+        is_visited,
+        batch_size,
+        depth=1,
+        unique_in_batch=True,
+        should_stop=None,
+        planner=None,
+    ):
+        self.queue = queue
+        self.fetch = fetch
+        self.is_visited = is_visited
+        self.batch_size = batch_size
+        self.depth = max(1, depth)
+        self.unique_in_batch = unique_in_batch
+        self.should_stop = should_stop
+        self.planner = planner
+        self._pending = deque()
+
+    def __len__(self):
+        return sum(len(batch.raw) for batch in self._pending)
+
+    def pending_items(self) -> list:
+        """IDs retirados da fila por lotes ainda não entregues, na ordem original."""
+        return [item for batch in self._pending for item in batch.raw]
+
+    def pending_ids(self) -> list:
+        """IDs aceitos em lotes ainda não entregues."""
+        return [item for batch in self._pending for item in batch.accepted]
+
+    def close(self):
+        """Cancela os lotes pendentes e devolve seus IDs ao início da fila."""
+        self._restore_pending()
+
+    def _restore_pending(self):
+        while self._pending:
+            batch = self._pending.pop()
+            if batch.future is not None:
+                batch.future.cancel()
+            self.queue.extendleft(reversed(batch.raw))
+
+    def _is_valid(self, batch):
+        return not any(self.is_visited(item) for item in batch.accepted) and all(
+            self.is_visited(item) for item in batch.skipped
+        )
+
+    def _form_batch(self):
+        claimed = set(self.pending_ids())
+        raw, accepted, skipped = [], [], []
+        current = set()
+        # Posição em `raw` de cada ID aceito (para o corte do planejador)
+        accepted_at = []
+
+        while self.queue and len(accepted) < self.batch_size:
+            item = self.queue.popleft()
+            raw.append(item)
+            if self.is_visited(item):
+                continue
+            if item in claimed:
+                # Um lote anterior ainda em voo deve marcá-lo como visitado
+                skipped.append(item)
+                continue
+            if self.unique_in_batch and item in current:
+                continue
+            accepted.append(item)
+            accepted_at.append(len(raw) - 1)
+            current.add(item)
+
+        if self.planner is not None and accepted:
+            cut = self.planner.cut(accepted)
+            if cut < len(accepted):
+                # Lote cheio pelo works_count: o que vem depois volta à fila
+                end = accepted_at[cut]
+                self.queue.extendleft(reversed(raw[end:]))
+                kept = set(raw[:end])
+                return _Batch(
+                    raw[:end],
+                    accepted[:cut],
+                    [item for item in skipped if item in kept],
+                )
+
+        if len(accepted) < self.batch_size and self._pending:
+            # A fila acabou: no laço sequencial este lote ainda receberia os
+            # IDs descobertos pelos lotes pendentes
+            self.queue.extendleft(reversed(raw))
+            return None
+
+        if not raw:
+            return None
+        return _Batch(raw, accepted, skipped)
+
+    def _fill(self):
+        while len(self._pending) < self.depth:
+            batch = self._form_batch()
+            if batch is None:
+                return
+            if not batch.accepted:
+                continue
+            batch.future = self.fetch(batch.accepted)
+            self._pending.append(batch)
+
+    def __iter__(self):
+        while True:
+            if self.should_stop is not None and self.should_stop():
+                self._restore_pending()
+                return
+            if self._pending and not self._is_valid(self._pending[0]):
+                self._restore_pending()
+            self._fill()
+            if not self._pending:
+                return
+            batch = self._pending.popleft()
+            if self.planner is not None:
+                self.planner.forget(batch.accepted)
+            yield batch.accepted, batch.future
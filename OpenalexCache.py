@@ -0,0 +1,134 @@
+import sqlite3
+import threading
+import time
+import zlib
+
+import OpenalexJson
+
+
+class EntityCache:
+    """Cache local, em SQLite, das entidades baixadas do OpenAlex.
+
+    Cada entrada guarda o JSON comprimido (zlib) de uma entidade, indexado pelo
+    ID curto do OpenAlex (ex.: `W4398186459`). Entradas mais velhas que `ttl`
+    segundos são ignoradas e, quando o tamanho total passa de `max_bytes`, as
+    menos acessadas são removidas.
+    """
+
+    def __init__(self, path, ttl_days=30, max_bytes=2 * 1024**3):
+        self.path = path
+        self.ttl = ttl_days * 86400 if ttl_days else None
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entities (
+                key TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entities_accessed_at ON entities (accessed_at)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entities"
+        ).fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_many(self, keys) -> dict:
+        """Return {key: entity} for the keys present and not expired."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        now = time.time()
+        payloads = {}
+        with self._lock:
+            # SQLite limita o número de parâmetros por consulta
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, payload, fetched_at FROM entities WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, payload, fetched_at in rows:
+                    if self.ttl is not None and now - fetched_at > self.ttl:
+                        continue
+                    payloads[key] = payload
+
+            if payloads:
+                self._conn.executemany(
+                    "UPDATE entities SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in payloads],
+                )
+                self._conn.commit()
+
+        # A decodificação fica fora do lock: outras threads seguem usando o cache
+        return {
+            key: OpenalexJson.loads(zlib.decompress(payload))
+            for key, payload in payloads.items()
+        }
+
+    def put_many(self, items: dict):
+        """Store {key: entity}, replacing older copies."""
+        if not items:
+            return
+
+        now = time.time()
+        rows = []
+        for key, entity in items.items():
+            payload = zlib.compress(OpenalexJson.dumps(entity))
+            rows.append((key, payload, len(payload), now, now))
+
+        with self._lock:
+            keys = [row[0] for row in rows]
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                self._total_bytes -= self._conn.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM entities WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entities (key, payload, size, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._total_bytes += sum(row[2] for row in rows)
+            if self.max_bytes and self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Remove as entradas menos acessadas até ficar com 90% do limite
+        target = self.max_bytes * 0.9
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entities ORDER BY accessed_at LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            removed = []
+            for key, size in rows:
+                removed.append((key,))
+                self._total_bytes -= size
+                if self._total_bytes <= target:
+                    break
+            self._conn.executemany("DELETE FROM entities WHERE key = ?", removed)
@@ -1,38 +1,17 @@
 import os
 import pickle
+from array import array
 
+from OpenalexFrontier import PriorityFrontier
+from OpenalexIds import IdQueue, IdSet, encode_id
 
-# Função para salvar o estado atual (fila e contagem de registros)
-def save_checkpoint_citations_based(
-        queue,
-        visited,
-        count,
-        authors_count,
-        citations_count,
-        related_works_count,
-        concepts_count,
-        topics_count,
-        keywords_count,
-        checkpoint_file
-):
-    with open(checkpoint_file, 'wb') as f:
-        pickle.dump({
-            'queue': queue,
-            'visited': visited,
-            'count': count,
-            'authors_count': authors_count,
-            'citations_count': citations_count,
-            'related_works_count': related_works_count,
-            'concepts_count': concepts_count,
-            'topics_count': topics_count,
-            'keywords_count': keywords_count
-        }, f)
-
-
-def save_checkpoint_author_based(
-        queue,
-        work_visited,
-        author_visited,
+# Conjuntos de IDs guardados nos checkpoints (visitados e já enfileirados)
+VISITED_KEYS = ('visited', 'work_visited', 'author_visited', 'queued')
+
+
+# Coleta pelo snapshot: partições já juntadas às tabelas e contadores
+def save_checkpoint_snapshot_based(
+        partitions,
         count,
         authors_count,
         citations_count,
@@ -40,54 +19,324 @@ def save_checkpoint_author_based(
         concepts_count,
         topics_count,
         keywords_count,
-        checkpoint_file
-):
-    with open(checkpoint_file, 'wb') as f:
-        pickle.dump({
-            'queue': queue,
-            'work_visited': work_visited,
-            'author_visited': author_visited,
-            'count': count,
-            'authors_count': authors_count,
-            'citations_count': citations_count,
-            'related_works_count': related_works_count,
-            'concepts_count': concepts_count,
-            'topics_count': topics_count,
-            'keywords_count': keywords_count
-        }, f)
-
-
-def save_checkpoint_author_limit(
-        queue,
-        work_visited,
-        author_visited,
-        work_counts,
-        authors_count,
-        citations_count,
-        related_works_count,
-        concepts_count,
-        topics_count,
-        keywords_count,
-        checkpoint_file
+        checkpoint_file,
+        output_offsets=None
 ):
-    with open(checkpoint_file, 'wb') as f:
-        pickle.dump({
-            'queue': queue,
-            'work_visited': work_visited,
-            'author_visited': author_visited,
-            'work_counts': work_counts,
-            'authors_count': authors_count,
-            'citations_count': citations_count,
-            'related_works_count': related_works_count,
-            'concepts_count': concepts_count,
-            'topics_count': topics_count,
-            'keywords_count': keywords_count
-        }, f)
-
-
-# Função para carregar o estado salvo
-def load_checkpoint(checkpoint_file):
+    tmp_file = checkpoint_file + '.tmp'
+    state = {
+        'partitions': partitions,
+        'count': count,
+        'authors_count': authors_count,
+        'citations_count': citations_count,
+        'related_works_count': related_works_count,
+        'concepts_count': concepts_count,
+        'topics_count': topics_count,
+        'keywords_count': keywords_count
+    }
+    if output_offsets is not None:
+        state['output_offsets'] = output_offsets
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(state, f)
+    os.replace(tmp_file, checkpoint_file)
+
+
+def load_snapshot_checkpoint(checkpoint_file):
     if os.path.exists(checkpoint_file):
         with open(checkpoint_file, 'rb') as f:
             return pickle.load(f)
     return None
+
+
+# Sufixo do journal gravado ao lado do checkpoint
+JOURNAL_SUFFIX = '.journal'
+
+
+# Tamanho de cada saída no momento do checkpoint: bytes de um CSV ou, para um
+# diretório de partes (Parquet/Arrow), a parte aberta e o quanto dela já foi
+# gravado (ver OpenalexColumnar.table_dir_offset)
+def output_offsets(paths):
+    offsets = {}
+    for path in paths:
+        if os.path.isdir(path):
+            # Import tardio: só os formatos colunares gravam diretórios
+            from OpenalexColumnar import table_dir_offset
+            offsets[path] = table_dir_offset(path)
+        elif os.path.exists(path):
+            offsets[path] = os.path.getsize(path)
+    return offsets
+
+
+def truncate_outputs(paths, offsets):
+    """Corta cada saída de volta ao tamanho registrado em `offsets`.
+
+    CSVs são truncados no byte registrado (apagados se não havia nada, para
+    que o cabeçalho seja escrito de novo); diretórios de partes voltam à
+    parte e às linhas registradas. Devolve quantas saídas mudaram.
+    """
+    changed = 0
+    for path in paths:
+        offset = offsets.get(path, 0)
+        if os.path.isdir(path):
+            from OpenalexColumnar import truncate_table_dir
+            changed += truncate_table_dir(path, offset)
+        elif not os.path.exists(path):
+            continue
+        elif not offset:
+            # Mesmo vazio o arquivo sai: senão a retomada não grava o cabeçalho
+            os.remove(path)
+            changed += 1
+        elif os.path.getsize(path) > offset:
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+            changed += 1
+    return changed
+
+
+class JournaledQueue(IdQueue):
+    """Fila da coleta que conta quantos IDs já foram enfileirados no total.
+
+    Só `append`/`extend` contam: IDs devolvidos ao início da fila com
+    `extendleft` (lotes cancelados) já tinham sido contados.
+    """
+
+    def __init__(self, iterable=(), enqueued=None):
+        self.enqueued = 0
+        super().__init__(iterable)
+        self.enqueued = len(self) if enqueued is None else enqueued
+
+    def append(self, item, score=None):
+        super().append(item)
+        self.enqueued += 1
+
+
+class TrackedSet(IdSet):
+    """Conjunto de visitados que guarda os IDs adicionados desde o último `drain`."""
+
+    def __init__(self, iterable=()):
+        self.added = array('q')
+        super().__init__(iterable)
+        self.added = array('q')
+
+    def add(self, item):
+        if super().add(item):
+            self.added.append(encode_id(item))
+            return True
+        return False
+
+    def drain(self):
+        """IDs (codificados) adicionados desde a última chamada."""
+        added, self.added = self.added, array('q')
+        return added
+
+
+class CheckpointJournal:
+    """Checkpoint incremental: um snapshot completo mais um journal append-only.
+
+    Cada checkpoint grava no journal só o que mudou desde o anterior: os IDs
+    visitados e enfileirados nesse intervalo, a posição do início da fila e os
+    contadores. A fila é tratada como uma sequência só de acréscimos (todos os
+    IDs já enfileirados) da qual a coleta consome pelo início, então basta
+    gravar o trecho novo do final e o índice do início.
+
+    Ao carregar, o journal é reaplicado sobre o snapshot. Quando o journal
+    fica maior que o snapshot, ele é compactado em um novo snapshot; como o
+    limite cresce junto com o snapshot, o custo de cada checkpoint continua
+    proporcional ao intervalo.
+
+    Com `outputs` (os CSVs ou diretórios de partes da coleta), cada registro
+    guarda também o tamanho de cada saída, e `restore_outputs` corta as
+    saídas de volta a esses tamanhos ao retomar: as linhas gravadas depois do
+    último checkpoint são buscadas de novo, então não ficam duplicadas. O
+    registro precisa ser gravado depois de as saídas serem descarregadas.
+    """
+
+    def __init__(self, checkpoint_file, min_compact_bytes=1024 * 1024, outputs=()):
+        self.checkpoint_file = checkpoint_file
+        self.journal_file = checkpoint_file + JOURNAL_SUFFIX
+        self.min_compact_bytes = min_compact_bytes
+        self.outputs = list(outputs)
+        self._since = 0
+        self._generation = 0
+
+    def load(self):
+        """Snapshot com o journal reaplicado, ou None se não houver checkpoint.
+
+        A fila volta como `array('q')` de IDs codificados e os conjuntos de
+        visitados como IdSet.
+        """
+        state = self._replay()
+        if state is not None:
+            self._since = state['enqueued']
+            self._generation = state['generation']
+        return state
+
+    def restore_outputs(self, state):
+        """Descarta das saídas o que foi gravado depois do checkpoint `state`.
+
+        Sem checkpoint, as saídas que existirem são de uma coleta que parou
+        antes do primeiro checkpoint e são apagadas. Checkpoints antigos, sem
+        os tamanhos das saídas, não mexem nelas.
+        """
+        if state is None:
+            offsets = {}
+        elif 'output_offsets' in state:
+            offsets = state['output_offsets']
+        else:
+            return 0
+        changed = truncate_outputs(self.outputs, offsets)
+        if changed:
+            print(f'{changed} arquivos de saída cortados de volta ao último checkpoint.')
+        return changed
+
+    def _replay(self):
+        state = None
+        if os.path.exists(self.checkpoint_file):
+            with open(self.checkpoint_file, 'rb') as f:
+                state = pickle.load(f)
+            state = dict(state)
+            # Checkpoints antigos não têm `enqueued`: a fila começa no índice 0
+            state.setdefault('enqueued', len(state['queue']))
+            state.setdefault('generation', 0)
+            # Checkpoints antigos guardam listas de URLs
+            for name in VISITED_KEYS:
+                if name in state and not isinstance(state[name], IdSet):
+                    state[name] = IdSet(state[name])
+
+        generation = state['generation'] if state is not None else 0
+        # Registros de uma geração anterior já estão no snapshot (a coleta
+        # parou entre gravar o snapshot e apagar o journal)
+        records = [r for r in self._read_journal() if r['generation'] == generation]
+        if state is None and not records:
+            return None
+        if state is None:
+            state = {'queue': [], 'enqueued': 0, 'generation': 0}
+
+        queue = array('q', (encode_id(item) for item in state['queue']))
+        base = state['enqueued'] - len(queue)
+        for record in records:
+            for name, added in record['visited'].items():
+                state.setdefault(name, IdSet()).update(added)
+            state.update(record['counts'])
+            if 'output_offsets' in record:
+                state['output_offsets'] = record['output_offsets']
+
+            # Trecho [start, enqueued) da sequência de IDs enfileirados
+            start = record['queue_start']
+            if start > base + len(queue):
+                queue, base = array('q'), start
+            del queue[start - base:]
+            queue.extend(map(encode_id, record['queue_items']))
+            head = record['head']
+            if head > base:
+                del queue[:head - base]
+                base = head
+            state['enqueued'] = record['enqueued']
+
+            # Pontuações alteradas da fronteira por prioridade (--priority)
+            if 'frontier' in record:
+                frontier = state.setdefault('frontier', {})
+                for code, score in record['frontier'].items():
+                    if score is None:
+                        frontier.pop(code, None)
+                    else:
+                        frontier[code] = score
+            else:
+                state.pop('frontier', None)
+
+        state['queue'] = queue
+        return state
+
+    def _read_journal(self):
+        records = []
+        if not os.path.exists(self.journal_file):
+            return records
+
+        with open(self.journal_file, 'rb') as f:
+            valid_size = 0
+            while True:
+                try:
+                    records.append(pickle.load(f))
+                except (EOFError, pickle.UnpicklingError, ValueError):
+                    break
+                valid_size = f.tell()
+
+        # Descarta um registro incompleto (coleta interrompida no meio da escrita)
+        if valid_size < os.path.getsize(self.journal_file):
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(valid_size)
+        return records
+
+    def delta(self, queue, pending, visited, counts):
+        """Monta o registro do checkpoint atual.
+
+        Deve ser chamado na thread da coleta, antes de a fila e os conjuntos
+        mudarem: `queue` é a JournaledQueue, `pending` os IDs retirados por
+        lotes ainda não entregues e `visited` mapeia o nome de cada conjunto
+        para os IDs adicionados desde o último checkpoint.
+
+        Com uma PriorityFrontier o registro guarda as pontuações alteradas e a
+        fila FIFO fica vazia.
+        """
+        if isinstance(queue, PriorityFrontier):
+            return {
+                'queue_start': self._since,
+                'queue_items': array('q'),
+                'head': self._since,
+                'enqueued': self._since,
+                'frontier': queue.changes(pending),
+                'visited': visited,
+                'counts': counts,
+            }
+
+        enqueued = queue.enqueued
+        head = enqueued - len(pending) - len(queue)
+        start = max(self._since, head)
+
+        # Só o final da fila (pendentes + fila) é novo desde o último checkpoint
+        new_count = enqueued - start
+        items = queue.tail_codes(new_count)
+        if new_count > len(queue):
+            skip = len(pending) - (new_count - len(queue))
+            items = array('q', map(encode_id, pending[skip:])) + items
+
+        self._since = enqueued
+        return {
+            'queue_start': start,
+            'queue_items': items,
+            'head': head,
+            'enqueued': enqueued,
+            'visited': visited,
+            'counts': counts,
+        }
+
+    def append(self, record):
+        """Grava o registro no journal, compactando se ele ficou grande demais."""
+        record = dict(record, generation=self._generation)
+        if self.outputs:
+            record['output_offsets'] = output_offsets(self.outputs)
+        with open(self.journal_file, 'ab') as f:
+            pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+            journal_size = f.tell()
+
+        snapshot_size = (
+            os.path.getsize(self.checkpoint_file)
+            if os.path.exists(self.checkpoint_file) else 0
+        )
+        if journal_size > max(snapshot_size, self.min_compact_bytes):
+            self.compact()
+
+    def compact(self):
+        """Reescreve o snapshot com o journal aplicado e começa um journal novo."""
+        state = self._replay()
+        if state is None:
+            return
+        self._generation += 1
+        state['generation'] = self._generation
+
+        tmp_file = self.checkpoint_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, self.checkpoint_file)
+        # Se a coleta parar aqui, os registros do journal antigo são
+        # ignorados por serem de outra geração
+        os.remove(self.journal_file)
@@ -0,0 +1,241 @@
+import csv
+import os
+import tempfile
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # Dependência opcional: só é exigida pelas análises
+    np = None
+
+from OpenalexIds import encode_id
+
+# Pares de coautores (antes da deduplicação) mantidos em memória de uma vez;
+# acima disso os pares são espalhados em partições no disco
+memory_pairs = 20_000_000
+# Pares gerados por vez (os arrays intermediários custam ~50 bytes por par)
+chunk_pairs = 2_000_000
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError(
+            "As análises precisam do numpy. Instale com: uv sync --extra analysis"
+        )
+
+
+def read_authorships(filename):
+    """Read an authorships CSV into integer arrays.
+
+    Returns `(works, authors, author_ids, names)`: per row, the encoded work
+    ID and the interned author index; `author_ids`/`names` map each index
+    back to the author's ID and first display name seen.
+    """
+    require_numpy()
+    index = {}
+    other_works = {}
+    author_ids = []
+    names = []
+    work_codes = array("q")
+    author_codes = array("q")
+    last_work = None
+    last_code = 0
+
+    with open(filename, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        for column in ("work_id", "author_id", "author_name"):
+            if column not in header:
+                raise KeyError(column)
+        work_col = header.index("work_id")
+        author_col = header.index("author_id")
+        name_col = header.index("author_name")
+
+        for row in reader:
+            if not row:
+                continue
+            work_id = row[work_col]
+            author_id = row[author_col]
+            if not author_id:
+                continue
+            # As linhas de um trabalho costumam vir juntas
+            if work_id != last_work:
+                last_work = work_id
+                try:
+                    last_code = encode_id(work_id)
+                except ValueError:
+                    # IDs fora do padrão do OpenAlex ganham códigos negativos
+                    last_code = other_works.setdefault(work_id, -1 - len(other_works))
+            author = index.get(author_id)
+            if author is None:
+                author = index[author_id] = len(author_ids)
+                author_ids.append(author_id)
+                names.append(row[name_col])
+            work_codes.append(last_code)
+            author_codes.append(author)
+
+    return (
+        np.frombuffer(work_codes, dtype=np.int64),
+        np.frombuffer(author_codes, dtype=np.int64),
+        author_ids,
+        names,
+    )
+
+
+def work_groups(works, authors):
+    """Authors sorted by work, plus the start and size of each work's run."""
+    if not len(works):
+        empty = np.zeros(0, dtype=np.int64)
+        return authors, empty, empty
+    order = np.argsort(works, kind="stable")
+    works = works[order]
+    authors = authors[order]
+    starts = np.flatnonzero(np.r_[True, works[1:] != works[:-1]])
+    sizes = np.diff(np.r_[starts, len(works)])
+    return authors, starts, sizes
+
+
+def sorted_unique(values):
+    """Sort in place and drop repeats (faster than `np.unique` for uint64)."""
+    values.sort()
+    if len(values) < 2:
+        return values
+    return values[np.r_[True, values[1:] != values[:-1]]]
+
+
+def segment_offsets(lengths):
+    """`[2, 3]` -> `[0, 1, 0, 1, 2]`: position inside each repeated segment."""
+    total = int(lengths.sum())
+    return np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+
+def group_pairs(authors, starts, sizes):
+    """Unordered co-author pairs of the given works, as `low << 32 | high`.
+
+    Each member is paired with the members after it in the same work, so a
+    work with k authors yields k*(k-1)/2 pairs without a Python loop.
+    """
+    rows = np.repeat(starts, sizes) + segment_offsets(sizes)
+    after = np.repeat(starts + sizes, sizes) - rows - 1
+    left = np.repeat(rows, after)
+    right = left + 1 + segment_offsets(after)
+    a = authors[left]
+    b = authors[right]
+    keep = a != b
+    low = np.minimum(a[keep], b[keep]).astype(np.uint64)
+    high = np.maximum(a[keep], b[keep]).astype(np.uint64)
+    return sorted_unique((low << np.uint64(32)) | high)
+
+
+def _pair_chunks(authors, starts, sizes, chunk_pairs):
+    """`group_pairs` over consecutive runs of works with ~chunk_pairs pairs."""
+    counts = sizes * (sizes - 1) // 2
+    cumulative = np.cumsum(counts)
+    first = 0
+    while first < len(sizes):
+        base = cumulative[first - 1] if first else 0
+        last = int(np.searchsorted(cumulative, base + chunk_pairs, side="right"))
+        last = max(last, first + 1)
+        yield group_pairs(authors, starts[first:last], sizes[first:last])
+        first = last
+
+
+def unique_pairs(authors, starts, sizes, max_pairs=memory_pairs):
+    """Yield the deduplicated co-author pairs as sorted `uint64` arrays.
+
+    When all pairs fit in `max_pairs` a single array is produced. Otherwise
+    the pairs are spread over partition files by their lower author, so each
+    partition is deduplicated on its own and holds whole pairs.
+    """
+    total = int((sizes * (sizes - 1) // 2).sum())
+    chunk_size = min(chunk_pairs, max_pairs)
+    if total <= max_pairs:
+        chunks = list(_pair_chunks(authors, starts, sizes, chunk_size))
+        if chunks:
+            yield sorted_unique(np.concatenate(chunks))
+        return
+
+    partitions = -(-total // max_pairs)
+    with tempfile.TemporaryDirectory(prefix="openalex_pairs_") as tmp_dir:
+        paths = [os.path.join(tmp_dir, f"{p:05d}.bin") for p in range(partitions)]
+        for chunk in _pair_chunks(authors, starts, sizes, chunk_size):
+            owner = (chunk >> np.uint64(32)) % np.uint64(partitions)
+            for p in np.flatnonzero(np.bincount(owner, minlength=partitions)):
+                with open(paths[p], "ab") as f:
+                    chunk[owner == p].tofile(f)
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            pairs = sorted_unique(np.fromfile(path, dtype=np.uint64))
+            os.remove(path)
+            yield pairs
+
+
+def split_pairs(pairs):
+    """`low << 32 | high` codes -> (low, high) author index arrays."""
+    return (
+        (pairs >> np.uint64(32)).astype(np.int64),
+        (pairs & np.uint64(0xFFFFFFFF)).astype(np.int64),
+    )
+
+
+class CoauthorStats:
+    """Coautores distintos de cada autor de uma tabela de autorias.
+
+    As linhas viram dois arrays de inteiros (trabalho codificado e índice do
+    autor); os pares de coautores são gerados por trabalho com numpy,
+    deduplicados em `uint64` e, se não couberem em `max_pairs`, em partições
+    no disco. Trabalhos com mais de `max_authors` autores (artigos de grandes
+    colaborações) não geram pares: cada um deles sozinho somaria milhares de
+    coautores a cada autor. Os autores desses trabalhos ficam marcados em
+    `in_capped_works` e não são listados por `without_coauthors`, já que
+    têm coautores, só não contados.
+    """
+
+    def __init__(self, filename, max_authors=None, max_pairs=memory_pairs):
+        works, authors, self.author_ids, self.names = read_authorships(filename)
+        authors, starts, sizes = work_groups(works, authors)
+        self.works = len(sizes)
+
+        self.in_capped_works = np.zeros(len(self.author_ids), dtype=bool)
+        if max_authors is not None:
+            capped = sizes > max_authors
+            self.skipped_works = int(capped.sum())
+            capped_sizes = sizes[capped]
+            rows = np.repeat(starts[capped], capped_sizes) + segment_offsets(
+                capped_sizes
+            )
+            self.in_capped_works[authors[rows]] = True
+            starts = starts[~capped]
+            sizes = sizes[~capped]
+        else:
+            self.skipped_works = 0
+
+        self.degree = np.zeros(len(self.author_ids), dtype=np.int64)
+        self.edges = 0
+        for pairs in unique_pairs(authors, starts, sizes, max_pairs):
+            low, high = split_pairs(pairs)
+            self.degree += np.bincount(low, minlength=len(self.degree))
+            self.degree += np.bincount(high, minlength=len(self.degree))
+            self.edges += len(pairs)
+
+    def top(self, k=None):
+        """Indices of the `k` authors with most co-authors (all if None)."""
+        with_coauthors = np.flatnonzero(self.degree)
+        if k is not None and k < len(with_coauthors):
+            degree = self.degree[with_coauthors]
+            threshold = -np.partition(-degree, k - 1)[k - 1]
+            above = with_coauthors[degree > threshold]
+            tied = with_coauthors[degree == threshold][: k - len(above)]
+            with_coauthors = np.concatenate([above, tied])
+        # Empates ficam na ordem em que os autores aparecem no arquivo
+        order = np.lexsort((with_coauthors, -self.degree[with_coauthors]))
+        return with_coauthors[order]
+
+    def without_coauthors(self):
+        """Authors with no co-author at all (not even in capped works)."""
+        return np.flatnonzero((self.degree == 0) & ~self.in_capped_works)
+
+    def only_in_capped_works(self):
+        """Authors whose co-authors all come from works above `max_authors`."""
+        return np.flatnonzero((self.degree == 0) & self.in_capped_works)
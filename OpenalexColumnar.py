@@ -0,0 +1,381 @@
+import json
+import os
+import pickle
+
+from OpenalexWriter import TABLE_FIELDNAMES, split_work
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # Dependência opcional: só é exigida nos formatos colunares
+    pa = None
+
+# Tipos das colunas que não são texto; as demais são `string`
+COLUMN_TYPES = {
+    "works": {
+        "cited_by_count": "int64",
+        "fwci": "float64",
+        "open_access": "bool",
+        "has_fulltext": "bool",
+        "is_retracted": "bool",
+        "is_paratext": "bool",
+        "locations_count": "int64",
+        "countries_distinct_count": "int64",
+        "institutions_distinct_count": "int64",
+        "referenced_works_count": "int64",
+    },
+    "authors": {"is_corresponding": "bool"},
+    "concepts": {"level": "int64", "score": "float64"},
+    "topics": {"score": "float64"},
+    "keywords": {"score": "float64"},
+}
+
+FORMAT_EXTENSIONS = {"parquet": "parquet", "arrow": "arrow"}
+
+
+def table_schema(table):
+    """Arrow schema with the same columns, in the same order, as the CSV."""
+    types = COLUMN_TYPES.get(table, {})
+    return pa.schema(
+        [
+            (name, pa.type_for_alias(types.get(name, "string")))
+            for name in TABLE_FIELDNAMES[table]
+        ]
+    )
+
+
+def table_dir(filename, output_format):
+    """`.../openalex_works.csv` -> `.../openalex_works.parquet` (um diretório)."""
+    return f"{os.path.splitext(filename)[0]}.{FORMAT_EXTENSIONS[output_format]}"
+
+
+# Estado da parte aberta de cada tabela no último `flush` (lido pelos checkpoints)
+SINK_STATE = "_sink_state.json"
+# Log das linhas da parte aberta, que só vira um arquivo legível ao ser fechada
+PART_LOG_SUFFIX = ".rows"
+
+
+def part_index(name):
+    """`part-00012.parquet` or `_part-00012.rows` -> 12 (None for other files)."""
+    name = name.lstrip("_")
+    if name.startswith("part-") and name[5:10].isdigit():
+        return int(name[5:10])
+    return None
+
+
+def part_log_path(directory, index):
+    return os.path.join(directory, f"_part-{index:05d}{PART_LOG_SUFFIX}")
+
+
+def _closed_parts(directory):
+    return {
+        part_index(name)
+        for name in os.listdir(directory)
+        if name.startswith("part-") and part_index(name) is not None
+    }
+
+
+def _read_part_log(path):
+    """Yield the tables saved in a part log; a truncated last record is cut off."""
+    with open(path, "rb") as f:
+        valid_size = 0
+        while True:
+            try:
+                table = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError, ValueError):
+                break
+            valid_size = f.tell()
+            yield table
+    if valid_size < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid_size)
+
+
+def table_dir_offset(directory):
+    """Checkpoint offset of a parts directory: `(part, rows, log_bytes)`.
+
+    `part` is the index of the open part (all parts below it are closed);
+    `rows` and `log_bytes` are what its row log held at the last `flush`.
+    """
+    state_file = os.path.join(directory, SINK_STATE)
+    if os.path.exists(state_file):
+        with open(state_file, encoding="utf-8") as f:
+            state = json.load(f)
+        return state["part"], state["rows"], state["log_bytes"]
+    return max(_closed_parts(directory), default=-1) + 1, 0, 0
+
+
+def _truncate_part(path, rows):
+    """Keep only the first `rows` rows of a closed part; True if it changed."""
+    if path.endswith(".parquet"):
+        table = pa.parquet.read_table(path)
+    else:
+        with pa.ipc.open_file(path) as reader:
+            table = reader.read_all()
+    if table.num_rows <= rows:
+        return False
+    tmp_path = f"{path}.tmp"
+    if path.endswith(".parquet"):
+        pa.parquet.write_table(table.slice(0, rows), tmp_path, compression="zstd")
+    else:
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.ipc.new_file(tmp_path, table.schema, options=options) as writer:
+            writer.write_table(table.slice(0, rows))
+    os.replace(tmp_path, path)
+    return True
+
+
+def truncate_table_dir(directory, offset):
+    """Cut a parts directory back to a `table_dir_offset`; True if it changed.
+
+    Parts after the open one are removed. If the open part was closed after
+    the checkpoint it keeps only its first `rows` rows; otherwise its row log
+    is cut back to `log_bytes`. Offsets of older checkpoints (just the
+    number of parts) count as an open part with no rows.
+    """
+    if isinstance(offset, int):
+        offset = (offset, 0, 0)
+    part, rows, log_bytes = offset
+    closed = _closed_parts(directory)
+    changed = False
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        index = part_index(name)
+        if name == SINK_STATE:
+            os.remove(path)
+        elif index is None:
+            continue
+        elif name.startswith("part-"):
+            if index > part or (index == part and not rows):
+                os.remove(path)
+                changed = True
+            elif index == part:
+                changed |= _truncate_part(path, rows)
+        elif (
+            name.endswith(PART_LOG_SUFFIX)
+            and index == part
+            and log_bytes
+            and part not in closed
+        ):
+            if os.path.getsize(path) > log_bytes:
+                with open(path, "r+b") as f:
+                    f.truncate(log_bytes)
+                changed = True
+        else:
+            # Partes incompletas e logs sem uso
+            os.remove(path)
+            changed |= name.endswith(PART_LOG_SUFFIX)
+    return changed
+
+
+class _TablePart:
+    """Parte aberta de uma tabela; só ganha o nome final ao ser fechada.
+
+    Um arquivo Parquet ou Arrow só pode ser lido depois de fechado, então
+    cada lote gravado na parte vai também para um log (`_part-NNNNN.rows`,
+    tabelas Arrow em pickle) que sobrevive a uma interrupção. Ao reabrir a
+    tabela, o log é regravado em uma parte nova.
+    """
+
+    def __init__(
+        self, directory, index, schema, output_format, compression, row_group_size
+    ):
+        extension = FORMAT_EXTENSIONS[output_format]
+        self.path = os.path.join(directory, f"part-{index:05d}.{extension}")
+        # Prefixo "_": leitores de datasets ignoram a parte ainda incompleta
+        self.tmp_path = os.path.join(directory, f"_part-{index:05d}.{extension}.tmp")
+        self.log_path = part_log_path(directory, index)
+        self.index = index
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._group = []
+        self._group_rows = 0
+
+        if output_format == "parquet":
+            self.writer = pa.parquet.ParquetWriter(
+                self.tmp_path, schema, compression=compression
+            )
+        else:
+            self.writer = pa.ipc.new_file(
+                self.tmp_path,
+                schema,
+                options=pa.ipc.IpcWriteOptions(compression=compression),
+            )
+        if os.path.exists(self.log_path):
+            for table in _read_part_log(self.log_path):
+                self._add(table)
+        self.log = open(self.log_path, "ab")
+
+    def _add(self, table):
+        self.rows += table.num_rows
+        self._group.append(table)
+        self._group_rows += table.num_rows
+        if self._group_rows >= self.row_group_size:
+            self.write_group()
+
+    def append(self, table):
+        pickle.dump(table, self.log, protocol=pickle.HIGHEST_PROTOCOL)
+        self._add(table)
+
+    def write_group(self):
+        """Write the accumulated rows as one row group (record batch)."""
+        if not self._group:
+            return
+        self.writer.write_table(pa.concat_tables(self._group))
+        self._group = []
+        self._group_rows = 0
+
+    def sync(self):
+        """Flush the log; returns the part's `(index, rows, log_bytes)`."""
+        self.log.flush()
+        return self.index, self.rows, self.log.tell()
+
+    def close(self):
+        self.write_group()
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+        self.log.close()
+        os.remove(self.log_path)
+
+
+class ColumnarSink:
+    """Alternativa ao DatasetSink que grava cada tabela em Parquet ou Arrow IPC.
+
+    Cada tabela vira um diretório (`openalex_works.parquet/`) com arquivos
+    `part-NNNNN`, lidos juntos por `pandas.read_parquet` ou
+    `pyarrow.dataset.dataset`. As linhas são gravadas em row groups de
+    `row_group_size` linhas, e a parte é fechada ao chegar a `part_rows`
+    linhas. A parte aberta continua aberta entre os checkpoints: `flush` só
+    grava as linhas pendentes no log da parte e registra em `_sink_state.json`
+    até onde o log vai, para que um checkpoint possa cortar a tabela de volta
+    a esse ponto. Uma coleta retomada regrava o log em uma parte nova e
+    continua a numeração das partes existentes.
+    """
+
+    def __init__(
+        self,
+        filenames,
+        output_format="parquet",
+        row_group_size=50000,
+        compression="zstd",
+        abstract_format="text",
+        part_rows=500000,
+    ):
+        if pa is None:
+            raise ImportError(
+                f"O formato '{output_format}' precisa do pyarrow. "
+                "Instale com: uv sync --extra columnar"
+            )
+        if output_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Formato de saída desconhecido: {output_format}")
+
+        self.output_format = output_format
+        self.row_group_size = row_group_size
+        self.part_rows = part_rows
+        self.compression = compression
+        self.abstract_format = abstract_format
+        self.dirs = {
+            table: table_dir(filename, output_format)
+            for table, filename in filenames.items()
+        }
+        self._schemas = {table: table_schema(table) for table in self.dirs}
+        self._rows = {table: [] for table in self.dirs}
+        self._parts = {}
+        self._next_index = {}
+
+        for table, directory in self.dirs.items():
+            os.makedirs(directory, exist_ok=True)
+            next_index = max(_closed_parts(directory), default=-1) + 1
+            for name in os.listdir(directory):
+                index = part_index(name)
+                if name.startswith("_part-") and not (
+                    name.endswith(PART_LOG_SUFFIX) and index == next_index
+                ):
+                    # Parte que ficou incompleta em uma execução interrompida
+                    # (ou log de uma parte que chegou a ser fechada)
+                    os.remove(os.path.join(directory, name))
+            self._next_index[table] = next_index
+            # A parte que estava aberta é refeita a partir do seu log
+            if os.path.exists(part_log_path(directory, next_index)):
+                self._open_part(table)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, works, only_authors=()):
+        only_authors = set(only_authors)
+        buffers = self._rows
+        abstract_format = self.abstract_format
+
+        for work in works:
+            for table, rows in split_work(work, only_authors, abstract_format).items():
+                buffer = buffers.get(table)
+                if buffer is not None:
+                    buffer.extend(rows)
+
+        for table, buffer in buffers.items():
+            if len(buffer) >= self.row_group_size:
+                self._write_rows(table)
+
+    def write_rows(self, table, rows):
+        """Write already built rows (dicts with the table's columns)."""
+        buffer = self._rows[table]
+        buffer.extend(rows)
+        if len(buffer) >= self.row_group_size:
+            self._write_rows(table)
+
+    def _open_part(self, table):
+        part = self._parts[table] = _TablePart(
+            self.dirs[table],
+            self._next_index[table],
+            self._schemas[table],
+            self.output_format,
+            self.compression,
+            self.row_group_size,
+        )
+        self._next_index[table] += 1
+        return part
+
+    def _close_part(self, table):
+        self._parts.pop(table).close()
+        state_file = os.path.join(self.dirs[table], SINK_STATE)
+        if os.path.exists(state_file):
+            os.remove(state_file)
+
+    def _write_rows(self, table):
+        rows = self._rows[table]
+        if not rows:
+            return
+        self._rows[table] = []
+
+        part = self._parts.get(table) or self._open_part(table)
+        part.append(pa.Table.from_pylist(rows, schema=self._schemas[table]))
+        if part.rows >= self.part_rows:
+            self._close_part(table)
+
+    def flush(self):
+        for table in self.dirs:
+            self._write_rows(table)
+        for table, part in self._parts.items():
+            index, rows, log_bytes = part.sync()
+            state_file = os.path.join(self.dirs[table], SINK_STATE)
+            with open(f"{state_file}.tmp", "w", encoding="utf-8") as f:
+                json.dump({"part": index, "rows": rows, "log_bytes": log_bytes}, f)
+            os.replace(f"{state_file}.tmp", state_file)
+
+    def close(self):
+        for table in self.dirs:
+            self._write_rows(table)
+        for table in list(self._parts):
+            self._close_part(table)
+        # Tabelas sem nenhuma linha ganham uma parte vazia, para que o esquema
+        # exista para quem for ler
+        for table, index in self._next_index.items():
+            if index == 0:
+                part = self._open_part(table)
+                part.writer.write_table(self._schemas[table].empty_table())
+                self._close_part(table)
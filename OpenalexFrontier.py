@@ -0,0 +1,273 @@
+import heapq
+import os
+from array import array
+from collections import deque
+
+from OpenalexIds import IdQueue, IdSet, decode_id, encode_id
+
+# Critérios da fronteira por prioridade (--priority)
+priority_keys = ("cited_by_count", "fwci", "frequency")
+
+
+def work_score(work, priority):
+    """Weight a work gives to each ID discovered through it (None for FIFO)."""
+    if priority is None:
+        return None
+    if priority == "frequency":
+        return 1.0
+    return float(work.get(priority) or 0)
+
+
+def score_fields(priority):
+    """Work fields `work_score` reads for this criterion."""
+    return [priority] if priority in ("cited_by_count", "fwci") else []
+
+
+def ranked_ids(frontier):
+    """Encoded IDs of a saved priority frontier, best first."""
+    return sorted(frontier, key=lambda code: (-frontier[code], code))
+
+
+def fifo_checkpoint_queue(state):
+    """Fila FIFO de um checkpoint e o total de IDs já enfileirados.
+
+    Se o checkpoint tiver uma fronteira por prioridade, os IDs dela entram no
+    final, do melhor para o pior, e contam como recém-enfileirados.
+    """
+    ranked = ranked_ids(state.get("frontier", {}))
+    queue = array("q", state["queue"])
+    queue.extend(ranked)
+    return queue, state["enqueued"] + len(ranked)
+
+
+class SpillingFrontier:
+    """Fila de IDs a visitar que ignora repetidos e transborda para o disco.
+
+    Um ID só entra na fila uma vez: `append` o descarta se ele já estiver em
+    `seen` (todos os IDs já enfileirados). A fila é formada por um início e um
+    fim em memória e, entre eles, segmentos de `segment_size` IDs gravados em
+    `directory` como `array('q')`; os segmentos voltam para a memória na ordem
+    FIFO conforme o início se esvazia. Assim a memória fica em torno de dois
+    segmentos, qualquer que seja o tamanho da fila.
+
+    `enqueued` conta os IDs aceitos desde o início da coleta, como a
+    JournaledQueue, para os checkpoints incrementais.
+    """
+
+    def __init__(
+        self, directory, iterable=(), enqueued=None, seen=None, segment_size=262144
+    ):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.seen = IdSet() if seen is None else seen
+        self.enqueued = 0
+
+        self._head = IdQueue()
+        self._segments = deque()  # (caminho, quantidade de IDs)
+        self._tail = IdQueue()
+        self._next_segment = 0
+        self._len = 0
+
+        # Segmentos de uma execução anterior: a fila volta do checkpoint
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.startswith("segment-"):
+                os.remove(os.path.join(directory, name))
+
+        for item in iterable:
+            self.seen.add(item)
+            self._push(encode_id(item))
+        self.enqueued = self._len if enqueued is None else enqueued
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def _push(self, code):
+        self._tail.append(code)
+        self._len += 1
+        if len(self._tail) >= self.segment_size:
+            if self._head or self._segments:
+                self._spill()
+            else:
+                self._head, self._tail = self._tail, IdQueue()
+
+    def _spill(self):
+        path = os.path.join(self.directory, f"segment-{self._next_segment:06d}.bin")
+        self._next_segment += 1
+        codes = self._tail.tail_codes(len(self._tail))
+        with open(path, "wb") as f:
+            codes.tofile(f)
+        self._segments.append((path, len(codes)))
+        self._tail = IdQueue()
+
+    @staticmethod
+    def _read_segment(path, count):
+        codes = array("q")
+        with open(path, "rb") as f:
+            codes.fromfile(f, count)
+        return codes
+
+    def append(self, item, score=None) -> bool:
+        """Enqueue `item` unless it was ever enqueued before (`score` is unused)."""
+        if not self.seen.add(item):
+            return False
+        self._push(encode_id(item))
+        self.enqueued += 1
+        return True
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def popleft(self):
+        if not self._head:
+            if self._segments:
+                path, count = self._segments.popleft()
+                self._head = IdQueue(self._read_segment(path, count))
+                os.remove(path)
+            else:
+                self._head, self._tail = self._tail, IdQueue()
+        item = self._head.popleft()
+        self._len -= 1
+        return item
+
+    def extendleft(self, items):
+        """Devolve IDs ao início da fila (lotes cancelados); não passam por `seen`."""
+        size = len(self._head)
+        self._head.extendleft(items)
+        self._len += len(self._head) - size
+
+    def tail_codes(self, count) -> array:
+        """The last `count` encoded IDs, in queue order."""
+        count = min(count, self._len)
+        parts = [self._tail.tail_codes(count)]
+        missing = count - len(parts[0])
+        for path, size in reversed(self._segments):
+            if missing <= 0:
+                break
+            codes = self._read_segment(path, size)
+            parts.append(codes[max(0, size - missing) :])
+            missing -= size
+        if missing > 0:
+            parts.append(self._head.tail_codes(missing))
+
+        tail = array("q")
+        for part in reversed(parts):
+            tail.extend(part)
+        return tail
+
+    def close(self):
+        """Apaga os segmentos do disco; a fila fica salva no checkpoint."""
+        for path, _ in self._segments:
+            os.remove(path)
+        self._segments.clear()
+
+
+class PriorityFrontier:
+    """Fronteira best-first: `popleft` devolve o ID de maior pontuação.
+
+    A pontuação de um ID é a soma do `score` de cada `append` (por exemplo o
+    `cited_by_count` de cada trabalho em que ele apareceu), então um ID que
+    volta a ser encontrado sobe na fila. O heap é atualizado de forma
+    preguiçosa: cada aumento empilha uma nova entrada e as antigas são
+    descartadas ao sair. Empates saem pelo menor ID codificado, que não
+    depende da ordem de chegada: a fronteira refeita de um checkpoint devolve
+    os IDs na mesma ordem que a original.
+
+    Para os checkpoints incrementais, a fronteira registra a pontuação final
+    (ou a saída) de cada ID alterado desde o último checkpoint.
+    """
+
+    def __init__(self, entries=(), short_ids=False):
+        self.short_ids = short_ids
+        self._live = {}
+        self._heap = []
+        self._changes = {}
+        # IDs retirados e ainda não confirmados pela coleta (lotes em voo)
+        self._popped = {}
+        self._last_pending = ()
+
+        for code, score in dict(entries).items():
+            self._live[code] = score
+            self._heap.append((-score, code))
+        heapq.heapify(self._heap)
+
+    @classmethod
+    def from_checkpoint(cls, state, short_ids=False):
+        """Fronteira salva no checkpoint; IDs de uma fila FIFO entram com 0."""
+        frontier = cls(state.get("frontier", {}), short_ids)
+        for code in state["queue"]:
+            frontier.append(code, 0.0)
+        return frontier
+
+    def __len__(self):
+        return len(self._live)
+
+    def __bool__(self):
+        return bool(self._live)
+
+    def _push(self, code, score):
+        heapq.heappush(self._heap, (-score, code))
+        self._changes[code] = score
+        # Reconstrói o heap quando as entradas velhas passam a dominar
+        if len(self._heap) > 2 * len(self._live) + 1024:
+            self._heap = [
+                entry for entry in self._heap if self._live.get(entry[1]) == -entry[0]
+            ]
+            heapq.heapify(self._heap)
+
+    def append(self, item, score=None):
+        code = encode_id(item)
+        score = 1.0 if score is None else score
+        current = self._live.get(code)
+        if current is None:
+            self._live[code] = score
+        elif score:
+            self._live[code] = score = current + score
+        else:
+            return
+        self._push(code, score)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def popleft(self):
+        while self._heap:
+            neg_score, code = heapq.heappop(self._heap)
+            if self._live.get(code) != -neg_score:
+                continue
+            del self._live[code]
+            self._popped[code] = -neg_score
+            self._changes[code] = None
+            return decode_id(code, self.short_ids)
+        raise IndexError("pop from an empty frontier")
+
+    def extendleft(self, items):
+        """Devolve IDs retirados (lotes cancelados) com a pontuação que tinham."""
+        for item in items:
+            code = encode_id(item)
+            self.append(code, self._popped.pop(code, 0.0))
+
+    def changes(self, pending):
+        """Pontuações alteradas desde a última chamada (None = saiu da fila).
+
+        IDs de `pending` (retirados por lotes ainda não entregues) contam
+        como ainda na fila.
+        """
+        pending = {encode_id(item) for item in pending}
+        changes, self._changes = self._changes, {}
+
+        # Pendentes do checkpoint anterior que já foram consumidos
+        for code in self._last_pending:
+            if code not in pending and code not in self._live:
+                changes[code] = None
+        for code in pending:
+            changes[code] = self._popped.get(code, 0.0) + self._live.get(code, 0.0)
+
+        self._popped = {code: self._popped.get(code, 0.0) for code in pending}
+        self._last_pending = pending
+        return changes
@@ -0,0 +1,302 @@
+import csv
+import json
+import os
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # Dependência opcional: só é exigida pelas análises
+    np = None
+
+from OpenalexCoauthors import (
+    read_authorships,
+    require_numpy,
+    segment_offsets,
+    sorted_unique,
+    split_pairs,
+    unique_pairs,
+    work_groups,
+)
+from OpenalexIds import decode_id, encode_id, openalex_url_prefix
+
+# Versão do formato do diretório do grafo
+GRAPH_VERSION = 1
+GRAPH_META = "graph.json"
+
+# Relações do grafo: espaço de nós, tabela de origem (nomes dos coletores e do
+# author_graph) e colunas de origem e destino
+RELATIONS = {
+    "citations": {
+        "space": "works",
+        "tables": ("openalex_citations.csv", "citations.csv"),
+        "columns": ("work_id", "cited_work_id"),
+    },
+    "related_works": {
+        "space": "works",
+        "tables": ("openalex_related_works.csv", "related_works.csv"),
+        "columns": ("work_id", "related_work_id"),
+    },
+    "coauthors": {
+        "space": "authors",
+        "tables": ("openalex_authors.csv", "authorships.csv"),
+        "columns": ("author_id", "author_id"),
+    },
+}
+# Relações derivadas: arestas invertidas de outra relação
+TRANSPOSED = {"cited_by": "citations"}
+
+
+def find_table(folder, relation):
+    for name in RELATIONS[relation]["tables"]:
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_edges(filename, source_column, target_column):
+    """Read two ID columns of an edge CSV as encoded int64 arrays."""
+    require_numpy()
+    sources = array("q")
+    targets = array("q")
+    last_source = None
+    last_code = 0
+    prefix = openalex_url_prefix
+    letter_at = len(prefix)
+    with open(filename, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        for column in (source_column, target_column):
+            if column not in header:
+                raise KeyError(column)
+        source_col = header.index(source_column)
+        target_col = header.index(target_column)
+        for row in reader:
+            if not row or not row[target_col]:
+                continue
+            # As linhas de um trabalho vêm juntas: codifica a origem uma vez
+            if row[source_col] != last_source:
+                last_source = row[source_col]
+                last_code = encode_id(last_source)
+            sources.append(last_code)
+            target = row[target_col]
+            # Caminho rápido de `encode_id` para as URLs gravadas pelos coletores
+            if target.startswith(prefix) and target[letter_at].isupper():
+                targets.append(
+                    (ord(target[letter_at]) << 56) | int(target[letter_at + 1 :])
+                )
+            else:
+                targets.append(encode_id(target))
+    return (
+        np.frombuffer(sources, dtype=np.int64),
+        np.frombuffer(targets, dtype=np.int64),
+    )
+
+
+def build_csr(sources, targets, node_count):
+    """Deduplicated CSR arrays (`indptr`, `indices`) of the given edges."""
+    pairs = sorted_unique(
+        (sources.astype(np.uint64) << np.uint64(32)) | targets.astype(np.uint64)
+    )
+    sources, targets = split_pairs(pairs)
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=node_count), out=indptr[1:])
+    return indptr, targets.astype(np.int32)
+
+
+def _save(output_dir, name, values):
+    np.save(os.path.join(output_dir, f"{name}.npy"), values)
+
+
+def build_graph(folder, output_dir=None, relations=None, max_authors=None):
+    """Convert the edge tables of a collection into a CSR graph directory.
+
+    Each relation is saved as `<relation>.indptr.npy` and
+    `<relation>.indices.npy`; the nodes of each space (`works`, `authors`)
+    are the sorted encoded IDs in `<space>.npy`, so a node's index is its
+    position there. Returns the metadata written to `graph.json`.
+    """
+    require_numpy()
+    output_dir = output_dir or os.path.join(folder, "openalex_graph")
+    os.makedirs(output_dir, exist_ok=True)
+    relations = relations or [*RELATIONS, *TRANSPOSED]
+    # Tabelas a ler: as das relações pedidas e as das relações invertidas
+    tables = {TRANSPOSED.get(relation, relation) for relation in relations}
+
+    edges = {}
+    space_codes = {"works": [], "authors": []}
+    sources = {}
+    for relation in RELATIONS:
+        filename = find_table(folder, relation) if relation in tables else None
+        if filename is None:
+            continue
+        sources[relation] = filename
+        print(f"Lendo {relation}: {filename} ...")
+        if relation == "coauthors":
+            works, authors, author_ids, _ = read_authorships(filename)
+            codes = np.array([encode_id(author_id) for author_id in author_ids])
+            authors, starts, sizes = work_groups(works, authors)
+            if max_authors is not None:
+                starts = starts[sizes <= max_authors]
+                sizes = sizes[sizes <= max_authors]
+            pairs = [
+                split_pairs(chunk) for chunk in unique_pairs(authors, starts, sizes)
+            ]
+            low = np.concatenate([p[0] for p in pairs] or [np.zeros(0, np.int64)])
+            high = np.concatenate([p[1] for p in pairs] or [np.zeros(0, np.int64)])
+            # Coautoria não tem direção: cada par vira duas arestas
+            edges[relation] = (codes[np.r_[low, high]], codes[np.r_[high, low]])
+            space_codes["authors"].append(codes)
+        else:
+            columns = RELATIONS[relation]["columns"]
+            edges[relation] = read_edges(filename, *columns)
+            space_codes["works"].extend(edges[relation])
+
+    meta = {"version": GRAPH_VERSION, "spaces": {}, "relations": {}}
+    nodes = {}
+    for space, codes in space_codes.items():
+        if not codes:
+            continue
+        nodes[space] = sorted_unique(np.concatenate(codes))
+        _save(output_dir, space, nodes[space])
+        meta["spaces"][space] = {"nodes": len(nodes[space])}
+
+    def save_relation(name, space, source_codes, target_codes, source):
+        node_codes = nodes[space]
+        indptr, indices = build_csr(
+            np.searchsorted(node_codes, source_codes),
+            np.searchsorted(node_codes, target_codes),
+            len(node_codes),
+        )
+        _save(output_dir, f"{name}.indptr", indptr)
+        _save(output_dir, f"{name}.indices", indices)
+        meta["relations"][name] = {
+            "space": space,
+            "edges": len(indices),
+            "source": os.path.abspath(source),
+        }
+        print(f"{name}: {len(node_codes)} nós, {len(indices)} arestas")
+
+    for relation, (source_codes, target_codes) in edges.items():
+        space = RELATIONS[relation]["space"]
+        if relation in relations:
+            save_relation(
+                relation, space, source_codes, target_codes, sources[relation]
+            )
+        for name, base in TRANSPOSED.items():
+            if base == relation and name in relations:
+                save_relation(
+                    name, space, target_codes, source_codes, sources[relation]
+                )
+
+    with open(os.path.join(output_dir, GRAPH_META), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class GraphStore:
+    """Grafo salvo por `build_graph`, aberto com os arrays mapeados em memória.
+
+    Abrir não lê as arestas: cada array é mapeado (`np.load(mmap_mode="r")`)
+    no primeiro uso, e só as páginas tocadas pelas consultas são lidas do
+    disco. As consultas aceitam IDs do OpenAlex (URL ou curto) ou índices de
+    nós; os IDs de um espaço ficam ordenados, então a busca é binária.
+    """
+
+    def __init__(self, path):
+        require_numpy()
+        self.path = path
+        with open(os.path.join(path, GRAPH_META), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != GRAPH_VERSION:
+            raise ValueError(f"Versão do grafo não suportada em {path}")
+        self.relations = self.meta["relations"]
+        self._arrays = {}
+
+    def _array(self, name):
+        values = self._arrays.get(name)
+        if values is None:
+            values = self._arrays[name] = np.load(
+                os.path.join(self.path, f"{name}.npy"), mmap_mode="r"
+            )
+        return values
+
+    def _relation(self, relation):
+        if relation not in self.relations:
+            raise KeyError(f"Relação não encontrada no grafo: {relation}")
+        space = self.relations[relation]["space"]
+        return (
+            space,
+            self._array(f"{relation}.indptr"),
+            self._array(f"{relation}.indices"),
+        )
+
+    def nodes(self, space):
+        return self._array(space)
+
+    def csr(self, relation):
+        """`(indptr, indices)` arrays of a relation."""
+        return self._relation(relation)[1:]
+
+    def index(self, space, openalex_id):
+        """Node index of an ID in `space`, or -1 if it is not in the graph."""
+        codes = self._array(space)
+        code = encode_id(openalex_id)
+        position = int(np.searchsorted(codes, code))
+        if position < len(codes) and codes[position] == code:
+            return position
+        return -1
+
+    def ids(self, space, indices, short=True):
+        codes = self._array(space)
+        return [decode_id(int(codes[index]), short) for index in indices]
+
+    def _indices(self, space, nodes):
+        if isinstance(nodes, (str, int, np.integer)):
+            nodes = [nodes]
+        result = []
+        for node in nodes:
+            index = self.index(space, node) if isinstance(node, str) else int(node)
+            if index >= 0:
+                result.append(index)
+        return np.array(result, dtype=np.int64)
+
+    def degree(self, relation, node=None):
+        """Out-degree of one node (ID or index), or of all nodes as an array."""
+        space, indptr, _ = self._relation(relation)
+        if node is None:
+            return np.diff(indptr)
+        index = self.index(space, node) if isinstance(node, str) else node
+        if index < 0:
+            return 0
+        return int(indptr[index + 1] - indptr[index])
+
+    def neighbors(self, relation, node):
+        """Neighbour node indices of one node (ID or index)."""
+        space, indptr, indices = self._relation(relation)
+        index = self.index(space, node) if isinstance(node, str) else node
+        if index < 0:
+            return np.zeros(0, dtype=np.int32)
+        return indices[indptr[index] : indptr[index + 1]]
+
+    def k_hop(self, relation, seeds, hops):
+        """Breadth-first layers from `seeds`: a list of node index arrays.
+
+        Layer 0 holds the seeds found in the graph and layer d the nodes
+        first reached after d hops; stops early when a layer is empty.
+        """
+        space, indptr, indices = self._relation(relation)
+        frontier = np.unique(self._indices(space, seeds))
+        visited = np.zeros(len(indptr) - 1, dtype=bool)
+        visited[frontier] = True
+        layers = [frontier]
+        for _ in range(hops):
+            starts = indptr[frontier]
+            lengths = indptr[frontier + 1] - starts
+            reached = indices[np.repeat(starts, lengths) + segment_offsets(lengths)]
+            frontier = np.unique(reached[~visited[reached]]).astype(np.int64)
+            if not len(frontier):
+                break
+            visited[frontier] = True
+            layers.append(frontier)
+        return layers
@@ -0,0 +1,226 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+# Todos os IDs do OpenAlex são URLs deste domínio
+openalex_url_prefix = "https://openalex.org/"
+
+# Containers com mais IDs que isso viram um bitmap de 8 KiB (estilo roaring)
+array_container_max = 4096
+queue_chunk_size = 4096
+
+
+def encode_id(openalex_id) -> int:
+    """`https://openalex.org/W4398186459` (ou `W4398186459`) -> int64.
+
+    A letra da entidade fica nos 8 bits altos e a parte numérica nos 56
+    restantes. Inteiros são devolvidos sem alteração.
+    """
+    if isinstance(openalex_id, int):
+        return openalex_id
+    short = openalex_id.rsplit("/", 1)[-1]
+    prefix = short[:1].upper()
+    if not prefix.isalpha() or not short[1:].isdigit():
+        raise ValueError(f"ID do OpenAlex inválido: {openalex_id}")
+    return (ord(prefix) << 56) | int(short[1:])
+
+
+def decode_id(code: int, short: bool = False) -> str:
+    """Inverse of `encode_id`; returns the full URL unless `short` is set."""
+    short_id = f"{chr(code >> 56)}{code & 0xFFFFFFFFFFFFFF}"
+    return short_id if short else openalex_url_prefix + short_id
+
+
+def id_shard(openalex_id, shards: int) -> int:
+    """Shard (0..shards-1) that owns an ID; stable across processes and runs."""
+    mixed = (encode_id(openalex_id) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    return (mixed >> 32) % shards
+
+
+class IdSet:
+    """Conjunto de IDs do OpenAlex guardados como inteiros.
+
+    Os IDs são agrupados pelos bits altos; cada grupo guarda os 16 bits baixos
+    em um `array('H')` ordenado ou, quando fica denso, em um bitmap. Isso custa
+    de 2 a 3 bytes por ID, contra ~100 bytes de uma URL em um `set`. Aceita e
+    devolve os IDs como texto (URL completa, ou curto com `short_ids=True`).
+    """
+
+    def __init__(self, iterable=(), short_ids=False):
+        self.short_ids = short_ids
+        self._containers = {}
+        self._len = 0
+        if isinstance(iterable, IdSet):
+            # Cópia direta dos containers, sem decodificar os IDs
+            self._containers = {
+                key: container[:] for key, container in iterable._containers.items()
+            }
+            self._len = len(iterable)
+            return
+        for item in iterable:
+            self.add(item)
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, item):
+        try:
+            code = encode_id(item)
+        except (ValueError, TypeError):
+            return False
+        container = self._containers.get(code >> 16)
+        if container is None:
+            return False
+        low = code & 0xFFFF
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] & (1 << (low & 7)))
+        i = bisect_left(container, low)
+        return i < len(container) and container[i] == low
+
+    def add(self, item) -> bool:
+        """Add one ID; returns False if it was already present."""
+        code = encode_id(item)
+        key = code >> 16
+        low = code & 0xFFFF
+        container = self._containers.get(key)
+
+        if container is None:
+            self._containers[key] = array("H", [low])
+        elif isinstance(container, bytearray):
+            mask = 1 << (low & 7)
+            if container[low >> 3] & mask:
+                return False
+            container[low >> 3] |= mask
+        else:
+            i = bisect_left(container, low)
+            if i < len(container) and container[i] == low:
+                return False
+            container.insert(i, low)
+            if len(container) > array_container_max:
+                self._containers[key] = self._to_bitmap(container)
+
+        self._len += 1
+        return True
+
+    def update(self, *iterables):
+        for items in iterables:
+            for item in items:
+                self.add(item)
+
+    @staticmethod
+    def _to_bitmap(container):
+        bitmap = bytearray(8192)
+        for low in container:
+            bitmap[low >> 3] |= 1 << (low & 7)
+        return bitmap
+
+    def codes(self):
+        """Iterate over the encoded IDs, in increasing order."""
+        for key in sorted(self._containers):
+            container = self._containers[key]
+            base = key << 16
+            if isinstance(container, bytearray):
+                for byte_index, byte in enumerate(container):
+                    while byte:
+                        bit = byte & -byte
+                        yield base | (byte_index << 3) | (bit.bit_length() - 1)
+                        byte ^= bit
+            else:
+                for low in container:
+                    yield base | low
+
+    def __iter__(self):
+        short = self.short_ids
+        for code in self.codes():
+            yield decode_id(code, short)
+
+
+class IdQueue:
+    """Fila FIFO de IDs do OpenAlex em blocos de `array('q')`.
+
+    Mesma interface de `deque` usada pelas coletas (`append`, `extend`,
+    `popleft`, `extendleft`), com 8 bytes por ID na fila.
+    """
+
+    def __init__(self, iterable=(), short_ids=False):
+        self.short_ids = short_ids
+        self._chunks = deque()
+        self._head = 0
+        self._len = 0
+        if isinstance(iterable, array):
+            # IDs já codificados (ex.: fila de um checkpoint)
+            for i in range(0, len(iterable), queue_chunk_size):
+                self._chunks.append(iterable[i : i + queue_chunk_size])
+            self._len = len(iterable)
+            return
+        self.extend(iterable)
+
+    def __len__(self):
+        return self._len
+
+    def __bool__(self):
+        return self._len > 0
+
+    def append(self, item, score=None):
+        # `score` só é usado pela PriorityFrontier (mesma interface)
+        chunks = self._chunks
+        if not chunks or len(chunks[-1]) >= queue_chunk_size:
+            chunks.append(array("q"))
+        chunks[-1].append(encode_id(item))
+        self._len += 1
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def popleft(self):
+        if not self._len:
+            raise IndexError("pop from an empty queue")
+        chunk = self._chunks[0]
+        code = chunk[self._head]
+        self._head += 1
+        if self._head == len(chunk):
+            self._chunks.popleft()
+            self._head = 0
+        self._len -= 1
+        return decode_id(code, self.short_ids)
+
+    def extendleft(self, items):
+        """Like `deque.extendleft`: the last item ends up first."""
+        codes = array("q", (encode_id(item) for item in items))
+        if not codes:
+            return
+        codes.reverse()
+        if self._head:
+            self._chunks[0] = self._chunks[0][self._head :]
+            self._head = 0
+        self._chunks.appendleft(codes)
+        self._len += len(codes)
+
+    def codes(self):
+        """Iterate over the encoded IDs, from the front of the queue."""
+        head = self._head
+        for chunk in self._chunks:
+            yield from chunk[head:] if head else chunk
+            head = 0
+
+    def tail_codes(self, count) -> array:
+        """The last `count` encoded IDs, in queue order."""
+        count = min(count, self._len)
+        chunks = []
+        size = 0
+        for chunk in reversed(self._chunks):
+            if size >= count:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+
+        tail = array("q")
+        for chunk in reversed(chunks):
+            tail.extend(chunk)
+        return tail[len(tail) - count :]
+
+    def __iter__(self):
+        short = self.short_ids
+        for code in self.codes():
+            yield decode_id(code, short)
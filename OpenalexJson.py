@@ -0,0 +1,29 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional: só acelera a decodificação
+    orjson = None
+
+
+def stdlib_loads(data):
+    """Decode JSON bytes/str with the standard library."""
+    return json.loads(data)
+
+
+def stdlib_dumps(obj) -> bytes:
+    """Compact UTF-8 JSON with the standard library."""
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+# Decodificador padrão: orjson quando instalado, senão o json da stdlib.
+# Os dois recebem os bytes crus da resposta, sem decodificar para str antes.
+if orjson is not None:
+    loads = orjson.loads
+    dumps = orjson.dumps
+else:
+    loads = stdlib_loads
+    dumps = stdlib_dumps
+
+# Nome do decodificador em uso (para logs e benchmarks)
+backend = "orjson" if orjson is not None else "json"
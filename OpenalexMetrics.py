@@ -0,0 +1,223 @@
+import datetime
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Limites (em segundos) dos buckets do histograma de latência das requisições
+latency_buckets = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Etapas medidas pelos coletores, na ordem dos relatórios
+STAGES = (
+    "rate_limit",
+    "fetch",
+    "decode",
+    "wait",
+    "transform",
+    "write",
+    "checkpoint",
+)
+
+
+class Metrics:
+    """Tempo por etapa e estatísticas das requisições de uma coleta.
+
+    As etapas são: `rate_limit` (espera pelo limitador), `fetch` (da
+    requisição ao corpo da resposta), `decode` (JSON), `wait` (laço de coleta
+    parado esperando um lote), `transform` (processamento de cada lote no
+    laço), `write` (montagem e gravação das linhas) e `checkpoint`. Como as
+    requisições correm em paralelo, `fetch` soma o tempo de todas e pode
+    passar do tempo total.
+
+    É seguro usar de várias threads. `emit` acrescenta uma linha JSON com o
+    estado atual e, com `prometheus_file`, regrava o arquivo no formato texto
+    do Prometheus (para o textfile collector do node exporter).
+    """
+
+    def __init__(self, prometheus_file=None, labels=None):
+        self.prometheus_file = prometheus_file
+        self.labels = dict(labels or {})
+        self.start_time = time.time()
+        self._lock = threading.Lock()
+        self._stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self._stage_calls = dict.fromkeys(STAGES, 0)
+        self._buckets = [0] * (len(latency_buckets) + 1)
+        self._latency_sum = 0.0
+        self._requests = 0
+        self._bytes = 0
+        self._retries = 0
+        self._rate_limited = 0
+        self._http_errors = 0
+
+    def add(self, stage, seconds, calls=1):
+        with self._lock:
+            self._stage_seconds[stage] = self._stage_seconds.get(stage, 0.0) + seconds
+            self._stage_calls[stage] = self._stage_calls.get(stage, 0) + calls
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed(self, name, func):
+        """`func` wrapped so that each call is added to stage `name`."""
+
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def observe_request(self, seconds, size, status):
+        """Record one HTTP response: latency, body size and status."""
+        with self._lock:
+            self._stage_seconds["fetch"] += seconds
+            self._stage_calls["fetch"] += 1
+            self._buckets[bisect_left(latency_buckets, seconds)] += 1
+            self._latency_sum += seconds
+            self._requests += 1
+            self._bytes += size
+            if status == 429:
+                self._rate_limited += 1
+            elif status >= 400:
+                self._http_errors += 1
+
+    def observe_retry(self):
+        with self._lock:
+            self._retries += 1
+
+    def snapshot(self, counts=None):
+        """Current state as a JSON-serializable dict."""
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip((*latency_buckets, "+Inf"), self._buckets):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {
+                "timestamp": datetime.datetime.now().isoformat(),
+                "elapsed_seconds": round(time.time() - self.start_time, 3),
+                **({"labels": self.labels} if self.labels else {}),
+                "counts": dict(counts or {}),
+                "stages": {
+                    stage: {
+                        "seconds": round(self._stage_seconds[stage], 6),
+                        "calls": self._stage_calls[stage],
+                    }
+                    for stage in self._stage_seconds
+                },
+                "requests": {
+                    "total": self._requests,
+                    "bytes_received": self._bytes,
+                    "retries": self._retries,
+                    "rate_limited": self._rate_limited,
+                    "http_errors": self._http_errors,
+                    "latency_seconds_sum": round(self._latency_sum, 6),
+                    "latency_buckets": buckets,
+                },
+            }
+
+    def emit(self, jsonl_file, counts=None):
+        """Append the current state to `jsonl_file` (and the Prometheus file)."""
+        snapshot = self.snapshot(counts)
+        with open(jsonl_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot) + "\n")
+        if self.prometheus_file:
+            write_prometheus(self.prometheus_file, snapshot)
+        return snapshot
+
+
+def _label_text(labels, **extra):
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def prometheus_text(snapshot):
+    """Render a `Metrics.snapshot` in the Prometheus text exposition format."""
+    labels = snapshot.get("labels", {})
+    requests = snapshot["requests"]
+    lines = [
+        "# HELP openalex_stage_seconds_total Tempo acumulado por etapa da coleta.",
+        "# TYPE openalex_stage_seconds_total counter",
+    ]
+    for stage, values in snapshot["stages"].items():
+        lines.append(
+            f"openalex_stage_seconds_total{_label_text(labels, stage=stage)} "
+            f"{values['seconds']}"
+        )
+    lines += [
+        "# HELP openalex_stage_calls_total Execuções de cada etapa da coleta.",
+        "# TYPE openalex_stage_calls_total counter",
+    ]
+    for stage, values in snapshot["stages"].items():
+        lines.append(
+            f"openalex_stage_calls_total{_label_text(labels, stage=stage)} "
+            f"{values['calls']}"
+        )
+
+    lines += [
+        "# HELP openalex_request_duration_seconds Latência das requisições à API.",
+        "# TYPE openalex_request_duration_seconds histogram",
+    ]
+    for bound, count in requests["latency_buckets"].items():
+        lines.append(
+            f"openalex_request_duration_seconds_bucket{_label_text(labels, le=bound)} "
+            f"{count}"
+        )
+    lines.append(
+        f"openalex_request_duration_seconds_sum{_label_text(labels)} "
+        f"{requests['latency_seconds_sum']}"
+    )
+    lines.append(
+        f"openalex_request_duration_seconds_count{_label_text(labels)} "
+        f"{requests['total']}"
+    )
+
+    for name, key, help_text in (
+        ("openalex_requests_total", "total", "Respostas recebidas da API."),
+        ("openalex_received_bytes_total", "bytes_received", "Bytes recebidos."),
+        ("openalex_retries_total", "retries", "Requisições repetidas."),
+        ("openalex_rate_limited_total", "rate_limited", "Respostas 429."),
+        ("openalex_http_errors_total", "http_errors", "Outras respostas >= 400."),
+    ):
+        lines += [
+            f"# HELP {name} {help_text}",
+            f"# TYPE {name} counter",
+            f"{name}{_label_text(labels)} {requests[key]}",
+        ]
+
+    lines += [
+        "# HELP openalex_entities Entidades coletadas, por tabela.",
+        "# TYPE openalex_entities gauge",
+    ]
+    for table, count in snapshot["counts"].items():
+        lines.append(f"openalex_entities{_label_text(labels, table=table)} {count}")
+    lines += [
+        "# HELP openalex_elapsed_seconds Tempo desde o início da coleta.",
+        "# TYPE openalex_elapsed_seconds gauge",
+        f"openalex_elapsed_seconds{_label_text(labels)} {snapshot['elapsed_seconds']}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, snapshot):
+    """Write atomically, so the node exporter never reads a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text(snapshot))
+    os.replace(tmp_path, path)
+
+
+def shard_path(path, shard):
+    """`metrics.prom` -> `metrics_shard0.prom` (one file per process)."""
+    if not path:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}_shard{shard}{extension}"
@@ -0,0 +1,117 @@
+import os
+import pickle
+import unicodedata
+from array import array
+from heapq import nsmallest
+
+# Versão do formato do arquivo do índice; arquivos de outra versão são refeitos
+INDEX_VERSION = 2
+
+
+def fold(text):
+    """Lowercase without accents: `José Müller` -> `jose muller`."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def normalize(text):
+    """`fold` with runs of whitespace collapsed to one space."""
+    return " ".join(fold(text).split())
+
+
+def trigrams(text):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class NameIndex:
+    """Índice de trigramas dos nomes de autores, para a busca por parte do nome.
+
+    Os nomes são guardados sem acentos e em minúsculas. Uma busca com 3 ou
+    mais caracteres só confere os nomes da lista do trigrama mais raro da
+    busca; com 1 ou 2 caracteres, que não formam trigrama, percorre todos os
+    nomes. Os nomes em que alguma palavra começa pela busca vêm primeiro.
+
+    `open` grava o índice ao lado da tabela de origem e o reaproveita enquanto
+    ela não mudar (mesmo tamanho e data de modificação).
+    """
+
+    def __init__(self, names):
+        self.names = [normalize(name) for name in names]
+        postings = {}
+        for entry, name in enumerate(self.names):
+            for gram in trigrams(name):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array("I")
+                posting.append(entry)
+        self.postings = postings
+
+    @classmethod
+    def open(cls, source, names, path=None):
+        """Load the index saved for `source`, or build and save it."""
+        path = path or f"{os.path.splitext(source)[0]}_names.idx"
+        signature = (INDEX_VERSION, source_signature(source), len(names))
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    saved = pickle.load(f)
+                if saved["signature"] == signature:
+                    index = cls.__new__(cls)
+                    index.__dict__.update(saved["state"])
+                    return index
+            except (OSError, EOFError, KeyError, pickle.UnpicklingError) as e:
+                print(f"Índice de nomes inválido ({e}); refazendo.")
+
+        index = cls(names)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(
+                    {"signature": signature, "state": index.__dict__},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Não foi possível gravar o índice de nomes em {path}: {e}")
+        return index
+
+    def _candidates(self, query):
+        if len(query) < 3:
+            return [entry for entry, name in enumerate(self.names) if query in name]
+        postings = [self.postings.get(gram) for gram in trigrams(query)]
+        if not all(postings):
+            return ()
+        rarest = min(postings, key=len)
+        return [entry for entry in rarest if query in self.names[entry]]
+
+    def search(self, query, key=None, include=None, limit=None):
+        """Entries whose name contains `query`, best matches first.
+
+        Names with a word starting with `query` come first; then `key(entry)`
+        (entry order by default). `include(entry)` filters the matches and
+        `limit` keeps only the best ones.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        matches = self._candidates(query)
+        if include is not None:
+            matches = [entry for entry in matches if include(entry)]
+        word_start = f" {query}"
+
+        def rank(entry):
+            name = self.names[entry]
+            starts = name.startswith(query) or word_start in name
+            return (not starts, key(entry) if key else entry)
+
+        if limit is not None:
+            return nsmallest(limit, matches, key=rank)
+        return sorted(matches, key=rank)
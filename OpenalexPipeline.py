@@ -0,0 +1,62 @@
+import queue
+import threading
+
+
+class BackgroundWriter:
+    """Estágio de escrita da coleta: executa as tarefas de disco em uma thread
+    própria, na ordem em que foram enviadas.
+
+    A fila é limitada a `max_pending` tarefas; quando o disco fica para trás,
+    `submit` bloqueia e segura o laço de coleta (backpressure). Como os
+    checkpoints são enviados pela mesma fila, logo depois das escritas do
+    lote, um checkpoint só é gravado quando tudo o que ele registra já foi
+    persistido.
+    """
+
+    def __init__(self, max_pending=4):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, name="openalex-writer", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                if self._error is None:
+                    func, args, kwargs = task
+                    func(*args, **kwargs)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError("Falha na escrita em segundo plano") from self._error
+
+    def submit(self, func, *args, **kwargs):
+        """Enqueue `func(*args, **kwargs)`; blocks while the queue is full."""
+        self._raise_error()
+        self._queue.put((func, args, kwargs))
+
+    def join(self):
+        """Wait until every task submitted so far has run."""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
@@ -0,0 +1,78 @@
+import requests
+
+from OpenalexUtils import batch_size, per_page, short_id
+
+# Máximo de valores em um filtro com "|" aceito pela API
+filter_values_limit = 100
+
+# Campos pedidos na busca em lote dos autores
+WORKS_COUNT_SELECT = "id,works_count"
+
+
+class AuthorBatchPlanner:
+    """Monta os lotes de autores pelo `works_count` de cada um.
+
+    Com um número fixo de autores por lote, um autor muito produtivo vira
+    centenas de páginas seguidas de cursor, e um lote de autores novos volta
+    com meia página. O planejador corta o lote (na ordem da fila) quando a
+    soma dos `works_count` encheria `max_pages` páginas de `page_size`
+    resultados; um autor que sozinho passa desse limite vai em um lote só dele.
+
+    Os `works_count` vêm de `fetch_authors` (em geral
+    `client.get_data_authors(ids, WORKS_COUNT_SELECT)`), em lotes, só para os
+    autores que ainda não estão em `counts`. Autores sem resposta (mesclados,
+    ou se a busca falhar) contam como `page_size * max_pages / batch_size`,
+    o que reproduz os lotes de tamanho fixo.
+    """
+
+    def __init__(
+        self,
+        fetch_authors,
+        page_size=per_page,
+        max_pages=1,
+        max_ids=filter_values_limit,
+    ):
+        self.fetch_authors = fetch_authors
+        self.capacity = page_size * max_pages
+        self.max_ids = max_ids
+        self.default_count = self.capacity // batch_size
+        self.counts = {}
+
+    def lookup(self, author_ids):
+        """Fetch the works_count of the authors not looked up yet."""
+        missing = [
+            author_id
+            for author_id in dict.fromkeys(map(short_id, author_ids))
+            if author_id not in self.counts
+        ]
+        for start in range(0, len(missing), self.max_ids):
+            chunk = missing[start : start + self.max_ids]
+            try:
+                authors = self.fetch_authors(chunk)["results"]
+            except requests.exceptions.RequestException as e:
+                print(f"Failed to retrieve works_count for {len(chunk)} authors: {e}")
+                authors = []
+            for author in authors:
+                self.counts[short_id(author["id"])] = author.get("works_count") or 0
+            for author_id in chunk:
+                # Sem resposta: marca para não buscar de novo
+                self.counts.setdefault(author_id, self.default_count)
+
+    def cut(self, author_ids):
+        """Number of leading `author_ids` that go in the next batch."""
+        total = 0
+        for index, author_id in enumerate(author_ids):
+            author_id = short_id(author_id)
+            if author_id not in self.counts:
+                # Só busca quando precisa, e já para todos os que faltam, para
+                # que os próximos lotes saiam sem requisições extras
+                self.lookup(author_ids[index:])
+            total += self.counts[author_id]
+            if total > self.capacity:
+                return max(index, 1)
+        return len(author_ids)
+
+    def forget(self, author_ids):
+        """Drop the counts of authors already fetched."""
+        for author_id in author_ids:
+            self.counts.pop(short_id(author_id), None)
@@ -0,0 +1,164 @@
+import datetime
+import email.utils
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: o limite passa a valer só dentro do processo
+    fcntl = None
+
+
+def parse_retry_after(value, now=None):
+    """Convert a Retry-After header (seconds or HTTP date) to seconds to wait."""
+    if not value:
+        return None
+    now = time.time() if now is None else now
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token bucket com orçamento diário, compartilhado entre threads e,
+    quando `state_file` é informado, entre processos locais.
+
+    O estado (fichas, bloqueio e contagem do dia) fica em um arquivo JSON
+    protegido por `flock`, então vários coletores rodando ao mesmo tempo
+    apontando para o mesmo arquivo dividem o mesmo limite.
+    """
+
+    def __init__(self, rate=10.0, capacity=None, daily_limit=100000, state_file=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.daily_limit = daily_limit
+        self.state_file = state_file
+        self.lock_file = f"{state_file}.lock" if state_file else None
+
+        self._thread_lock = threading.Lock()
+        self._state = self._initial_state()
+
+    def _initial_state(self):
+        return {
+            "tokens": self.capacity,
+            "updated_at": time.time(),
+            "blocked_until": 0.0,
+            "day": self._today(),
+            "day_count": 0,
+        }
+
+    @staticmethod
+    def _today():
+        return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+    @staticmethod
+    def _seconds_until_tomorrow():
+        now = datetime.datetime.now(datetime.timezone.utc)
+        tomorrow = (now + datetime.timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        return (tomorrow - now).total_seconds()
+
+    def _read_state(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return self._initial_state()
+
+    def _write_state(self, state):
+        tmp_file = f"{self.state_file}.tmp.{os.getpid()}"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.state_file)
+
+    @contextmanager
+    def _locked_state(self):
+        with self._thread_lock:
+            if self.state_file is None:
+                yield self._state
+                return
+
+            with open(self.lock_file, "a+") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    state = self._read_state()
+                    yield state
+                    self._write_state(state)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _try_acquire(self):
+        """Take one token; return 0 on success or the seconds to wait."""
+        with self._locked_state() as state:
+            now = time.time()
+
+            if state["day"] != self._today():
+                state["day"] = self._today()
+                state["day_count"] = 0
+            if self.daily_limit and state["day_count"] >= self.daily_limit:
+                return self._seconds_until_tomorrow()
+
+            if state["blocked_until"] > now:
+                return state["blocked_until"] - now
+
+            elapsed = max(0.0, now - state["updated_at"])
+            state["tokens"] = min(self.capacity, state["tokens"] + elapsed * self.rate)
+            state["updated_at"] = now
+
+            if state["tokens"] < 1:
+                return (1 - state["tokens"]) / self.rate
+
+            state["tokens"] -= 1
+            state["day_count"] += 1
+            return 0
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def block_for(self, seconds):
+        """Stop every sharer of this limiter from sending for `seconds`."""
+        with self._locked_state() as state:
+            state["blocked_until"] = max(state["blocked_until"], time.time() + seconds)
+            state["tokens"] = 0
+
+    def observe(self, response):
+        """Adjust the bucket from Retry-After and X-RateLimit-* headers."""
+        headers = response.headers
+
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if retry_after is not None and response.status_code in (429, 503):
+            self.block_for(retry_after)
+            return
+
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining = int(remaining)
+            reset = float(reset)
+        except ValueError:
+            return
+
+        # O reset pode vir em segundos restantes ou como timestamp Unix
+        if reset > 1e9:
+            reset -= time.time()
+
+        if remaining <= 0:
+            self.block_for(max(0.0, reset))
@@ -1,111 +1,529 @@
 import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
+import OpenalexJson
+from OpenalexCache import EntityCache
+from OpenalexMetrics import Metrics
+from OpenalexRateLimiter import RateLimiter
+
 # URL base da API do OpenAlex
-works_base_url = "https://api.openalex.org/works"
-authors_base_url = "https://api.openalex.org/authors"
-institutions_base_url = "https://api.openalex.org/institutions"
+api_base_url = "https://api.openalex.org"
+works_base_url = f"{api_base_url}/works"
+authors_base_url = f"{api_base_url}/authors"
+institutions_base_url = f"{api_base_url}/institutions"
 batch_size = 50  # Reduzido levemente para evitar erros de URL muito longa em filtros
 per_page = 200
-sleep_time = 0.2
 
+# Resultados acima dos quais uma busca paginada é dividida por ano (--parallel_pages)
+split_threshold = 5 * per_page
 
-def get_data_works_from_openalex(work_urls: list[str]) -> dict:
-    """Get works from OpenAlex API."""
-    work_ids = [work_url.split("/")[-1] for work_url in work_urls]
-    params = {"filter": f"openalex:{'|'.join(work_ids)}", "per-page": batch_size}
-    response = requests.get(works_base_url, params=params)
-    response.raise_for_status()
-    return response.json()
+# Respostas que valem uma nova tentativa (limite de taxa e falhas temporárias)
+retry_status_codes = {429, 500, 502, 503, 504}
 
 
-def get_data_authors_from_openalex(author_urls: list[str]) -> dict:
-    """Get authors from OpenAlex API."""
-    # Garante que pegamos apenas o ID, caso venha a URL completa
-    author_ids = [author_url.split("/")[-1] for author_url in author_urls]
+class OpenAlexClient:
+    """Pooled, keep-alive client for the OpenAlex API.
 
-    # OpenAlex pode falhar se a URL do filtro for muito longa, então é bom chamar essa função com lotes (chunks)
-    params = {"filter": f"openalex:{'|'.join(author_ids)}", "per-page": len(author_ids)}
-    response = requests.get(authors_base_url, params=params)
-    response.raise_for_status()
-    return response.json()
+    Uma única sessão `requests.Session` é reaproveitada por todas as chamadas,
+    então cada página de cursor e cada lote reutiliza as conexões TCP/TLS já
+    abertas em vez de abrir uma nova. Toda requisição passa pelo `rate_limiter`,
+    que substitui as pausas fixas entre lotes. Com um `cache`, as buscas por ID
+    só pedem à API as entidades que ainda não estão no disco.
 
+    As respostas são decodificadas direto dos bytes por `json_loads`
+    (padrão: orjson, se instalado, ou o `json` da stdlib).
 
-def get_data_institutions_from_openalex(institution_urls: list[str]) -> dict:
-    """Get institutions from OpenAlex API."""
-    # Garante que pegamos apenas o ID, caso venha a URL completa
-    institution_ids = [inst_url.split("/")[-1] for inst_url in institution_urls]
+    Com `parallel_pages` > 1, uma busca de trabalhos de autores com mais de
+    `split_threshold` resultados é dividida em faixas de `publication_year`
+    (contadas com `group_by`), paginadas ao mesmo tempo.
 
-    # OpenAlex pode falhar se a URL do filtro for muito longa, então é bom chamar essa função com lotes (chunks)
-    params = {"filter": f"openalex:{'|'.join(institution_ids)}", "per-page": len(institution_ids)}
-    response = requests.get(institutions_base_url, params=params)
-    response.raise_for_status()
-    return response.json()
+    Latência, bytes, repetições e 429s de cada requisição, a espera pelo
+    limitador e a decodificação são registrados em `metrics`, que os
+    coletores também usam para as etapas deles.
+    """
 
+    def __init__(
+        self,
+        base_url: str = None,
+        mailto: str = None,
+        pool_size: int = 10,
+        timeout: tuple = (10, 60),
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        rate_limiter: RateLimiter = None,
+        cache: EntityCache = None,
+        json_loads=None,
+        parallel_pages: int = 1,
+        split_threshold: int = split_threshold,
+        metrics: Metrics = None,
+    ):
+        self.base_url = (base_url or api_base_url).rstrip("/")
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.cache = cache
+        self.mailto = mailto
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.json_loads = json_loads or OpenalexJson.loads
+        self.parallel_pages = max(1, parallel_pages)
+        self.split_threshold = split_threshold
+        self.metrics = metrics or Metrics()
+        self._page_executor = (
+            ThreadPoolExecutor(
+                max_workers=self.parallel_pages, thread_name_prefix="openalex-page"
+            )
+            if self.parallel_pages > 1
+            else None
+        )
 
-def get_data_authors_samples(samples: int = 1, seed: int = 42):
-    """Get works sample from OpenAlex API."""
-    params = {"seed": seed, "sample": samples, "per-page": batch_size}
-    response = requests.get(authors_base_url, params=params)
-    response.raise_for_status()
-    return response.json()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=pool_size, pool_block=True
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        if mailto:
+            self.session.headers["User-Agent"] = f"csv-openalex (mailto:{mailto})"
 
+    def __enter__(self):
+        return self
 
-def get_auhtor_sample(seed: int = 42) -> dict:
-    """Get author sample from OpenAlex API."""
-    data = get_data_authors_samples(samples=1, seed=seed)
-    return data["results"][0]
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
+    def close(self):
+        if self._page_executor is not None:
+            self._page_executor.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
 
-# Função para obter os trabalhos publicados por um autor
-def get_author_works(author_urls: list[str]) -> list[dict]:
-    """Get author works from OpenAlex API."""
-    author_ids = [author_url.split("/")[-1] for author_url in author_urls]
-    works = []
-    cursor = "*"
+    @property
+    def works_url(self) -> str:
+        return f"{self.base_url}/works"
+
+    @property
+    def authors_url(self) -> str:
+        return f"{self.base_url}/authors"
+
+    @property
+    def institutions_url(self) -> str:
+        return f"{self.base_url}/institutions"
+
+    def get(self, url: str, params: dict) -> dict:
+        """GET a JSON page, retrying on connection errors, 429 and 5xx."""
+        if self.mailto:
+            params = {**params, "mailto": self.mailto}
+
+        metrics = self.metrics
+        attempt = 0
+        while True:
+            with metrics.stage("rate_limit"):
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                metrics.add("fetch", time.perf_counter() - start)
+                if attempt >= self.max_retries:
+                    raise
+                metrics.observe_retry()
+                time.sleep(self.backoff * (2**attempt))
+                attempt += 1
+                continue
+            # Bytes na rede (comprimidos) quando a API informa o tamanho
+            metrics.observe_request(
+                time.perf_counter() - start,
+                int(response.headers.get("Content-Length") or len(response.content)),
+                response.status_code,
+            )
+
+            # Retry-After e X-RateLimit-* valem para todos que usam o limitador
+            self.rate_limiter.observe(response)
+
+            if (
+                response.status_code in retry_status_codes
+                and attempt < self.max_retries
+            ):
+                # 429/503 com Retry-After já bloquearam o limitador em `observe`
+                if not (
+                    response.status_code in (429, 503)
+                    and "Retry-After" in response.headers
+                ):
+                    time.sleep(self.backoff * (2**attempt))
+                metrics.observe_retry()
+                attempt += 1
+                continue
+
+            response.raise_for_status()
+            with metrics.stage("decode"):
+                return self.json_loads(response.content)
+
+    @staticmethod
+    def _cache_key(entity_id: str, select: str = None) -> str:
+        # Entidades parciais (com `select`) não podem passar por completas
+        if not select:
+            return entity_id
+        return f"{entity_id}?{zlib.crc32(select.encode()):08x}"
 
-    # Descrição dinâmica para saber qual autor está sendo baixado se for apenas 1
-    desc = "Fetching works"
-    if len(author_ids) == 1:
-        desc = f"Fetching works for {author_ids[0]}"
+    def _cache_get(self, entity_ids, select=None) -> dict:
+        """Cached entities by ID; a full entity also serves any `select`."""
+        found = self.cache.get_many(entity_ids)
+        if select:
+            keys = {
+                self._cache_key(entity_id, select): entity_id
+                for entity_id in entity_ids
+                if entity_id not in found
+            }
+            for key, entity in self.cache.get_many(keys).items():
+                found[keys[key]] = entity
+        return found
 
-    pbar = tqdm(total=1, leave=False, desc=desc)
+    def _cache_put(self, entities, select=None):
+        self.cache.put_many(
+            {
+                self._cache_key(short_id(entity["id"]), select): entity
+                for entity in entities
+            }
+        )
 
-    while True:
+    def _get_by_ids(
+        self, url: str, entity_urls: list[str], page_size=None, select=None
+    ) -> dict:
+        """Fetch entities by ID, asking the API only for those not in the cache."""
+        # Garante que pegamos apenas o ID, caso venha a URL completa
+        entity_ids = [short_id(entity_url) for entity_url in entity_urls]
+
+        cached = self._cache_get(entity_ids, select) if self.cache is not None else {}
+        missing = [entity_id for entity_id in entity_ids if entity_id not in cached]
+        if not cached:
+            return self._fetch_by_ids(url, missing, page_size, select)
+
+        # Resultados na ordem pedida; IDs redirecionados pela API vão ao final
+        found = dict(cached)
+        extra = []
+        if missing:
+            for entity in self._fetch_by_ids(url, missing, page_size, select)[
+                "results"
+            ]:
+                entity_id = short_id(entity["id"])
+                if entity_id in found:
+                    continue
+                if entity_id in missing:
+                    found[entity_id] = entity
+                else:
+                    extra.append(entity)
+
+        results = [found[e] for e in dict.fromkeys(entity_ids) if e in found]
+        results.extend(extra)
+        return {"meta": {"count": len(results)}, "results": results}
+
+    def _fetch_by_ids(
+        self, url: str, entity_ids: list[str], page_size=None, select=None
+    ) -> dict:
+        # OpenAlex pode falhar se a URL do filtro for muito longa, então é bom chamar essa função com lotes (chunks)
         params = {
-            "filter": f"author.id:{'|'.join(author_ids)}",
-            "per-page": per_page,
-            "cursor": cursor,
+            "filter": f"openalex:{'|'.join(entity_ids)}",
+            "per-page": page_size or len(entity_ids),
         }
+        if select:
+            params["select"] = select
+        data = self.get(url, params)
+        if self.cache is not None:
+            self._cache_put(data["results"], select)
+        return data
+
+    def get_data_works(self, work_urls: list[str], select: str = None) -> dict:
+        """Get works from OpenAlex API (only the `select` fields, if given)."""
+        return self._get_by_ids(self.works_url, work_urls, batch_size, select)
+
+    def get_data_authors(self, author_urls: list[str], select: str = None) -> dict:
+        """Get authors from OpenAlex API (only the `select` fields, if given)."""
+        return self._get_by_ids(self.authors_url, author_urls, select=select)
+
+    def get_data_institutions(self, institution_urls: list[str]) -> dict:
+        """Get institutions from OpenAlex API."""
+        return self._get_by_ids(self.institutions_url, institution_urls)
+
+    def get_data_authors_samples(self, samples: int = 1, seed: int = 42) -> dict:
+        """Get works sample from OpenAlex API."""
+        params = {"seed": seed, "sample": samples, "per-page": batch_size}
+        return self.get(self.authors_url, params)
+
+    # Função para obter os trabalhos publicados por um autor
+    def get_author_works(
+        self, author_urls: list[str], select: str = None
+    ) -> list[dict]:
+        """Get author works from OpenAlex API (only the `select` fields, if given)."""
+        author_ids = [short_id(author_url) for author_url in author_urls]
+        if self.cache is None:
+            return self._page_author_works(author_ids, select)[0]
+
+        # Autores com a lista de trabalhos (e todos os trabalhos) no cache não vão à API
+        work_lists = self.cache.get_many(f"author_works:{a}" for a in author_ids)
+        cached_works = self._cache_get(
+            [work_id for work_ids in work_lists.values() for work_id in work_ids],
+            select,
+        )
+
+        works = {}
+        missing_authors = []
+        for author_id in author_ids:
+            work_ids = work_lists.get(f"author_works:{author_id}")
+            if work_ids is None or any(w not in cached_works for w in work_ids):
+                missing_authors.append(author_id)
+                continue
+            for work_id in work_ids:
+                works.setdefault(work_id, cached_works[work_id])
+
+        if missing_authors:
+            fetched, complete = self._page_author_works(missing_authors, select)
+            self._cache_author_works(missing_authors, fetched, complete, select)
+            for work in fetched:
+                works.setdefault(short_id(work["id"]), work)
+
+        return list(works.values())
+
+    def _cache_author_works(self, author_ids, works, complete, select=None):
+        self._cache_put(works, select)
+        if not complete:
+            return
+
+        work_lists = {author_id: [] for author_id in author_ids}
+        for work in works:
+            work_id = short_id(work["id"])
+            matched = False
+            for authorship in work.get("authorships", []):
+                author = authorship.get("author") or {}
+                author_id = short_id(author.get("id") or "")
+                if author_id in work_lists:
+                    work_lists[author_id].append(work_id)
+                    matched = True
+            if not matched:
+                # Lista de autores truncada: não dá para saber de quem é o trabalho
+                return
+
+        self.cache.put_many(
+            {f"author_works:{a}": work_ids for a, work_ids in work_lists.items()}
+        )
+
+    def _page_author_works(
+        self, author_ids: list[str], select: str = None
+    ) -> tuple[list[dict], bool]:
+        # Descrição dinâmica para saber qual autor está sendo baixado se for apenas 1
+        desc = "Fetching works"
+        if len(author_ids) == 1:
+            desc = f"Fetching works for {author_ids[0]}"
+
+        pbar = tqdm(total=1, leave=False, desc=desc)
         try:
-            response = requests.get(works_base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            return self._page_works(
+                f"author.id:{'|'.join(author_ids)}", select, pbar, split=True
+            )
+        finally:
+            pbar.close()
+
+    def _page_works(
+        self, filter_: str, select: str, pbar, split=False
+    ) -> tuple[list[dict], bool]:
+        works = []
+        cursor = "*"
+        complete = True
+
+        while True:
+            params = {
+                "filter": filter_,
+                "per-page": per_page,
+                "cursor": cursor,
+            }
+            if select:
+                params["select"] = select
+            try:
+                data = self.get(self.works_url, params)
+
+                if split and cursor == "*":
+                    pbar.total = data["meta"]["count"]
+                    parts = self._year_partitions(filter_, data["meta"])
+                    if parts:
+                        # A primeira página é descartada: as faixas cobrem tudo
+                        return self._page_partitions(parts, select, pbar)
 
-            pbar.total = data["meta"]["count"]
-            pbar.update(len(data["results"]))
-            works.extend(data["results"])
+                pbar.update(len(data["results"]))
+                works.extend(data["results"])
 
-            if not data["meta"]["next_cursor"]:
+                if not data["meta"]["next_cursor"]:
+                    break
+
+                cursor = data["meta"]["next_cursor"]
+
+            except requests.exceptions.RequestException as e:
+                # `get` já repetiu a página respeitando o limitador
+                print(f"\nErro na requisição: {e}")
+                complete = False
                 break
 
-            cursor = data["meta"]["next_cursor"]
-            time.sleep(sleep_time)
+        return works, complete
+
+    def _year_partitions(self, filter_: str, meta: dict) -> list[str]:
+        """Split a large filter into publication_year ranges of similar size."""
+        count = meta["count"]
+        if (
+            self.parallel_pages <= 1
+            or count <= self.split_threshold
+            or not meta.get("next_cursor")
+        ):
+            return None
+
+        try:
+            groups = self.get(
+                self.works_url, {"filter": filter_, "group_by": "publication_year"}
+            )["group_by"]
+        except requests.exceptions.RequestException:
+            return None
+
+        years = []
+        for group in groups:
+            key = str(group["key"])
+            if not key.isdigit():
+                # Trabalhos sem ano ficariam fora de todas as faixas
+                if group["count"]:
+                    return None
+                continue
+            years.append((int(key), group["count"]))
+        years.sort()
+
+        # Anos consecutivos agrupados até ~count/parts resultados por faixa
+        parts = min(self.parallel_pages, -(-count // per_page))
+        target = count / parts
+        starts = [years[0][0]] if years else []
+        total = 0
+        for year, year_count in years:
+            if total >= target and len(starts) < parts:
+                starts.append(year)
+                total = 0
+            total += year_count
+        if len(starts) < 2:
+            return None
+
+        # Faixas abertas nas pontas, para não perder anos fora do group_by
+        ranges = [f"publication_year:<{starts[1]}"]
+        for first, next_first in zip(starts[1:-1], starts[2:]):
+            ranges.append(f"publication_year:{first}-{next_first - 1}")
+        ranges.append(f"publication_year:>{starts[-1] - 1}")
+        return [f"{filter_},{year_range}" for year_range in ranges]
+
+    def _page_partitions(self, filters: list[str], select: str, pbar):
+        """Page each sub-filter in parallel and merge the works, without repeats."""
+        pages = [
+            self._page_executor.submit(self._page_works, filter_, select, pbar)
+            for filter_ in filters
+        ]
+        works = {}
+        complete = True
+        for future in pages:
+            part, part_complete = future.result()
+            complete = complete and part_complete
+            for work in part:
+                works.setdefault(work["id"], work)
+        return list(works.values()), complete
+
+
+def short_id(openalex_url: str) -> str:
+    """`https://openalex.org/W123` -> `W123`."""
+    return openalex_url.split("/")[-1]
+
+
+_default_client = None
+
+
+def get_default_client() -> OpenAlexClient:
+    """Shared client used by the module-level helpers below."""
+    global _default_client
+    if _default_client is None:
+        _default_client = OpenAlexClient()
+    return _default_client
+
+
+def set_api_base_url(base_url: str) -> None:
+    """Point every call to another API instance (e.g. a local mock server)."""
+    global api_base_url, works_base_url, authors_base_url, institutions_base_url
+    global _default_client
+    api_base_url = base_url.rstrip("/")
+    works_base_url = f"{api_base_url}/works"
+    authors_base_url = f"{api_base_url}/authors"
+    institutions_base_url = f"{api_base_url}/institutions"
+    _default_client = None
+
+
+def get_data_works_from_openalex(work_urls: list[str], select: str = None) -> dict:
+    """Get works from OpenAlex API."""
+    return get_default_client().get_data_works(work_urls, select)
+
+
+def get_data_authors_from_openalex(author_urls: list[str], select: str = None) -> dict:
+    """Get authors from OpenAlex API."""
+    return get_default_client().get_data_authors(author_urls, select)
+
+
+def get_data_institutions_from_openalex(institution_urls: list[str]) -> dict:
+    """Get institutions from OpenAlex API."""
+    return get_default_client().get_data_institutions(institution_urls)
+
+
+def get_data_authors_samples(samples: int = 1, seed: int = 42):
+    """Get works sample from OpenAlex API."""
+    return get_default_client().get_data_authors_samples(samples, seed)
+
+
+def get_auhtor_sample(seed: int = 42) -> dict:
+    """Get author sample from OpenAlex API."""
+    data = get_data_authors_samples(samples=1, seed=seed)
+    return data["results"][0]
 
-        except requests.exceptions.RequestException as e:
-            print(f"\nErro na requisição: {e}")
-            time.sleep(1)  # Espera um pouco antes de tentar de novo ou sair
-            break
 
-    pbar.close()
-    return works
+# Função para obter os trabalhos publicados por um autor
+def get_author_works(author_urls: list[str], select: str = None) -> list[dict]:
+    """Get author works from OpenAlex API."""
+    return get_default_client().get_author_works(author_urls, select)
 
 
 def parse_abstract_inverted_index(inverted_index):
-    if inverted_index is None:
+    if not inverted_index:
         return ""
 
+    # As posições da API vão de 0 a n-1: cada palavra vai direto para o seu
+    # slot, sem ordenar pares (posição, palavra). Posições negativas ou fora
+    # do intervalo vão para a ordenação (o índice -1 cairia no último slot)
+    slots = [None] * sum(map(len, inverted_index.values()))
+    try:
+        for word, positions in inverted_index.items():
+            if len(positions) == 1:
+                pos = positions[0]
+                if pos < 0:
+                    raise IndexError(pos)
+                slots[pos] = word
+            else:
+                if min(positions) < 0:
+                    raise IndexError(min(positions))
+                for pos in positions:
+                    slots[pos] = word
+    except (IndexError, ValueError):
+        return _parse_abstract_sorted(inverted_index)
+
+    # Buraco na numeração ou posição repetida: a ordenação mantém todas as
+    # palavras (as repetidas em ordem alfabética)
+    if None in slots:
+        return _parse_abstract_sorted(inverted_index)
+
+    # Limpar o texto junto é o mesmo que limpar palavra por palavra
+    return " ".join(slots).replace("\n", " ").replace("\r", "")
+
+
+def _parse_abstract_sorted(inverted_index):
     abstract_words = []
 
     for word, positions in inverted_index.items():
@@ -114,8 +532,6 @@ def parse_abstract_inverted_index(inverted_index):
 
     abstract_words.sort()
 
-    abstract = " ".join(
+    return " ".join(
         word.replace("\n", " ").replace("\r", "") for pos, word in abstract_words
     )
-
-    return abstract
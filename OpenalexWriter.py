@@ -2,114 +2,291 @@ import csv
 import datetime
 import os
 
+import OpenalexJson
 from OpenalexUtils import parse_abstract_inverted_index
 
+# Colunas de cada tabela gerada a partir dos trabalhos
+WORKS_FIELDNAMES = [
+    "id",
+    "title",
+    "abstract",
+    "doi",
+    "publication_date",
+    "cited_by_count",
+    "language",
+    "type",
+    "fwci",
+    "open_access",
+    "has_fulltext",
+    "is_retracted",
+    "is_paratext",
+    "locations_count",
+    "countries_distinct_count",
+    "institutions_distinct_count",
+    "referenced_works_count",
+]
+AUTHORS_FIELDNAMES = [
+    "work_id",
+    "author_id",
+    "author_name",
+    "author_position",
+    "is_corresponding",
+    "countries",
+    "institution_ids",
+]
+CITATIONS_FIELDNAMES = ["work_id", "cited_work_id"]
+RELATED_WORKS_FIELDNAMES = ["work_id", "related_work_id"]
+CONCEPTS_FIELDNAMES = [
+    "work_id",
+    "concept_id",
+    "concept_name",
+    "wikidata",
+    "level",
+    "score",
+]
+TOPICS_FIELDNAMES = ["work_id", "topic_id", "topic_name", "score"]
+KEYWORDS_FIELDNAMES = ["work_id", "keyword_id", "keyword_name", "score"]
+
+TABLE_FIELDNAMES = {
+    "works": WORKS_FIELDNAMES,
+    "authors": AUTHORS_FIELDNAMES,
+    "citations": CITATIONS_FIELDNAMES,
+    "related_works": RELATED_WORKS_FIELDNAMES,
+    "concepts": CONCEPTS_FIELDNAMES,
+    "topics": TOPICS_FIELDNAMES,
+    "keywords": KEYWORDS_FIELDNAMES,
+}
+
+
+# Campos dos trabalhos que cada tabela usa (parâmetro `select` da API)
+TABLE_WORK_FIELDS = {
+    "works": [
+        "id",
+        "title",
+        "abstract_inverted_index",
+        "doi",
+        "publication_date",
+        "cited_by_count",
+        "language",
+        "type",
+        "fwci",
+        "open_access",
+        "has_fulltext",
+        "is_retracted",
+        "is_paratext",
+        "locations_count",
+        "countries_distinct_count",
+        "institutions_distinct_count",
+        "referenced_works_count",
+    ],
+    "authors": ["id", "authorships"],
+    "citations": ["id", "referenced_works"],
+    "related_works": ["id", "related_works"],
+    "concepts": ["id", "concepts"],
+    "topics": ["id", "topics"],
+    "keywords": ["id", "keywords"],
+}
+
+# Perfis de saída (--profile): tabelas geradas, campos que não são pedidos e
+# como o resumo é gravado ("text" ou "inverted", o índice invertido cru, que
+# só vira texto na exportação com expand_abstracts)
+OUTPUT_PROFILES = {
+    "full": {"tables": tuple(TABLE_FIELDNAMES), "skip_fields": ()},
+    "inverted_abstract": {
+        "tables": tuple(TABLE_FIELDNAMES),
+        "skip_fields": (),
+        "abstract": "inverted",
+    },
+    "no_abstract": {
+        "tables": tuple(TABLE_FIELDNAMES),
+        "skip_fields": ("abstract_inverted_index",),
+    },
+    "graph": {"tables": ("authors", "citations"), "skip_fields": ()},
+}
+
+
+# Só as tabelas habilitadas pelo perfil
+def profile_filenames(filenames, profile="full"):
+    tables = OUTPUT_PROFILES[profile]["tables"]
+    return {table: filename for table, filename in filenames.items() if table in tables}
+
+
+# Lista `select` com os campos que as tabelas do perfil usam, mais os campos
+# de que a coleta precisa para andar no grafo (`extra`)
+def work_select(profile="full", extra=()):
+    settings = OUTPUT_PROFILES[profile]
+    fields = {}
+    for table in settings["tables"]:
+        fields.update(dict.fromkeys(TABLE_WORK_FIELDS[table]))
+    for field in settings["skip_fields"]:
+        fields.pop(field, None)
+    fields.update(dict.fromkeys(field for field in extra if field))
+    return ",".join(fields)
+
+
+# Formato da coluna "abstract" no perfil
+def profile_abstract_format(profile="full"):
+    return OUTPUT_PROFILES[profile].get("abstract", "text")
+
+
+# Índice invertido do resumo em JSON compacto (adiado para a exportação)
+def encode_inverted_abstract(inverted_index):
+    if not inverted_index:
+        return ""
+    return OpenalexJson.dumps(inverted_index).decode("utf-8")
+
+
+# Texto do resumo a partir do valor gravado com encode_inverted_abstract
+def decode_abstract(value):
+    if not value:
+        return ""
+    return parse_abstract_inverted_index(OpenalexJson.loads(value))
+
+
+# Linha da tabela de trabalhos
+def work_row(work, abstract_format="text"):
+    # Tratamento seguro para open_access que pode ser None ou dict
+    oa_status = False
+    if work.get("open_access"):
+        oa_status = work["open_access"].get("is_oa", False)
+
+    return {
+        "id": work.get("id"),
+        "title": work.get("title"),
+        "abstract": (
+            encode_inverted_abstract(work.get("abstract_inverted_index"))
+            if abstract_format == "inverted"
+            else parse_abstract_inverted_index(work.get("abstract_inverted_index", {}))
+        ),
+        "doi": work.get("doi"),
+        "publication_date": work.get("publication_date"),
+        "cited_by_count": work.get("cited_by_count", 0),
+        "language": work.get("language"),
+        "type": work.get("type"),
+        "fwci": work.get("fwci", 0),
+        "open_access": oa_status,
+        "has_fulltext": work.get("has_fulltext", False),
+        "is_retracted": work.get("is_retracted", False),
+        "is_paratext": work.get("is_paratext", False),
+        "locations_count": work.get("locations_count", 0),
+        "countries_distinct_count": work.get("countries_distinct_count", 0),
+        "institutions_distinct_count": work.get("institutions_distinct_count", 0),
+        "referenced_works_count": work.get("referenced_works_count", 0),
+    }
+
+
+# Linhas da relação Trabalho <-> Autor
+def author_rows(work, only_authors=()):
+    for author in work.get("authorships", []):
+        # Verificação de segurança se author['author'] existe
+        if not author.get("author"):
+            continue
+
+        if not only_authors or author["author"]["id"] in only_authors:
+            # Extrair IDs das instituições
+            institution_ids = []
+            for inst in author.get("institutions", []):
+                if inst.get("id"):
+                    institution_ids.append(inst["id"])
+
+            yield {
+                "work_id": work["id"],
+                "author_id": author["author"]["id"],
+                "author_name": author["author"].get("display_name"),
+                "author_position": author.get("author_position"),
+                "is_corresponding": author.get("is_corresponding", False),
+                "countries": "|".join(author.get("countries", [])),
+                "institution_ids": "|".join(institution_ids),
+            }
 
-# Função para escrever dados no arquivo CSV dos trabalhos
-def write_works_to_csv(filename, works, mode="a"):
-    file_exists = os.path.isfile(filename)
 
-    with open(filename, mode, newline="", encoding="utf-8") as csvfile:
-        fieldnames = [
-            "id",
-            "title",
-            "abstract",
-            "doi",
-            "publication_date",
-            "cited_by_count",
-            "language",
-            "type",
-            "fwci",
-            "open_access",
-            "has_fulltext",
-            "is_retracted",
-            "is_paratext",
-            "locations_count",
-            "countries_distinct_count",
-            "institutions_distinct_count",
-            "referenced_works_count",
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+def citation_rows(work):
+    for cited_work in work.get("referenced_works", []):
+        yield {"work_id": work["id"], "cited_work_id": cited_work}
 
-        if not file_exists or mode == "w":
-            writer.writeheader()
 
-        for work in works:
-            # Tratamento seguro para open_access que pode ser None ou dict
-            oa_status = False
-            if work.get("open_access"):
-                oa_status = work["open_access"].get("is_oa", False)
+def related_work_rows(work):
+    for related_work in work.get("related_works", []):
+        yield {"work_id": work["id"], "related_work_id": related_work}
 
-            writer.writerow(
-                {
-                    "id": work.get("id"),
-                    "title": work.get("title"),
-                    "abstract": parse_abstract_inverted_index(
-                        work.get("abstract_inverted_index", {})
-                    ),
-                    "doi": work.get("doi"),
-                    "publication_date": work.get("publication_date"),
-                    "cited_by_count": work.get("cited_by_count", 0),
-                    "language": work.get("language"),
-                    "type": work.get("type"),
-                    "fwci": work.get("fwci", 0),
-                    "open_access": oa_status,
-                    "has_fulltext": work.get("has_fulltext", False),
-                    "is_retracted": work.get("is_retracted", False),
-                    "is_paratext": work.get("is_paratext", False),
-                    "locations_count": work.get("locations_count", 0),
-                    "countries_distinct_count": work.get("countries_distinct_count", 0),
-                    "institutions_distinct_count": work.get(
-                        "institutions_distinct_count", 0
-                    ),
-                    "referenced_works_count": work.get("referenced_works_count", 0),
-                }
-            )
 
+def concept_rows(work):
+    for concept in work.get("concepts", []):
+        yield {
+            "work_id": work["id"],
+            "concept_id": concept.get("id"),
+            "concept_name": concept.get("display_name"),
+            "wikidata": concept.get("wikidata"),
+            "level": concept.get("level", 0),
+            "score": concept.get("score", 0),
+        }
 
-# Função para escrever a relação Trabalho <-> Autor
-def write_authors_to_csv(filename, works, only_authors=[], mode="a"):
+
+def topic_rows(work):
+    topics = work.get("topics", [])
+    # As vezes topics pode ser None na API
+    if topics:
+        for topic in topics:
+            yield {
+                "work_id": work["id"],
+                "topic_id": topic.get("id"),
+                "topic_name": topic.get("display_name"),
+                "score": topic.get("score", 0),
+            }
+
+
+def keyword_rows(work):
+    keywords = work.get("keywords", [])
+    if keywords:
+        for keyword in keywords:
+            yield {
+                "work_id": work["id"],
+                "keyword_id": keyword.get("id"),
+                "keyword_name": keyword.get("display_name"),
+                "score": keyword.get("score", 0),
+            }
+
+
+# Monta as linhas de um trabalho para cada tabela (uma única passada)
+def split_work(work, only_authors=(), abstract_format="text"):
+    return {
+        "works": [work_row(work, abstract_format)],
+        "authors": author_rows(work, only_authors),
+        "citations": citation_rows(work),
+        "related_works": related_work_rows(work),
+        "concepts": concept_rows(work),
+        "topics": topic_rows(work),
+        "keywords": keyword_rows(work),
+    }
+
+
+def _write_rows(filename, fieldnames, works, rows_for, mode):
     file_exists = os.path.isfile(filename)
 
     with open(filename, mode, newline="", encoding="utf-8") as csvfile:
-        fieldnames = [
-            "work_id",
-            "author_id",
-            "author_name",
-            "author_position",
-            "is_corresponding",
-            "countries",
-            "institution_ids",
-        ]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
 
         if not file_exists or mode == "w":
             writer.writeheader()
 
         for work in works:
-            for author in work.get("authorships", []):
-                # Verificação de segurança se author['author'] existe
-                if not author.get("author"):
-                    continue
-
-                if not only_authors or author["author"]["id"] in only_authors:
-                    # Extrair IDs das instituições
-                    institution_ids = []
-                    for inst in author.get("institutions", []):
-                        if inst.get("id"):
-                            institution_ids.append(inst["id"])
-
-                    writer.writerow(
-                        {
-                            "work_id": work["id"],
-                            "author_id": author["author"]["id"],
-                            "author_name": author["author"].get("display_name"),
-                            "author_position": author.get("author_position"),
-                            "is_corresponding": author.get("is_corresponding", False),
-                            "countries": "|".join(author.get("countries", [])),
-                            "institution_ids": "|".join(institution_ids),
-                        }
-                    )
+            writer.writerows(rows_for(work))
+
+
+# Função para escrever dados no arquivo CSV dos trabalhos
+def write_works_to_csv(filename, works, mode="a"):
+    _write_rows(filename, WORKS_FIELDNAMES, works, lambda work: [work_row(work)], mode)
+
+
+# Função para escrever a relação Trabalho <-> Autor
+def write_authors_to_csv(filename, works, only_authors=[], mode="a"):
+    _write_rows(
+        filename,
+        AUTHORS_FIELDNAMES,
+        works,
+        lambda work: author_rows(work, only_authors),
+        mode,
+    )
 
 
 # Função para escrever metadados das Instituições Únicas
@@ -196,119 +373,130 @@ def write_unique_authors_metadata(filename, authors_data, mode="a"):
 
 # Função para escrever dados no arquivo CSV das citações
 def write_citations_to_csv(filename, works, mode="a"):
-    file_exists = os.path.isfile(filename)
-
-    with open(filename, mode, newline="", encoding="utf-8") as csvfile:
-        fieldnames = ["work_id", "cited_work_id"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        if not file_exists or mode == "w":
-            writer.writeheader()
-
-        for work in works:
-            for cited_work in work.get("referenced_works", []):
-                writer.writerow({"work_id": work["id"], "cited_work_id": cited_work})
+    _write_rows(filename, CITATIONS_FIELDNAMES, works, citation_rows, mode)
 
 
 # Função para escrever dados no arquivo CSV dos trabalhos relacionados
 def write_related_works_to_csv(filename, works, mode="a"):
-    file_exists = os.path.isfile(filename)
-
-    with open(filename, mode, newline="", encoding="utf-8") as csvfile:
-        fieldnames = ["work_id", "related_work_id"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        if not file_exists or mode == "w":
-            writer.writeheader()
-
-        for work in works:
-            for related_work in work.get("related_works", []):
-                writer.writerow(
-                    {"work_id": work["id"], "related_work_id": related_work}
-                )
+    _write_rows(filename, RELATED_WORKS_FIELDNAMES, works, related_work_rows, mode)
 
 
 # Função para escrever dados no arquivo CSV dos conceitos
 def write_concepts_to_csv(filename, works, mode="a"):
-    file_exists = os.path.isfile(filename)
-
-    with open(filename, mode, newline="", encoding="utf-8") as csvfile:
-        fieldnames = [
-            "work_id",
-            "concept_id",
-            "concept_name",
-            "wikidata",
-            "level",
-            "score",
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        if not file_exists or mode == "w":
-            writer.writeheader()
-
-        for work in works:
-            for concept in work.get("concepts", []):
-                writer.writerow(
-                    {
-                        "work_id": work["id"],
-                        "concept_id": concept.get("id"),
-                        "concept_name": concept.get("display_name"),
-                        "wikidata": concept.get("wikidata"),
-                        "level": concept.get("level", 0),
-                        "score": concept.get("score", 0),
-                    }
-                )
+    _write_rows(filename, CONCEPTS_FIELDNAMES, works, concept_rows, mode)
 
 
 # Função para escrever dados no arquivo CSV dos tópicos
 def write_topics_to_csv(filename, works, mode="a"):
-    file_exists = os.path.isfile(filename)
-
-    with open(filename, mode, newline="", encoding="utf-8") as csvfile:
-        fieldnames = ["work_id", "topic_id", "topic_name", "score"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        if not file_exists or mode == "w":
-            writer.writeheader()
-
-        for work in works:
-            topics = work.get("topics", [])
-            # As vezes topics pode ser None na API
-            if topics:
-                for topic in topics:
-                    writer.writerow(
-                        {
-                            "work_id": work["id"],
-                            "topic_id": topic.get("id"),
-                            "topic_name": topic.get("display_name"),
-                            "score": topic.get("score", 0),
-                        }
-                    )
+    _write_rows(filename, TOPICS_FIELDNAMES, works, topic_rows, mode)
 
 
 # Função para escrever dados no arquivo CSV das palavras-chave
 def write_keywords_to_csv(filename, works, mode="a"):
-    file_exists = os.path.isfile(filename)
+    _write_rows(filename, KEYWORDS_FIELDNAMES, works, keyword_rows, mode)
+
+
+class DatasetSink:
+    """Mantém os CSVs de todas as tabelas abertos durante a coleta.
+
+    Cada lote é percorrido uma única vez: cada trabalho é dividido nas linhas
+    de todas as tabelas de uma vez, e as escritas vão para buffers grandes que
+    só são descarregados em `flush` (antes de cada checkpoint) ou `close`.
+    `filenames` mapeia o nome da tabela (chaves de TABLE_FIELDNAMES) para o
+    arquivo; tabelas ausentes não são escritas. Com `abstract_format`
+    "inverted", a coluna "abstract" guarda o índice invertido em JSON.
+    """
+
+    def __init__(self, filenames, buffer_size=1024 * 1024, abstract_format="text"):
+        self.filenames = dict(filenames)
+        self.abstract_format = abstract_format
+        self._files = {}
+        self._writers = {}
+
+        for table, filename in self.filenames.items():
+            # Um arquivo vazio (coleta interrompida antes do primeiro flush)
+            # também precisa do cabeçalho
+            file_exists = os.path.isfile(filename) and os.path.getsize(filename) > 0
+            csvfile = open(
+                filename, "a", newline="", encoding="utf-8", buffering=buffer_size
+            )
+            writer = csv.DictWriter(csvfile, fieldnames=TABLE_FIELDNAMES[table])
+            if not file_exists:
+                writer.writeheader()
+            self._files[table] = csvfile
+            self._writers[table] = writer
 
-    with open(filename, mode, newline="", encoding="utf-8") as csvfile:
-        fieldnames = ["work_id", "keyword_id", "keyword_name", "score"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    def __enter__(self):
+        return self
 
-        if not file_exists or mode == "w":
-            writer.writeheader()
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, works, only_authors=()):
+        only_authors = set(only_authors)
+        writers = self._writers
+        abstract_format = self.abstract_format
 
         for work in works:
-            keywords = work.get("keywords", [])
-            if keywords:
-                for keyword in keywords:
-                    writer.writerow(
-                        {
-                            "work_id": work["id"],
-                            "keyword_id": keyword.get("id"),
-                            "keyword_name": keyword.get("display_name"),
-                            "score": keyword.get("score", 0),
-                        }
-                    )
+            for table, rows in split_work(work, only_authors, abstract_format).items():
+                writer = writers.get(table)
+                if writer is not None:
+                    writer.writerows(rows)
+
+    def write_rows(self, table, rows):
+        """Write already built rows (dicts with the table's columns)."""
+        self._writers[table].writerows(rows)
+
+    def flush(self):
+        for csvfile in self._files.values():
+            csvfile.flush()
+
+    def close(self):
+        for csvfile in self._files.values():
+            csvfile.close()
+        self._files = {}
+        self._writers = {}
+
+
+# Arquivos (CSV) ou diretórios de partes (formatos colunares) que o sink de
+# `filenames` grava, para os tamanhos registrados nos checkpoints
+def output_paths(filenames, output_format="csv"):
+    if output_format == "csv":
+        return list(filenames.values())
+
+    from OpenalexColumnar import table_dir
+
+    return [table_dir(filename, output_format) for filename in filenames.values()]
+
+
+# Abre o destino das tabelas dos trabalhos no formato escolhido
+def open_dataset_sink(filenames, output_format="csv", profile="full"):
+    abstract_format = profile_abstract_format(profile)
+    if output_format == "csv":
+        return DatasetSink(filenames, abstract_format=abstract_format)
+
+    # Import tardio: pyarrow só é necessário para os formatos colunares
+    from OpenalexColumnar import ColumnarSink
+
+    return ColumnarSink(filenames, output_format, abstract_format=abstract_format)
+
+
+# Reescreve a tabela de trabalhos gravada com o perfil "inverted_abstract",
+# trocando o índice invertido de cada resumo pelo texto
+def expand_abstracts(filename, output_filename):
+    with (
+        open(filename, newline="", encoding="utf-8") as src,
+        open(output_filename, "w", newline="", encoding="utf-8") as dst,
+    ):
+        reader = csv.DictReader(src)
+        writer = csv.DictWriter(dst, fieldnames=reader.fieldnames)
+        writer.writeheader()
+        count = 0
+        for row in reader:
+            row["abstract"] = decode_abstract(row["abstract"])
+            writer.writerow(row)
+            count += 1
+    return count
 
 
 # Função para gerar relatório de progresso
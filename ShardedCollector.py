@@ -0,0 +1,579 @@
+import csv
+import datetime
+import multiprocessing
+import os
+import queue as queue_module
+import shutil
+import time
+
+import requests
+from tqdm import tqdm
+
+from OpenalexAsync import AsyncOpenalexClient, BatchPrefetcher
+from OpenalexCache import EntityCache
+from OpenalexCheckpoints import CheckpointJournal, JournaledQueue, TrackedSet
+from OpenalexFrontier import SpillingFrontier, fifo_checkpoint_queue
+from OpenalexIds import IdSet, id_shard
+from OpenalexMetrics import Metrics, shard_path
+from OpenalexPipeline import BackgroundWriter
+from OpenalexPlanner import AuthorBatchPlanner, WORKS_COUNT_SELECT
+from OpenalexRateLimiter import RateLimiter
+from OpenalexUtils import OpenAlexClient, batch_size
+from OpenalexWriter import (
+    TABLE_FIELDNAMES,
+    generate_progress_report,
+    open_dataset_sink,
+    output_paths,
+    profile_filenames,
+    work_select,
+)
+
+# Pasta base de cada método, a mesma das coletas de um processo só
+BASE_FOLDERS = {
+    "citation": "{}_citations_based_database",
+    "author": "{}_author_based_database",
+}
+
+
+# Contadores de cada shard, na ordem de generate_progress_report
+COUNT_KEYS = (
+    "count",
+    "authors_count",
+    "citations_count",
+    "related_works_count",
+    "concepts_count",
+    "topics_count",
+    "keywords_count",
+)
+
+
+# IDs por mensagem ao reenviar os IDs de um checkpoint aos outros shards
+resend_chunk_size = 10000
+
+
+def make_client(client_options, shard=None):
+    """OpenAlexClient de um processo a partir das opções da linha de comando."""
+    options = dict(client_options or {})
+    # Cada shard grava as próprias métricas (arquivo Prometheus com sufixo)
+    metrics = Metrics(
+        prometheus_file=(
+            shard_path(options.get("metrics_prom"), shard)
+            if shard is not None
+            else options.get("metrics_prom")
+        ),
+        labels={"shard": shard} if shard is not None else None,
+    )
+    cache_path = options.get("cache_path")
+    return OpenAlexClient(
+        base_url=options.get("base_url"),
+        mailto=options.get("mailto"),
+        pool_size=options.get("pool_size", 10),
+        timeout=(10, options.get("timeout", 60)),
+        rate_limiter=RateLimiter(
+            rate=options.get("rate_limit", 10),
+            daily_limit=options.get("daily_limit", 100000),
+            state_file=options.get("rate_limit_file"),
+        ),
+        cache=(
+            EntityCache(
+                cache_path,
+                ttl_days=options.get("cache_ttl_days", 30),
+                max_bytes=options.get("cache_max_mb", 2048) * 1024**2,
+            )
+            if cache_path
+            else None
+        ),
+        parallel_pages=options.get("parallel_pages", 1),
+        metrics=metrics,
+    )
+
+
+def shard_filenames(shard_dir):
+    return {table: f"{shard_dir}/openalex_{table}.csv" for table in TABLE_FIELDNAMES}
+
+
+class ShardChannels:
+    """Filas e contadores compartilhados entre os processos da coleta.
+
+    Cada shard tem uma fila de entrada (`inboxes`) por onde recebe listas de
+    IDs descobertos pelos outros. A coleta termina quando o limite é atingido
+    ou quando todos os shards estão ociosos e toda mensagem enviada já foi
+    recebida (`sent == received`, lidos sob o mesmo lock).
+    """
+
+    def __init__(self, shards, context=multiprocessing):
+        self.shards = shards
+        self.inboxes = [context.Queue() for _ in range(shards)]
+        self.lock = context.Lock()
+        self.sent = context.Value("q", 0, lock=False)
+        self.received = context.Value("q", 0, lock=False)
+        self.idle = context.Array("b", shards, lock=False)
+        self.finished = context.Array("b", shards, lock=False)
+        self.collected = context.Value("q", 0)
+        self.stop = context.Event()
+        self.abort = context.Event()
+
+    def send(self, shard, ids):
+        with self.lock:
+            self.sent.value += 1
+        self.inboxes[shard].put(ids)
+
+    def receive(self, shard, timeout=None):
+        """Next list of IDs for `shard`, or None if none arrived in time."""
+        try:
+            if timeout is None:
+                ids = self.inboxes[shard].get_nowait()
+            else:
+                ids = self.inboxes[shard].get(timeout=timeout)
+        except queue_module.Empty:
+            return None
+        with self.lock:
+            self.idle[shard] = 0
+            self.received.value += 1
+        return ids
+
+    def set_idle(self, shard):
+        with self.lock:
+            self.idle[shard] = 1
+            if all(self.idle) and self.sent.value == self.received.value:
+                self.stop.set()
+
+    def set_finished(self, shard):
+        with self.lock:
+            self.finished[shard] = 1
+
+    def drained(self):
+        """True once every shard stopped sending and every message was received."""
+        with self.lock:
+            return all(self.finished) and self.sent.value == self.received.value
+
+    def add_collected(self, count):
+        with self.collected.get_lock():
+            self.collected.value += count
+            return self.collected.value
+
+
+def crawl_shard(
+    method,
+    shard,
+    channels,
+    shard_dir,
+    record_limit,
+    checkpoint_size,
+    client_options,
+    max_in_flight,
+    output_format,
+    profile="full",
+    plan_author_batches=False,
+):
+    """Laço de coleta de um shard (roda em um processo próprio).
+
+    É o mesmo laço das coletas por citação e por autor, mas o shard só busca
+    os IDs que são seus (`id_shard`); os IDs de outros shards descobertos em
+    cada lote são enviados a eles pelas filas de `channels`.
+
+    Os IDs enviados ficam no checkpoint do shard (`routed`) e são reenviados
+    ao retomar: os que estavam nas filas, ou que o dono ainda não tinha
+    gravado no próprio checkpoint, se perdem quando a coleta é interrompida.
+    O dono descarta os que já conhecia.
+    """
+    shards = channels.shards
+    os.makedirs(shard_dir, exist_ok=True)
+    checkpoint_file = f"{shard_dir}/openalex_checkpoint.pkl"
+    progress_report_file = f"{shard_dir}/openalex_progress_report.csv"
+    metrics_file = f"{shard_dir}/openalex_metrics.jsonl"
+
+    shard_tables = profile_filenames(shard_filenames(shard_dir), profile)
+    checkpoint_journal = CheckpointJournal(
+        checkpoint_file, outputs=output_paths(shard_tables, output_format)
+    )
+    checkpoint = checkpoint_journal.load()
+    # As tabelas do shard voltam ao tamanho que tinham no checkpoint
+    checkpoint_journal.restore_outputs(checkpoint)
+    checkpoint = checkpoint or {"queue": [], "enqueued": 0}
+    counts = {key: checkpoint.get(key, 0) for key in COUNT_KEYS}
+
+    work_visited = TrackedSet(
+        checkpoint.get("work_visited", checkpoint.get("visited", ()))
+    )
+    author_visited = TrackedSet(checkpoint.get("author_visited", ()))
+    if method == "citation":
+        queue = SpillingFrontier(
+            f"{shard_dir}/openalex_frontier",
+            *fifo_checkpoint_queue(checkpoint),
+            seen=TrackedSet(checkpoint.get("queued", ())),
+        )
+        visited = work_visited
+    else:
+        queue = JournaledQueue(*fifo_checkpoint_queue(checkpoint))
+        visited = author_visited
+    channels.add_collected(counts["count"])
+
+    def enqueue(item):
+        # A SpillingFrontier já descarta IDs enfileirados antes
+        if item not in visited:
+            queue.append(item)
+
+    # IDs já enviados a outros shards (o dono é quem decide se são novos);
+    # os de um checkpoint anterior voltam para a caixa de saída
+    routed = TrackedSet(checkpoint.get("routed", ()))
+    outbox = [[] for _ in range(shards)]
+    for item in routed:
+        outbox[id_shard(item, shards)].append(item)
+
+    def route(item):
+        owner = id_shard(item, shards)
+        if owner == shard:
+            enqueue(item)
+        elif routed.add(item):
+            outbox[owner].append(item)
+
+    def flush_outbox():
+        for owner, items in enumerate(outbox):
+            for start in range(0, len(items), resend_chunk_size):
+                channels.send(owner, items[start : start + resend_chunk_size])
+            outbox[owner] = []
+
+    def receive_all(timeout=None):
+        items = channels.receive(shard, timeout)
+        while items is not None:
+            for item in items:
+                enqueue(item)
+            items = channels.receive(shard)
+
+    def checkpoint_record(pending):
+        if method == "citation":
+            visited_delta = {
+                "visited": work_visited.drain(),
+                "queued": queue.seen.drain(),
+            }
+        else:
+            visited_delta = {
+                "work_visited": work_visited.drain(),
+                "author_visited": author_visited.drain(),
+            }
+        visited_delta["routed"] = routed.drain()
+        return checkpoint_journal.delta(queue, pending, visited_delta, dict(counts))
+
+    start_time = datetime.datetime.now()
+    client = make_client(client_options, shard)
+    metrics = client.metrics
+    async_client = AsyncOpenalexClient(client, max_in_flight)
+    writer = BackgroundWriter()
+    sink = open_dataset_sink(shard_tables, output_format, profile)
+    if method == "citation":
+        select = work_select(profile, ["referenced_works"])
+        fetch = lambda ids: async_client.submit(
+            async_client.get_data_works(ids, select)
+        )
+    else:
+        select = work_select(profile, ["authorships"])
+        fetch = lambda ids: async_client.submit(
+            async_client.get_author_works(ids, select)
+        )
+    planner = (
+        AuthorBatchPlanner(lambda ids: client.get_data_authors(ids, WORKS_COUNT_SELECT))
+        if plan_author_batches and method == "author"
+        else None
+    )
+    prefetcher = BatchPrefetcher(
+        queue,
+        fetch,
+        visited.__contains__,
+        planner.max_ids if planner else batch_size,
+        depth=max_in_flight,
+        unique_in_batch=method != "citation",
+        should_stop=lambda: channels.stop.is_set() or channels.abort.is_set(),
+        planner=planner,
+    )
+
+    try:
+        flush_outbox()
+        while not channels.stop.is_set() and not channels.abort.is_set():
+            if channels.collected.value >= record_limit:
+                channels.stop.set()
+                break
+            receive_all()
+            if not queue:
+                # Sem trabalho local: espera IDs de outros shards
+                flush_outbox()
+                channels.set_idle(shard)
+                receive_all(timeout=0.2)
+                continue
+
+            for batch_ids, future in prefetcher:
+                if method == "author":
+                    author_visited.update(batch_ids)
+                try:
+                    with metrics.stage("wait"):
+                        data = future.result()
+                except requests.exceptions.RequestException as e:
+                    print(f"Failed to retrieve data for batch {batch_ids}: {e}")
+                    continue
+
+                if method == "citation":
+                    works = data["results"]
+                    writer.submit(metrics.timed("write", sink.write), works)
+                else:
+                    works = [work for work in data if work["id"] not in work_visited]
+                    writer.submit(metrics.timed("write", sink.write), works, batch_ids)
+                    counts["authors_count"] += len(batch_ids)
+                transform_start = time.perf_counter()
+
+                for work in works:
+                    work_visited.add(work["id"])
+                    counts["count"] += 1
+                    if method == "citation":
+                        counts["authors_count"] += len(work.get("authorships", []))
+                    counts["citations_count"] += len(work.get("referenced_works", []))
+                    counts["related_works_count"] += len(work.get("related_works", []))
+                    counts["concepts_count"] += len(work.get("concepts", []))
+                    counts["topics_count"] += len(work.get("topics", []))
+                    counts["keywords_count"] += len(work.get("keywords", []))
+
+                    if method == "citation":
+                        for cited_work_id in work.get("referenced_works", []):
+                            route(cited_work_id)
+                    else:
+                        for author in work["authorships"]:
+                            route(author["author"]["id"])
+                metrics.add("transform", time.perf_counter() - transform_start)
+
+                flush_outbox()
+                receive_all()
+                if channels.add_collected(len(works)) >= record_limit:
+                    channels.stop.set()
+
+                if (
+                    counts["count"] // checkpoint_size
+                    > (counts["count"] - len(works)) // checkpoint_size
+                ):
+                    writer.submit(metrics.timed("write", sink.flush))
+                    writer.submit(
+                        metrics.timed("checkpoint", checkpoint_journal.append),
+                        checkpoint_record(prefetcher.pending_items()),
+                    )
+                    writer.submit(
+                        generate_progress_report,
+                        start_time,
+                        *counts.values(),
+                        progress_report_file,
+                    )
+                    writer.submit(metrics.emit, metrics_file, dict(counts))
+
+        # Os IDs ainda em trânsito entram na fila antes do checkpoint final.
+        # Se outro shard falhou (`abort`) a espera para: o que ficar nas filas
+        # é reenviado por quem enviou quando a coleta for retomada
+        prefetcher.close()
+        flush_outbox()
+        channels.set_finished(shard)
+        while not channels.drained() and not channels.abort.is_set():
+            receive_all(timeout=0.2)
+        receive_all()
+    finally:
+        prefetcher.close()
+        async_client.close()
+        writer.submit(metrics.timed("write", sink.close))
+        writer.submit(
+            metrics.timed("checkpoint", checkpoint_journal.append),
+            checkpoint_record([]),
+        )
+        if method == "citation":
+            queue.close()
+        writer.submit(
+            generate_progress_report, start_time, *counts.values(), progress_report_file
+        )
+        writer.submit(metrics.emit, metrics_file, dict(counts))
+        writer.close()
+
+
+def _read_rows(filename, output_format):
+    if output_format == "csv":
+        with open(filename, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+        return
+
+    # Import tardio: pyarrow só é necessário para os formatos colunares
+    import pyarrow.dataset
+
+    from OpenalexColumnar import table_dir
+
+    dataset = pyarrow.dataset.dataset(
+        table_dir(filename, output_format),
+        format="ipc" if output_format == "arrow" else "parquet",
+    )
+    for batch in dataset.to_batches():
+        yield from batch.to_pylist()
+
+
+def merge_shards(shard_dirs, csv_filenames, method, output_format="csv"):
+    """Junta as tabelas dos shards nas tabelas finais e devolve as contagens.
+
+    As tabelas finais são refeitas a cada execução. Na coleta por autor o
+    mesmo trabalho pode ser baixado por dois shards (um para cada autor); só
+    a primeira cópia de cada trabalho é mantida, mas as linhas de autoria de
+    todos os shards entram, já que cada uma vem do shard dono do autor.
+    """
+    for filename in csv_filenames.values():
+        if output_format == "csv":
+            if os.path.exists(filename):
+                os.remove(filename)
+        else:
+            from OpenalexColumnar import table_dir
+
+            shutil.rmtree(table_dir(filename, output_format), ignore_errors=True)
+
+    keep_all = {"authors"} if method == "author" else set()
+    counts = dict.fromkeys(TABLE_FIELDNAMES, 0)
+    merged_works = IdSet()
+
+    with open_dataset_sink(csv_filenames, output_format) as sink:
+        for shard_dir in shard_dirs:
+            filenames = shard_filenames(shard_dir)
+            shard_works = IdSet()
+
+            for table in csv_filenames:
+                id_column = "id" if table == "works" else "work_id"
+                rows = []
+                for row in _read_rows(filenames[table], output_format):
+                    if table in keep_all or row[id_column] not in merged_works:
+                        rows.append(row)
+                        if len(rows) >= 10000:
+                            sink.write_rows(table, rows)
+                            counts[table] += len(rows)
+                            rows = []
+                    shard_works.add(row[id_column])
+                sink.write_rows(table, rows)
+                counts[table] += len(rows)
+
+            merged_works.update(shard_works)
+
+    return counts
+
+
+def main(
+    record_limit,
+    checkpoint_size,
+    initial_work_id,
+    method="citation",
+    shards=2,
+    client_options=None,
+    max_in_flight=1,
+    output_format="csv",
+    profile="full",
+    plan_author_batches=False,
+):
+    print(f"Record limit: {record_limit}")
+    print(f"Checkpoint size: {checkpoint_size}")
+    print(f"Initial work ID: {initial_work_id}")
+    print(f"Method: {method}")
+    print(f"Shards: {shards}")
+    print(f"Max in flight: {max_in_flight}")
+    print(f"Output format: {output_format}")
+    print(f"Profile: {profile}")
+    print(f"Plan author batches: {plan_author_batches}")
+
+    csv_base_folder = BASE_FOLDERS[method].format(initial_work_id)
+    shards_folder = f"{csv_base_folder}/openalex_shards"
+    if os.path.exists(f"{csv_base_folder}/openalex_checkpoint.pkl"):
+        raise ValueError(
+            f"{csv_base_folder} tem uma coleta sem shards; "
+            "retome-a sem --shards ou use outra pasta."
+        )
+    os.makedirs(shards_folder, exist_ok=True)
+
+    existing = [name for name in os.listdir(shards_folder) if name.startswith("shard-")]
+    if existing and len(existing) != shards:
+        raise ValueError(
+            f"A coleta em {shards_folder} foi iniciada com {len(existing)} shards; "
+            f"retome-a com --shards {len(existing)}."
+        )
+    shard_dirs = [f"{shards_folder}/shard-{shard:03d}" for shard in range(shards)]
+
+    csv_filenames = profile_filenames(
+        {
+            table: f"{csv_base_folder}/openalex_{table}.csv"
+            for table in TABLE_FIELDNAMES
+        },
+        profile,
+    )
+    progress_report_file = f"{csv_base_folder}/openalex_progress_report.csv"
+
+    # Os shards dividem o mesmo limite de requisições da API
+    client_options = dict(client_options or {})
+    if not client_options.get("rate_limit_file"):
+        client_options["rate_limit_file"] = f"{shards_folder}/openalex_rate_limit.json"
+
+    channels = ShardChannels(shards)
+    started = any(
+        os.path.exists(f"{shard_dir}/openalex_checkpoint.pkl")
+        or os.path.exists(f"{shard_dir}/openalex_checkpoint.pkl.journal")
+        for shard_dir in shard_dirs
+    )
+    if not started:
+        # Sementes vão para o shard dono de cada uma
+        if method == "citation":
+            seeds = [initial_work_id]
+        else:
+            client = make_client(client_options)
+            work = client.get_data_works(
+                [initial_work_id], work_select(profile, ["authorships"])
+            )["results"][0]
+            seeds = [author["author"]["id"] for author in work["authorships"]]
+            client.close()
+        for seed in seeds:
+            channels.send(id_shard(seed, shards), [seed])
+
+    start_time = datetime.datetime.now()
+    processes = [
+        multiprocessing.Process(
+            target=crawl_shard,
+            args=(
+                method,
+                shard,
+                channels,
+                shard_dir,
+                record_limit,
+                checkpoint_size,
+                client_options,
+                max_in_flight,
+                output_format,
+                profile,
+                plan_author_batches,
+            ),
+            name=f"openalex-shard-{shard}",
+        )
+        for shard, shard_dir in enumerate(shard_dirs)
+    ]
+    for process in processes:
+        process.start()
+
+    with tqdm(total=record_limit, desc="Collecting data") as pbar:
+        while any(process.is_alive() for process in processes):
+            if any(process.exitcode not in (None, 0) for process in processes):
+                # Um shard falhou: os outros salvam o checkpoint e param
+                channels.abort.set()
+            pbar.update(min(channels.collected.value, record_limit) - pbar.n)
+            time.sleep(0.2)
+        pbar.update(min(channels.collected.value, record_limit) - pbar.n)
+
+    for process in processes:
+        process.join()
+    failed = [process.name for process in processes if process.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"Falha nos shards: {', '.join(failed)}")
+
+    counts = merge_shards(shard_dirs, csv_filenames, method, output_format)
+    print(f"Data collection complete: {counts['works']} records collected.")
+    generate_progress_report(
+        start_time,
+        counts["works"],
+        counts["authors"],
+        counts["citations"],
+        counts["related_works"],
+        counts["concepts"],
+        counts["topics"],
+        counts["keywords"],
+        progress_report_file,
+    )
+    print("Progress report generated.")
@@ -0,0 +1,423 @@
+import datetime
+import glob
+import gzip
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from tqdm import tqdm
+
+import OpenalexJson
+from OpenalexCheckpoints import (
+    load_snapshot_checkpoint,
+    output_offsets,
+    save_checkpoint_snapshot_based,
+    truncate_outputs,
+)
+from OpenalexColumnar import FORMAT_EXTENSIONS, table_dir
+from OpenalexIds import IdSet
+from OpenalexMetrics import Metrics
+from OpenalexWriter import (
+    TABLE_FIELDNAMES,
+    generate_progress_report,
+    open_dataset_sink,
+    output_paths,
+    profile_filenames,
+)
+
+# Contadores de cada tabela, na ordem de generate_progress_report
+COUNT_KEYS = (
+    "count",
+    "authors_count",
+    "citations_count",
+    "related_works_count",
+    "concepts_count",
+    "topics_count",
+    "keywords_count",
+)
+TABLE_COUNT_KEYS = dict(zip(TABLE_FIELDNAMES, COUNT_KEYS))
+
+
+def find_partitions(snapshot_dir):
+    """Partições `.gz` de trabalhos do snapshot, em ordem.
+
+    Aceita a raiz do snapshot (com `data/works/`) ou diretamente o diretório
+    dos trabalhos (`updated_date=AAAA-MM-DD/part_NNN.gz`).
+    """
+    works_dir = os.path.join(snapshot_dir, "data", "works")
+    if os.path.isdir(works_dir):
+        snapshot_dir = works_dir
+    return (
+        sorted(
+            os.path.relpath(path, snapshot_dir)
+            for path in glob.glob(
+                os.path.join(snapshot_dir, "**", "*.gz"), recursive=True
+            )
+        ),
+        snapshot_dir,
+    )
+
+
+def parse_snapshot_filter(text):
+    """`type:article,publication_year:2020-2023` -> [(path, op, values)].
+
+    Mesma sintaxe do parâmetro `filter` da API: condições separadas por
+    vírgula (todas precisam valer), alternativas separadas por `|`, `>N`,
+    `<N` e intervalos `A-B` para números. Campos aninhados usam ponto
+    (`primary_location.source.id`).
+    """
+    conditions = []
+    for condition in filter(None, (text or "").split(",")):
+        field, sep, value = condition.partition(":")
+        if not sep or not field:
+            raise ValueError(f"Filtro inválido: {condition}")
+        path = tuple(field.strip().split("."))
+        value = value.strip()
+        if value[:1] in "<>" and value[1:]:
+            conditions.append((path, value[0], float(value[1:])))
+        elif "-" in value[1:] and _is_range(value):
+            low, high = value.split("-", 1)
+            conditions.append((path, "range", (float(low), float(high))))
+        else:
+            conditions.append(
+                (path, "in", [v.strip().lower() for v in value.split("|")])
+            )
+    return conditions
+
+
+def _is_range(value):
+    low, _, high = value.partition("-")
+    try:
+        float(low), float(high)
+    except ValueError:
+        return False
+    return True
+
+
+def _field(work, path):
+    value = work
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _condition_matches(work, path, op, operand):
+    value = _field(work, path)
+    if op == "in":
+        if value is None:
+            text = "null"
+        elif isinstance(value, bool):
+            text = "true" if value else "false"
+        else:
+            text = str(value).lower()
+            # IDs podem ser informados na forma curta (W123, A456)
+            text = text.rsplit("/", 1)[-1] if text.startswith("https://") else text
+        return text in operand
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return False
+    if op == ">":
+        return value > operand
+    if op == "<":
+        return value < operand
+    return operand[0] <= value <= operand[1]
+
+
+class SnapshotSelection:
+    """Critério que decide quais trabalhos do snapshot entram na base.
+
+    Um trabalho entra se satisfizer todas as condições do filtro e, quando há
+    sementes, se for um trabalho semente, citar um trabalho semente ou ter um
+    autor semente. As sementes ficam em um IdSet, então milhões de IDs cabem
+    em poucos MB em cada processo.
+    """
+
+    def __init__(self, seeds=(), snapshot_filter=None):
+        self.seeds = IdSet(seeds)
+        self.conditions = parse_snapshot_filter(snapshot_filter)
+
+    def __call__(self, work):
+        for path, op, operand in self.conditions:
+            if not _condition_matches(work, path, op, operand):
+                return False
+        seeds = self.seeds
+        if not seeds:
+            return True
+        if work.get("id") in seeds:
+            return True
+        for cited_work_id in work.get("referenced_works") or ():
+            if cited_work_id in seeds:
+                return True
+        for authorship in work.get("authorships") or ():
+            author = authorship.get("author") or {}
+            if author.get("id") in seeds:
+                return True
+        return False
+
+
+def read_seed_file(seed_file):
+    """IDs (curtos ou URLs) de um arquivo, um por linha; `#` inicia comentário."""
+    with open(seed_file, encoding="utf-8") as f:
+        return [
+            line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()
+        ]
+
+
+# Critério de seleção de cada processo do pool (definido pelo initializer)
+_selection = None
+
+
+def _init_worker(selection):
+    global _selection
+    _selection = selection
+
+
+def shard_filenames(shard_dir):
+    return {table: f"{shard_dir}/openalex_{table}.csv" for table in TABLE_FIELDNAMES}
+
+
+def process_partition(partition_path, shard_dir, output_format="csv", profile="full"):
+    """Lê uma partição e grava os trabalhos selecionados em `shard_dir`.
+
+    Roda em um processo do pool; devolve os contadores das tabelas e os
+    segundos gastos em cada etapa (`decode`, `transform` e `write`).
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    counts = dict.fromkeys(COUNT_KEYS, 0)
+    stages = {"decode": 0.0, "transform": 0.0, "write": 0.0}
+    works = []
+    clock = time.perf_counter
+
+    filenames = profile_filenames(shard_filenames(shard_dir), profile)
+    with open_dataset_sink(filenames, output_format, profile) as sink:
+        # Linhas em bytes: o decodificador não precisa de um str intermediário
+        with gzip.open(partition_path, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                start = clock()
+                work = OpenalexJson.loads(line)
+                decoded = clock()
+                selected = _selection(work)
+                stages["decode"] += decoded - start
+                stages["transform"] += clock() - decoded
+                if not selected:
+                    continue
+
+                works.append(work)
+                counts["count"] += 1
+                counts["authors_count"] += len(work.get("authorships") or [])
+                counts["citations_count"] += len(work.get("referenced_works") or [])
+                counts["related_works_count"] += len(work.get("related_works") or [])
+                counts["concepts_count"] += len(work.get("concepts") or [])
+                counts["topics_count"] += len(work.get("topics") or [])
+                counts["keywords_count"] += len(work.get("keywords") or [])
+
+                if len(works) >= 1000:
+                    start = clock()
+                    sink.write(works)
+                    stages["write"] += clock() - start
+                    works = []
+        start = clock()
+        sink.write(works)
+    stages["write"] += clock() - start
+
+    return counts, stages
+
+
+def merge_shard(shard_dir, csv_filenames, counts, output_format="csv"):
+    """Acrescenta as tabelas de uma partição às tabelas finais e apaga o shard."""
+    for table, filename in csv_filenames.items():
+        shard_file = shard_filenames(shard_dir)[table]
+
+        if output_format == "csv":
+            file_exists = os.path.isfile(filename) and os.path.getsize(filename) > 0
+            with open(shard_file, "rb") as src, open(filename, "ab") as dst:
+                header = src.readline()
+                if not file_exists:
+                    dst.write(header)
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            continue
+
+        # Formatos colunares: as partes do shard são renomeadas para o
+        # diretório final, continuando a numeração. Tabelas sem linhas nesta
+        # partição só têm a parte vazia criada pelo ColumnarSink.
+        if not counts[TABLE_COUNT_KEYS[table]]:
+            continue
+        extension = FORMAT_EXTENSIONS[output_format]
+        final_dir = table_dir(filename, output_format)
+        os.makedirs(final_dir, exist_ok=True)
+        next_index = max(
+            (
+                int(name[5:10]) + 1
+                for name in os.listdir(final_dir)
+                if name.startswith("part-")
+            ),
+            default=0,
+        )
+        shard_table_dir = table_dir(shard_file, output_format)
+        for name in sorted(os.listdir(shard_table_dir)):
+            if name.startswith("part-"):
+                os.replace(
+                    os.path.join(shard_table_dir, name),
+                    os.path.join(final_dir, f"part-{next_index:05d}.{extension}"),
+                )
+                next_index += 1
+
+    shutil.rmtree(shard_dir)
+
+
+def main(
+    record_limit,
+    initial_work_id,
+    snapshot_dir,
+    seed_file=None,
+    snapshot_filter=None,
+    workers=None,
+    output_format="csv",
+    profile="full",
+    metrics_prom=None,
+):
+    workers = workers or os.cpu_count() or 1
+    print(f"Record limit: {record_limit}")
+    print(f"Snapshot dir: {snapshot_dir}")
+    print(f"Workers: {workers}")
+    print(f"Output format: {output_format}")
+    print(f"Profile: {profile}")
+
+    # Sem arquivo de sementes, o ID inicial é a semente (a não ser que só o
+    # filtro tenha sido informado)
+    if seed_file:
+        seeds = read_seed_file(seed_file)
+        csv_base_folder = f"{os.path.splitext(os.path.basename(seed_file))[0]}_snapshot_based_database"
+    elif snapshot_filter:
+        seeds = []
+        csv_base_folder = "snapshot_based_database"
+    else:
+        seeds = initial_work_id.split(",")
+        csv_base_folder = f"{initial_work_id}_snapshot_based_database"
+    print(f"Seeds: {len(seeds)}")
+    print(f"Filter: {snapshot_filter or '-'}")
+
+    selection = SnapshotSelection(seeds, snapshot_filter)
+
+    if not os.path.exists(csv_base_folder):
+        os.makedirs(csv_base_folder)
+
+    csv_filenames = profile_filenames(
+        {
+            table: f"{csv_base_folder}/openalex_{table}.csv"
+            for table in TABLE_FIELDNAMES
+        },
+        profile,
+    )
+    progress_report_file = f"{csv_base_folder}/openalex_progress_report.csv"
+    metrics_file = f"{csv_base_folder}/openalex_metrics.jsonl"
+    checkpoint_file = f"{csv_base_folder}/openalex_checkpoint.pkl"
+    shards_dir = f"{csv_base_folder}/openalex_shards"
+
+    partitions, works_dir = find_partitions(snapshot_dir)
+    if not partitions:
+        print(f"Nenhuma partição .gz encontrada em {snapshot_dir}.")
+        return
+
+    # Carrega o estado salvo, se existir. As tabelas voltam ao tamanho que
+    # tinham no checkpoint: uma partição juntada depois dele é juntada de novo
+    # (checkpoints antigos, sem os tamanhos, não mexem nas tabelas).
+    outputs = output_paths(csv_filenames, output_format)
+    checkpoint = load_snapshot_checkpoint(checkpoint_file)
+    if checkpoint is None or "output_offsets" in checkpoint:
+        offsets = checkpoint["output_offsets"] if checkpoint else {}
+        if truncate_outputs(outputs, offsets):
+            print("Tabelas cortadas de volta ao último checkpoint.")
+    if checkpoint:
+        done = set(checkpoint["partitions"])
+        counts = {key: checkpoint[key] for key in COUNT_KEYS}
+    else:
+        done = set()
+        counts = dict.fromkeys(COUNT_KEYS, 0)
+
+    # Shards de uma execução interrompida são refeitos
+    if os.path.exists(shards_dir):
+        shutil.rmtree(shards_dir)
+
+    todo = [partition for partition in partitions if partition not in done]
+    start_time = datetime.datetime.now()
+    # Etapas dos processos do pool somadas às do processo principal
+    metrics = Metrics(prometheus_file=metrics_prom)
+
+    # As partições são processadas em paralelo, mas os shards são juntados às
+    # tabelas finais na ordem das partições, então a saída não depende da
+    # ordem em que os processos terminam. No máximo 2 * workers shards
+    # ficam esperando em disco.
+    with (
+        ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(selection,)
+        ) as executor,
+        tqdm(total=len(partitions), desc="Reading snapshot") as pbar,
+    ):
+        pbar.update(len(partitions) - len(todo))
+        in_flight = deque()
+        pending = iter(enumerate(todo))
+
+        def submit_next():
+            for index, partition in pending:
+                shard_dir = f"{shards_dir}/{index:06d}"
+                future = executor.submit(
+                    process_partition,
+                    os.path.join(works_dir, partition),
+                    shard_dir,
+                    output_format,
+                    profile,
+                )
+                in_flight.append((partition, shard_dir, future))
+                return
+
+        for _ in range(2 * workers):
+            submit_next()
+
+        while in_flight and counts["count"] < record_limit:
+            partition, shard_dir, future = in_flight.popleft()
+            with metrics.stage("wait"):
+                partition_counts, partition_stages = future.result()
+            for stage, seconds in partition_stages.items():
+                metrics.add(stage, seconds)
+            with metrics.stage("write"):
+                merge_shard(shard_dir, csv_filenames, partition_counts, output_format)
+            submit_next()
+
+            for key in COUNT_KEYS:
+                counts[key] += partition_counts[key]
+            done.add(partition)
+            pbar.update(1)
+
+            # O checkpoint só é salvo depois que a partição foi juntada
+            with metrics.stage("checkpoint"):
+                save_checkpoint_snapshot_based(
+                    sorted(done),
+                    *(counts[key] for key in COUNT_KEYS),
+                    checkpoint_file,
+                    output_offsets(outputs),
+                )
+            generate_progress_report(
+                start_time, *(counts[key] for key in COUNT_KEYS), progress_report_file
+            )
+            metrics.emit(metrics_file, counts)
+
+        # Limite atingido: partições ainda não iniciadas são canceladas
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if os.path.exists(shards_dir):
+        shutil.rmtree(shards_dir)
+    # Garante que todas as tabelas existam (com cabeçalho/esquema), mesmo
+    # que nenhum trabalho tenha sido selecionado
+    open_dataset_sink(csv_filenames, output_format).close()
+
+    print(
+        f"Data collection complete: {counts['count']} records collected "
+        f"from {len(done)} of {len(partitions)} partitions."
+    )
+    print("Progress report generated.")
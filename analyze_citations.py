@@ -0,0 +1,77 @@
+import argparse
+import os
+import time
+
+from OpenalexAnalytics import citation_metrics, write_work_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="PageRank e contagens de citações locais dos trabalhos de uma coleta."
+    )
+    parser.add_argument(
+        "folder",
+        help="Pasta da coleta (com openalex_citations.csv ou citations.csv, ou o grafo de build_graph.py).",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Tabela de saída (padrão: openalex_work_metrics.csv na pasta da coleta).",
+    )
+    parser.add_argument(
+        "--damping",
+        type=float,
+        default=0.85,
+        help="Fator de amortecimento do PageRank (padrão: 0.85).",
+    )
+    parser.add_argument(
+        "--tol",
+        type=float,
+        default=1e-8,
+        help="Para quando a variação total (L1) entre iterações fica abaixo disso (padrão: 1e-8).",
+    )
+    parser.add_argument(
+        "--max_iter",
+        type=int,
+        default=100,
+        help="Máximo de iterações do PageRank (padrão: 100).",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Quantos trabalhos mais bem colocados mostrar (padrão: 10).",
+    )
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        print(f"Erro: A pasta '{args.folder}' não foi encontrada.")
+        return
+
+    start = time.perf_counter()
+    try:
+        metrics = citation_metrics(args.folder, args.damping, args.tol, args.max_iter)
+    except FileNotFoundError as e:
+        print(f"Erro: {e}")
+        return
+    output = args.output or os.path.join(args.folder, "openalex_work_metrics.csv")
+    count = write_work_metrics(output, metrics)
+    print(
+        f"{count} trabalhos, {int(metrics['local_references_count'].sum())} citações, "
+        f"{metrics['iterations']} iterações do PageRank, "
+        f"{time.perf_counter() - start:.1f} s."
+    )
+    print(f"Métricas gravadas em: {output}")
+
+    if args.top:
+        print(f"\n{'PAGERANK':<12} | {'CITAÇÕES LOCAIS':<15} | ID OPENALEX")
+        with open(output, encoding="utf-8") as f:
+            next(f)
+            for _, line in zip(range(args.top), f):
+                work_id, cited_by, _, rank = line.rstrip("\n").split(",")
+                print(f"{float(rank):<12.6f} | {cited_by:<15} | {work_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import OpenalexUtils
 import OpenalexWriter
-from collections import deque
-import time
+from OpenalexAsync import AsyncOpenalexClient, BatchPrefetcher
+from OpenalexFrontier import PriorityFrontier, score_fields, work_score
+from OpenalexIds import IdQueue, IdSet
 import os
+import time
 
 
 def get_files(output_dir):
@@ -16,6 +18,7 @@ def get_files(output_dir):
         "topics": f"{output_dir}/topics.csv",
         "keywords": f"{output_dir}/keywords.csv",
         "related": f"{output_dir}/related_works.csv",
+        "metrics": f"{output_dir}/metrics.jsonl",
     }
 
 
@@ -24,7 +27,7 @@ def ensure_output_dir(output_dir):
         os.makedirs(output_dir)
 
 
-def get_initial_author_id(initial_work_id):
+def get_initial_author_id(initial_work_id, client=None):
     """
     Extrai o ID do autor inicial a partir de um work_id ou autor_id.
     Se initial_work_id começar com 'A' ou for uma URL de autor, usa diretamente.
@@ -35,8 +38,10 @@ def get_initial_author_id(initial_work_id):
             return initial_work_id.split("/")[-1]
         return initial_work_id
 
+    client = client or OpenalexUtils.get_default_client()
+
     try:
-        data = OpenalexUtils.get_data_works_from_openalex([initial_work_id])
+        data = client.get_data_works([initial_work_id])
         if data.get("results") and len(data["results"]) > 0:
             work = data["results"][0]
             if work.get("authorships") and len(work["authorships"]) > 0:
@@ -48,7 +53,16 @@ def get_initial_author_id(initial_work_id):
     return "A5080238381"
 
 
-def run_bfs_collection(max_authors_to_collect, output_dir, initial_author_id):
+def run_bfs_collection(
+    max_authors_to_collect,
+    output_dir,
+    initial_author_id,
+    client=None,
+    max_in_flight=1,
+    output_format="csv",
+    priority=None,
+    profile="full",
+):
     ensure_output_dir(output_dir)
 
     FILES = get_files(output_dir)
@@ -60,34 +74,67 @@ def run_bfs_collection(max_authors_to_collect, output_dir, initial_author_id):
         else initial_author_id
     )
 
-    queue = deque([start_id])
-    collected_authors_ids = {start_id}
-    processed_authors_ids = set()
-    seen_works_ids = set()
-    collected_institution_ids = set()
+    # IDs guardados como inteiros (OpenalexIds) para a memória não crescer
+    # com o tamanho das URLs
+    if priority:
+        queue = PriorityFrontier(short_ids=True)
+        queue.append(start_id)
+    else:
+        queue = IdQueue([start_id], short_ids=True)
+    collected_authors_ids = IdSet([start_id], short_ids=True)
+    processed_authors_ids = IdSet(short_ids=True)
+    seen_works_ids = IdSet()
+    collected_institution_ids = IdSet()
 
     print("--- Iniciando Coleta BFS ---")
     print(f"Autor Inicial: {start_id}")
     print(f"Meta: Coletar {max_authors_to_collect} autores distintos.")
     print("-" * 30)
 
-    while queue:
-        if len(collected_authors_ids) >= max_authors_to_collect:
-            print("Limite de autores atingido. Parando busca.")
-            break
-
-        current_author_id = queue.popleft()
+    # As tabelas dos trabalhos do perfil ficam abertas durante a busca, e só
+    # os campos delas (e as autorias, para achar os coautores) são pedidos
+    sink = OpenalexWriter.open_dataset_sink(
+        OpenalexWriter.profile_filenames(
+            {
+                "works": FILES["works"],
+                "authors": FILES["authorships"],
+                "citations": FILES["citations"],
+                "related_works": FILES["related"],
+                "concepts": FILES["concepts"],
+                "topics": FILES["topics"],
+                "keywords": FILES["keywords"],
+            },
+            profile,
+        ),
+        output_format,
+        profile,
+    )
+    select = OpenalexWriter.work_select(
+        profile, ["authorships", *score_fields(priority)]
+    )
 
-        if current_author_id in processed_authors_ids:
-            continue
+    # Coleta os trabalhos de até max_in_flight autores ao mesmo tempo
+    async_client = AsyncOpenalexClient(client, max_in_flight)
+    metrics = async_client.client.metrics
+    prefetcher = BatchPrefetcher(
+        queue,
+        lambda ids: async_client.submit(async_client.get_author_works(ids, select)),
+        processed_authors_ids.__contains__,
+        1,
+        depth=max_in_flight,
+        should_stop=lambda: len(collected_authors_ids) >= max_authors_to_collect,
+    )
 
+    for (current_author_id,), future in prefetcher:
         print(f"\nProcessando autor: {current_author_id}")
         print(
-            f"Status: {len(collected_authors_ids)}/{max_authors_to_collect} autores coletados. Fila: {len(queue)}"
+            f"Status: {len(collected_authors_ids)}/{max_authors_to_collect} autores coletados. Fila: {len(queue) + len(prefetcher)}"
         )
 
-        works = OpenalexUtils.get_author_works([current_author_id])
+        with metrics.stage("wait"):
+            works = future.result()
         processed_authors_ids.add(current_author_id)
+        transform_start = time.perf_counter()
 
         new_works_buffer = []
 
@@ -98,6 +145,7 @@ def run_bfs_collection(max_authors_to_collect, output_dir, initial_author_id):
                 seen_works_ids.add(w_id)
                 new_works_buffer.append(work)
 
+                score = work_score(work, priority)
                 for authorship in work.get("authorships", []):
                     auth_obj = authorship.get("author")
                     if not auth_obj:
@@ -112,31 +160,32 @@ def run_bfs_collection(max_authors_to_collect, output_dir, initial_author_id):
                     if auth_id not in collected_authors_ids:
                         if len(collected_authors_ids) < max_authors_to_collect:
                             collected_authors_ids.add(auth_id)
-                            queue.append(auth_id)
+                            queue.append(auth_id, score)
+                    elif priority and auth_id not in processed_authors_ids:
+                        # Coautor reencontrado: sobe na fronteira por prioridade
+                        queue.append(auth_id, score)
 
                     # Coletar IDs de instituições
                     for inst in authorship.get("institutions", []):
                         if inst.get("id"):
                             collected_institution_ids.add(inst["id"])
 
+        metrics.add("transform", time.perf_counter() - transform_start)
+
         if new_works_buffer:
             print(f"  > Salvando {len(new_works_buffer)} novos trabalhos...")
-            OpenalexWriter.write_works_to_csv(FILES["works"], new_works_buffer)
-            OpenalexWriter.write_authors_to_csv(FILES["authorships"], new_works_buffer)
-            OpenalexWriter.write_citations_to_csv(FILES["citations"], new_works_buffer)
-            OpenalexWriter.write_related_works_to_csv(
-                FILES["related"], new_works_buffer
-            )
-            OpenalexWriter.write_concepts_to_csv(FILES["concepts"], new_works_buffer)
-            OpenalexWriter.write_topics_to_csv(FILES["topics"], new_works_buffer)
-            OpenalexWriter.write_keywords_to_csv(FILES["keywords"], new_works_buffer)
+            with metrics.stage("write"):
+                sink.write(new_works_buffer)
         else:
             print(
                 "  > Nenhum trabalho novo (todos já processados via co-autores anteriores)."
             )
 
-        if not queue and len(collected_authors_ids) >= max_authors_to_collect:
-            break
+    if len(collected_authors_ids) >= max_authors_to_collect:
+        print("Limite de autores atingido. Parando busca.")
+    prefetcher.close()
+    with metrics.stage("write"):
+        sink.close()
 
     print("\n" + "=" * 30)
     print("Busca e extração de trabalhos finalizada.")
@@ -148,23 +197,24 @@ def run_bfs_collection(max_authors_to_collect, output_dir, initial_author_id):
     chunk_size = 50
 
     total_chunks = (len(all_authors_list) // chunk_size) + 1
+    chunks = [
+        all_authors_list[i : i + chunk_size]
+        for i in range(0, len(all_authors_list), chunk_size)
+    ]
 
-    for i in range(0, len(all_authors_list), chunk_size):
-        chunk = all_authors_list[i : i + chunk_size]
-        print(
-            f"Baixando lote {i//chunk_size + 1}/{total_chunks} ({len(chunk)} autores)..."
-        )
+    for index, (chunk, future) in enumerate(
+        zip(chunks, async_client.imap(async_client.get_data_authors, chunks))
+    ):
+        print(f"Baixando lote {index + 1}/{total_chunks} ({len(chunk)} autores)...")
 
         try:
-            data = OpenalexUtils.get_data_authors_from_openalex(chunk)
+            data = future.result()
             results = data.get("results", [])
 
             OpenalexWriter.write_unique_authors_metadata(
                 FILES["unique_authors"], results
             )
 
-            time.sleep(0.2)
-
         except Exception as e:
             print(f"Erro ao baixar lote de autores: {e}")
 
@@ -178,30 +228,52 @@ def run_bfs_collection(max_authors_to_collect, output_dir, initial_author_id):
         chunk_size = 50
 
         total_chunks = (len(all_institutions_list) // chunk_size) + 1
-
-        for i in range(0, len(all_institutions_list), chunk_size):
-            chunk = all_institutions_list[i : i + chunk_size]
+        chunks = [
+            all_institutions_list[i : i + chunk_size]
+            for i in range(0, len(all_institutions_list), chunk_size)
+        ]
+
+        for index, (chunk, future) in enumerate(
+            zip(chunks, async_client.imap(async_client.get_data_institutions, chunks))
+        ):
             print(
-                f"Baixando lote {i//chunk_size + 1}/{total_chunks} ({len(chunk)} instituições)..."
+                f"Baixando lote {index + 1}/{total_chunks} ({len(chunk)} instituições)..."
             )
 
             try:
-                data = OpenalexUtils.get_data_institutions_from_openalex(chunk)
+                data = future.result()
                 results = data.get("results", [])
 
                 OpenalexWriter.write_unique_institutions_metadata(
                     FILES["unique_institutions"], results
                 )
 
-                time.sleep(0.2)
-
             except Exception as e:
                 print(f"Erro ao baixar lote de instituições: {e}")
 
+    async_client.close()
+    metrics.emit(
+        FILES["metrics"],
+        {
+            "authors": len(collected_authors_ids),
+            "processed_authors": len(processed_authors_ids),
+            "works": len(seen_works_ids),
+            "institutions": len(collected_institution_ids),
+        },
+    )
     print("\nProcesso Completo com Sucesso!")
 
 
-def main(record_limit, checkpoint_size, initial_work_id):
+def main(
+    record_limit,
+    checkpoint_size,
+    initial_work_id,
+    client=None,
+    max_in_flight=1,
+    output_format="csv",
+    priority=None,
+    profile="full",
+):
     """
     Função principal para coleta baseada em grafo de autores.
 
@@ -209,14 +281,29 @@ def main(record_limit, checkpoint_size, initial_work_id):
         record_limit: Limite de autores distintos a serem coletados
         checkpoint_size: Tamanho do checkpoint (não utilizado atualmente, mantido para compatibilidade)
         initial_work_id: ID do trabalho inicial ou ID/URL do autor inicial
+        client: OpenAlexClient compartilhado (um novo é criado se omitido)
+        max_in_flight: Número máximo de requisições simultâneas à API
+        output_format: Formato das tabelas dos trabalhos (csv, parquet ou arrow)
+        priority: Critério da busca best-first (None para BFS)
+        profile: Perfil de saída (tabelas geradas e campos pedidos à API)
     """
     print(f"Author limit: {record_limit}")
     print(f"Checkpoint size: {checkpoint_size} (não utilizado neste método)")
     print(f"Initial work/author ID: {initial_work_id}")
 
     output_dir = f"{initial_work_id}_author_graph_database"
-    initial_author_id = get_initial_author_id(initial_work_id)
-    run_bfs_collection(record_limit, output_dir, initial_author_id)
+    client = client or OpenalexUtils.OpenAlexClient()
+    initial_author_id = get_initial_author_id(initial_work_id, client)
+    run_bfs_collection(
+        record_limit,
+        output_dir,
+        initial_author_id,
+        client,
+        max_in_flight,
+        output_format,
+        priority,
+        profile,
+    )
 
 
 if __name__ == "__main__":
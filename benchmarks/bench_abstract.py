@@ -0,0 +1,113 @@
+"""Tempo de reconstrução dos resumos de uma página de trabalhos da API.
+
+Uso:
+    python benchmarks/bench_abstract.py [fixture.json ...]
+
+Compara a versão antiga de `parse_abstract_inverted_index` (ordena pares
+(posição, palavra)), a atual (posiciona cada palavra direto no seu slot) e o
+perfil `inverted_abstract`, que só grava o índice invertido em JSON compacto e
+deixa o texto para a exportação. Sem fixtures, usa a página sintética de
+bench_json_decode.py (gravadas com `bench_json_decode.py --record`).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import OpenalexJson  # noqa: E402
+from bench_json_decode import load_fixture, synthetic_page  # noqa: E402
+from OpenalexUtils import parse_abstract_inverted_index  # noqa: E402
+from OpenalexWriter import decode_abstract, encode_inverted_abstract  # noqa: E402
+
+
+def sorted_parse_abstract(inverted_index):
+    """Versão anterior de parse_abstract_inverted_index, para comparação."""
+    if inverted_index is None:
+        return ""
+
+    abstract_words = []
+
+    for word, positions in inverted_index.items():
+        for pos in positions:
+            abstract_words.append((pos, word))
+
+    abstract_words.sort()
+
+    abstract = " ".join(
+        word.replace("\n", " ").replace("\r", "") for pos, word in abstract_words
+    )
+
+    return abstract
+
+
+def strategies():
+    return {
+        "ordenação (antiga)": sorted_parse_abstract,
+        "slots por posição": parse_abstract_inverted_index,
+        "adiado (só JSON)": encode_inverted_abstract,
+    }
+
+
+def bench(indexes, function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for inverted_index in indexes:
+            function(inverted_index)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def check(indexes):
+    """A versão nova e a exportação adiada devem produzir o mesmo texto."""
+    for inverted_index in indexes:
+        expected = sorted_parse_abstract(inverted_index)
+        assert parse_abstract_inverted_index(inverted_index) == expected
+        assert decode_abstract(encode_inverted_abstract(inverted_index)) == expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "fixtures", nargs="*", help="Páginas gravadas (.json ou .json.gz)."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="Repetições por página (padrão: 20)."
+    )
+    args = parser.parse_args()
+
+    if args.fixtures:
+        pages = [(os.path.basename(path), load_fixture(path)) for path in args.fixtures]
+    else:
+        pages = [("sintética (200 trabalhos)", synthetic_page())]
+
+    print(f"JSON do modo adiado: {OpenalexJson.backend}")
+
+    for name, payload in pages:
+        indexes = [
+            work.get("abstract_inverted_index")
+            for work in OpenalexJson.loads(payload)["results"]
+        ]
+        check(indexes)
+        words = sum(
+            len(positions)
+            for inverted_index in indexes
+            if inverted_index
+            for positions in inverted_index.values()
+        )
+        print(f"\n{name}: {len(indexes)} resumos, {words} palavras")
+        baseline = None
+        for label, function in strategies().items():
+            seconds = bench(indexes, function, args.repeat)
+            baseline = baseline or seconds
+            print(
+                f"  {label:<20} {seconds * 1000:8.2f} ms/página  ({baseline / seconds:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
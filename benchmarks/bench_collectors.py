@@ -0,0 +1,228 @@
+"""Vazão ponta a ponta dos coletores do main.py contra o servidor mock.
+
+Uso:
+    python benchmarks/bench_collectors.py
+    python benchmarks/bench_collectors.py --scales small,medium,large \\
+        --methods citation,author --latency 0.05 --error_rate 0.01 \\
+        --extra "--max_in_flight 4"
+
+Para cada escala, sobe um mock_openalex.py com o grafo sintético daquele
+tamanho e roda cada método do main.py (em um diretório temporário, como um
+processo separado). Mede trabalhos/s, requisições/s (contadas pelo mock), o
+pico de memória (RSS) do processo do coletor e o tempo gasto gravando
+checkpoints.
+"""
+
+import argparse
+import csv
+import json
+import os
+import runpy
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(benchmarks_dir)
+
+# Escalas: trabalhos no grafo, limite de trabalhos e limite de autores
+SCALES = {
+    "small": {"works": 2000, "record_limit": 1000, "author_limit": 100},
+    "medium": {"works": 20000, "record_limit": 10000, "author_limit": 1000},
+    "large": {"works": 100000, "record_limit": 50000, "author_limit": 5000},
+}
+METHODS = ["citation", "author", "author_limit", "author_graph"]
+WORKS_TABLES = ("openalex_works.csv", "works.csv")
+
+
+def run_child(metrics_file, argv):
+    """Roda o main.py neste processo, medindo as gravações de checkpoint."""
+    sys.path.insert(0, repo_dir)
+    import OpenalexCheckpoints
+
+    timings = {"checkpoint_seconds": 0.0, "checkpoints": 0}
+    append = OpenalexCheckpoints.CheckpointJournal.append
+
+    def timed_append(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return append(self, *args, **kwargs)
+        finally:
+            timings["checkpoint_seconds"] += time.perf_counter() - start
+            timings["checkpoints"] += 1
+
+    OpenalexCheckpoints.CheckpointJournal.append = timed_append
+    sys.argv = [os.path.join(repo_dir, "main.py"), *argv]
+    try:
+        runpy.run_path(sys.argv[0], run_name="__main__")
+    finally:
+        with open(metrics_file, "w") as f:
+            json.dump(timings, f)
+
+
+def start_mock(scale, args):
+    command = [
+        sys.executable,
+        os.path.join(benchmarks_dir, "mock_openalex.py"),
+        "--port",
+        "0",
+        "--works",
+        str(scale["works"]),
+        "--seed",
+        str(args.seed),
+        "--latency",
+        str(args.latency),
+        "--jitter",
+        str(args.jitter),
+        "--error_rate",
+        str(args.error_rate),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    base_url = process.stdout.readline().strip()
+    process.stdout.readline()
+    return process, base_url
+
+
+def mock_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.loads(response.read())
+
+
+def count_works(output_dir):
+    total = 0
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            if name in WORKS_TABLES:
+                with open(os.path.join(root, name), newline="", encoding="utf-8") as f:
+                    total += sum(1 for _ in csv.reader(f)) - 1
+    return total
+
+
+def run_method(method, scale, base_url, args):
+    """Roda um método em um diretório novo e devolve as medidas."""
+    limit = scale["author_limit" if method.startswith("author_") else "record_limit"]
+    with tempfile.TemporaryDirectory(prefix=f"bench_{method}_") as output_dir:
+        metrics_file = os.path.join(output_dir, "bench_metrics.json")
+        argv = [
+            method,
+            "--api_base_url",
+            base_url,
+            "--initial_work_id",
+            "W1",
+            "--record_limit",
+            str(limit),
+            "--checkpoint_size",
+            str(args.checkpoint_size),
+            "--rate_limit",
+            "100000",
+            "--daily_limit",
+            "1000000000",
+            *shlex.split(args.extra),
+        ]
+        command = [sys.executable, os.path.abspath(__file__), "--child", metrics_file]
+        before = mock_stats(base_url)
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [*command, "--", *argv],
+            cwd=output_dir,
+            stdout=subprocess.DEVNULL if not args.verbose else None,
+            stderr=subprocess.DEVNULL if not args.verbose else None,
+        )
+        # wait4 devolve o uso de recursos só deste processo (ru_maxrss em KiB)
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        seconds = time.perf_counter() - start
+        after = mock_stats(base_url)
+
+        requests = sum(
+            after.get(key, 0) - before.get(key, 0)
+            for key in ("works", "authors", "institutions")
+        )
+        timings = {}
+        if os.path.exists(metrics_file):
+            with open(metrics_file) as f:
+                timings = json.load(f)
+        works = count_works(output_dir)
+
+    return {
+        "method": method,
+        "limit": limit,
+        "exit_code": process.returncode,
+        "seconds": seconds,
+        "works": works,
+        "works_per_second": works / seconds,
+        "requests": requests,
+        "errors": after.get("errors", 0) - before.get("errors", 0),
+        "requests_per_second": requests / seconds,
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+        "checkpoints": timings.get("checkpoints", 0),
+        "checkpoint_seconds": timings.get("checkpoint_seconds", 0.0),
+    }
+
+
+def print_results(scale_name, scale, results):
+    print(f"\nEscala {scale_name}: grafo com {scale['works']} trabalhos")
+    print(
+        f"  {'método':<13} {'limite':>7} {'trabalhos':>9} {'tempo (s)':>9} "
+        f"{'trab/s':>8} {'req':>6} {'req/s':>7} {'RSS (MB)':>9} {'checkpoint (s)':>15}"
+    )
+    for r in results:
+        status = "" if r["exit_code"] == 0 else f"  (saída {r['exit_code']})"
+        print(
+            f"  {r['method']:<13} {r['limit']:>7} {r['works']:>9} {r['seconds']:>9.2f} "
+            f"{r['works_per_second']:>8.1f} {r['requests']:>6} "
+            f"{r['requests_per_second']:>7.1f} {r['peak_rss_mb']:>9.1f} "
+            f"{r['checkpoint_seconds']:>8.3f} ({r['checkpoints']}){status}"
+        )
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        separator = sys.argv.index("--")
+        run_child(sys.argv[2], sys.argv[separator + 1 :])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scales", default="small,medium", help="Escalas: small, medium, large."
+    )
+    parser.add_argument("--methods", default=",".join(METHODS))
+    parser.add_argument("--checkpoint_size", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error_rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--extra", default="", help="Argumentos extras para o main.py (uma string)."
+    )
+    parser.add_argument("--json", help="Grava os resultados neste arquivo JSON.")
+    parser.add_argument(
+        "--verbose", action="store_true", help="Mostra a saída dos coletores."
+    )
+    args = parser.parse_args()
+
+    all_results = {}
+    for scale_name in args.scales.split(","):
+        scale = SCALES[scale_name]
+        mock, base_url = start_mock(scale, args)
+        try:
+            results = [
+                run_method(method, scale, base_url, args)
+                for method in args.methods.split(",")
+            ]
+        finally:
+            mock.terminate()
+            mock.wait()
+        print_results(scale_name, scale, results)
+        all_results[scale_name] = results
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(all_results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Tempo de decodificação de uma página de trabalhos da API, por decodificador.
+
+Uso:
+    python benchmarks/bench_json_decode.py [fixture.json ...]
+    python benchmarks/bench_json_decode.py --record benchmarks/fixtures --pages 5
+
+Sem fixtures, usa uma página sintética de 200 trabalhos com o formato
+completo da API. `--record` grava páginas reais (bytes crus da resposta)
+para serem usadas depois como fixtures.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import OpenalexJson  # noqa: E402
+from OpenalexUtils import api_base_url, per_page  # noqa: E402
+
+
+def synthetic_work(rng, index):
+    """Trabalho com os campos e tamanhos típicos de uma resposta completa."""
+    words = [f"palavra{rng.randrange(5000)}" for _ in range(180)]
+    inverted = {}
+    for position, word in enumerate(words):
+        inverted.setdefault(word, []).append(position)
+
+    def ref(prefix):
+        return f"https://openalex.org/{prefix}{rng.randrange(10**10)}"
+
+    def scored(prefix, count, **extra):
+        return [
+            {
+                "id": ref(prefix),
+                "display_name": f"Nome {rng.randrange(10**6)}",
+                "score": rng.random(),
+                **extra,
+            }
+            for _ in range(count)
+        ]
+
+    institution = {
+        "id": ref("I"),
+        "display_name": "Universidade Exemplo",
+        "ror": "https://ror.org/000000000",
+        "country_code": "BR",
+        "type": "education",
+        "lineage": [ref("I")],
+    }
+    location = {
+        "is_oa": True,
+        "landing_page_url": "https://example.org/artigo",
+        "pdf_url": None,
+        "source": {
+            "id": ref("S"),
+            "display_name": "Revista Exemplo",
+            "type": "journal",
+        },
+        "license": "cc-by",
+        "version": "publishedVersion",
+    }
+    return {
+        "id": f"https://openalex.org/W{index}",
+        "doi": f"https://doi.org/10.1234/{index}",
+        "title": " ".join(words[:12]),
+        "display_name": " ".join(words[:12]),
+        "publication_year": 2020,
+        "publication_date": "2020-01-01",
+        "language": "en",
+        "type": "article",
+        "cited_by_count": rng.randrange(1000),
+        "fwci": rng.random() * 5,
+        "open_access": {"is_oa": True, "oa_status": "gold", "oa_url": None},
+        "has_fulltext": True,
+        "is_retracted": False,
+        "is_paratext": False,
+        "locations_count": 3,
+        "countries_distinct_count": 2,
+        "institutions_distinct_count": 3,
+        "referenced_works_count": 40,
+        "primary_location": location,
+        "locations": [location] * 3,
+        "authorships": [
+            {
+                "author_position": "middle",
+                "author": {
+                    "id": ref("A"),
+                    "display_name": f"Autor {rng.randrange(10**6)}",
+                    "orcid": None,
+                },
+                "institutions": [institution],
+                "countries": ["BR"],
+                "is_corresponding": False,
+                "raw_author_name": "Autor Exemplo",
+            }
+            for _ in range(8)
+        ],
+        "concepts": scored(
+            "C", 10, level=2, wikidata="https://www.wikidata.org/wiki/Q1"
+        ),
+        "topics": scored("T", 3),
+        "keywords": scored("keywords/", 5),
+        "referenced_works": [ref("W") for _ in range(40)],
+        "related_works": [ref("W") for _ in range(10)],
+        "counts_by_year": [
+            {"year": 2024 - i, "cited_by_count": rng.randrange(50)} for i in range(10)
+        ],
+        "abstract_inverted_index": inverted,
+    }
+
+
+def synthetic_page(works=per_page, seed=42):
+    rng = random.Random(seed)
+    page = {
+        "meta": {"count": works, "per_page": works, "next_cursor": None},
+        "results": [synthetic_work(rng, i) for i in range(works)],
+    }
+    return json.dumps(page).encode("utf-8")
+
+
+def load_fixture(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        return f.read()
+
+
+def record_fixtures(directory, pages, filter_=None):
+    """Grava `pages` páginas reais de /works (bytes crus da resposta)."""
+    import requests
+
+    os.makedirs(directory, exist_ok=True)
+    params = {"per-page": per_page, "cursor": "*"}
+    if filter_:
+        params["filter"] = filter_
+    for page in range(pages):
+        response = requests.get(f"{api_base_url}/works", params=params, timeout=60)
+        response.raise_for_status()
+        path = os.path.join(directory, f"works_page_{page:03d}.json.gz")
+        with gzip.open(path, "wb") as f:
+            f.write(response.content)
+        print(f"Gravado {path} ({len(response.content) / 1024:.0f} KiB)")
+        params["cursor"] = response.json()["meta"]["next_cursor"]
+        if not params["cursor"]:
+            break
+
+
+def decoders():
+    """Decodificadores comparados, todos a partir dos bytes da resposta."""
+    result = {
+        # O que `response.json()` faz: bytes -> str -> json.loads
+        "response.json (str)": lambda data: json.loads(data.decode("utf-8")),
+        "json (bytes)": OpenalexJson.stdlib_loads,
+    }
+    if OpenalexJson.orjson is not None:
+        result["orjson (bytes)"] = OpenalexJson.orjson.loads
+    return result
+
+
+def bench(payload, decode, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(payload)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "fixtures", nargs="*", help="Páginas gravadas (.json ou .json.gz)."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="Repetições por página (padrão: 20)."
+    )
+    parser.add_argument("--record", help="Diretório onde gravar páginas reais da API.")
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=5,
+        help="Páginas gravadas por --record (padrão: 5).",
+    )
+    parser.add_argument("--filter", help="Filtro da API usado por --record.")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.record, args.pages, args.filter)
+        return
+
+    if args.fixtures:
+        pages = [(os.path.basename(path), load_fixture(path)) for path in args.fixtures]
+    else:
+        pages = [("sintética (200 trabalhos)", synthetic_page())]
+
+    print(f"Decodificador padrão do cliente: {OpenalexJson.backend}")
+    if OpenalexJson.orjson is None:
+        print("orjson não instalado (uv sync --extra fast): só a stdlib é medida.")
+
+    for name, payload in pages:
+        print(f"\n{name}: {len(payload) / 1024:.0f} KiB")
+        baseline = None
+        for label, decode in decoders().items():
+            seconds = bench(payload, decode, args.repeat)
+            baseline = baseline or seconds
+            print(
+                f"  {label:<22} {seconds * 1000:8.2f} ms/página  ({baseline / seconds:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""Servidor local que imita a API do OpenAlex sobre um grafo sintético.
+
+Uso:
+    python benchmarks/mock_openalex.py --works 20000 --port 8555 --latency 0.05
+
+Depois: `python main.py citation --api_base_url http://127.0.0.1:8555 ...`
+
+O grafo é determinístico (mesma `--seed`, mesmos trabalhos, autores e
+instituições) e implementa a parte da API que o OpenalexUtils usa:
+
+- `/works`, `/authors` e `/institutions` com `filter=openalex:ID|ID|...`;
+- `/works` com `filter=author.id:A|A|...` e `publication_year:2020`,
+  `2010-2015`, `<2000` ou `>2000`, separados por vírgula;
+- paginação por `cursor` e `per-page` (até 200), `select`, `sample`/`seed` e
+  `group_by=publication_year`.
+
+`--latency`/`--jitter` atrasam cada resposta e `--error_rate` devolve 429 ou
+503 (com `Retry-After: 0`) nessa fração das requisições. `GET /__stats`
+devolve o número de requisições por endpoint.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import OpenalexJson  # noqa: E402
+
+openalex_url = "https://openalex.org/"
+max_per_page = 200
+first_year = 1990
+countries = ["BR", "US", "PT", "DE", "CN", "IN", "GB", "FR", "JP", "AR"]
+
+
+class SyntheticGraph:
+    """Trabalhos, autores e instituições gerados a partir de uma semente.
+
+    Só as autorias (e os anos) ficam em memória, para responder aos filtros
+    por autor; cada entidade é montada de novo, sempre igual, quando pedida.
+    A produtividade dos autores segue uma cauda longa (Pareto), então alguns
+    poucos autores têm milhares de trabalhos.
+    """
+
+    def __init__(self, works=10000, authors=None, institutions=None, seed=42):
+        self.works_count = works
+        self.authors_count = authors or max(10, works // 3)
+        self.institutions_count = institutions or max(5, self.authors_count // 25)
+        self.seed = seed
+
+        rng = random.Random(seed)
+        cum_weights = list(
+            itertools.accumulate(
+                rng.paretovariate(1.1) for _ in range(self.authors_count)
+            )
+        )
+        author_range = range(self.authors_count)
+
+        self.years = array("H")
+        self.teams = []
+        self.author_works = [array("i") for _ in author_range]
+        for index in range(works):
+            size = 1 + min(int(rng.expovariate(0.45)), 24)
+            team = tuple(
+                dict.fromkeys(
+                    rng.choices(author_range, cum_weights=cum_weights, k=size)
+                )
+            )
+            self.teams.append(team)
+            self.years.append(first_year + min(int(index * 35 / works), 34))
+            for author in team:
+                self.author_works[author].append(index)
+
+        self.author_institution = array(
+            "i", (rng.randrange(self.institutions_count) for _ in author_range)
+        )
+
+    def _rng(self, kind, index):
+        return random.Random(self.seed * 1_000_003 + index * 7 + kind)
+
+    def institution(self, index):
+        rng = self._rng(1, index)
+        return {
+            "id": f"{openalex_url}I{index + 1}",
+            "display_name": f"Instituição {index + 1}",
+            "country_code": countries[index % len(countries)],
+            "type": rng.choice(["education", "company", "government", "facility"]),
+            "ror": f"https://ror.org/{index + 1:09d}",
+            "lineage": [f"{openalex_url}I{index + 1}"],
+        }
+
+    def _short_institution(self, index):
+        return {
+            "id": f"{openalex_url}I{index + 1}",
+            "display_name": f"Instituição {index + 1}",
+            "country_code": countries[index % len(countries)],
+            "type": "education",
+        }
+
+    def author(self, index):
+        rng = self._rng(2, index)
+        works = len(self.author_works[index])
+        return {
+            "id": f"{openalex_url}A{index + 1}",
+            "display_name": f"Autor {index + 1}",
+            "works_count": works,
+            "cited_by_count": works * rng.randrange(1, 40),
+            "summary_stats": {
+                "h_index": min(works, rng.randrange(1, 60)),
+                "i10_index": min(works, rng.randrange(0, 80)),
+            },
+            "affiliations": [
+                {
+                    "institution": self._short_institution(
+                        self.author_institution[index]
+                    ),
+                    "years": [2024],
+                }
+            ],
+        }
+
+    def work(self, index):
+        rng = self._rng(3, index)
+        n = self.works_count
+        words = [f"termo{rng.randrange(3000)}" for _ in range(rng.randrange(60, 220))]
+        inverted = {}
+        for position, word in enumerate(words):
+            inverted.setdefault(word, []).append(position)
+        team = self.teams[index]
+        year = self.years[index]
+
+        def scored(prefix, count, **extra):
+            return [
+                {
+                    "id": f"{openalex_url}{prefix}{rng.randrange(1, 5000)}",
+                    "display_name": f"Tema {rng.randrange(5000)}",
+                    "score": round(rng.random(), 4),
+                    **extra,
+                }
+                for _ in range(count)
+            ]
+
+        references = rng.sample(range(n), min(n - 1, rng.randrange(0, 40)))
+        related = rng.sample(range(n), min(n - 1, 10))
+        return {
+            "id": f"{openalex_url}W{index + 1}",
+            "doi": f"https://doi.org/10.5555/{index + 1}",
+            "title": " ".join(words[:10]),
+            "display_name": " ".join(words[:10]),
+            "publication_year": year,
+            "publication_date": f"{year}-{rng.randrange(1, 13):02d}-01",
+            "language": "en",
+            "type": rng.choice(["article", "article", "article", "book-chapter"]),
+            "cited_by_count": int(rng.paretovariate(1.5)) - 1,
+            "fwci": round(rng.random() * 4, 3),
+            "open_access": {"is_oa": rng.random() < 0.4, "oa_status": "gold"},
+            "has_fulltext": rng.random() < 0.5,
+            "is_retracted": False,
+            "is_paratext": False,
+            "locations_count": rng.randrange(1, 4),
+            "countries_distinct_count": 1,
+            "institutions_distinct_count": len(team),
+            "referenced_works_count": len(references),
+            "authorships": [
+                {
+                    "author_position": (
+                        "first"
+                        if position == 0
+                        else "last" if position == len(team) - 1 else "middle"
+                    ),
+                    "author": {
+                        "id": f"{openalex_url}A{author + 1}",
+                        "display_name": f"Autor {author + 1}",
+                        "orcid": None,
+                    },
+                    "institutions": [
+                        self._short_institution(self.author_institution[author])
+                    ],
+                    "countries": [
+                        countries[self.author_institution[author] % len(countries)]
+                    ],
+                    "is_corresponding": position == 0,
+                }
+                for position, author in enumerate(team)
+            ],
+            "concepts": scored(
+                "C", 5, level=rng.randrange(4), wikidata="https://www.wikidata.org"
+            ),
+            "topics": scored("T", 3),
+            "keywords": scored("keywords/k", 4),
+            "referenced_works": [f"{openalex_url}W{ref + 1}" for ref in references],
+            "related_works": [f"{openalex_url}W{ref + 1}" for ref in related],
+            "abstract_inverted_index": inverted,
+        }
+
+    def entity(self, kind, index):
+        return {"works": self.work, "authors": self.author}.get(kind, self.institution)(
+            index
+        )
+
+    def size(self, kind):
+        return {
+            "works": self.works_count,
+            "authors": self.authors_count,
+            "institutions": self.institutions_count,
+        }[kind]
+
+
+def parse_filter(value):
+    """`a:1|2,b:>3` -> {"a": "1|2", "b": ">3"}."""
+    filters = {}
+    for part in value.split(","):
+        if part:
+            key, _, spec = part.partition(":")
+            filters[key] = spec
+    return filters
+
+
+def year_matcher(spec):
+    if spec.startswith("<"):
+        limit = int(spec[1:])
+        return lambda year: year < limit
+    if spec.startswith(">"):
+        limit = int(spec[1:])
+        return lambda year: year > limit
+    first, _, last = spec.partition("-")
+    last = last or first
+    return lambda year: int(first) <= year <= int(last)
+
+
+def entity_index(openalex_id, prefix):
+    short = openalex_id.rsplit("/", 1)[-1]
+    if short[:1].upper() != prefix or not short[1:].isdigit():
+        return None
+    return int(short[1:]) - 1
+
+
+class MockOpenalex:
+    """Responde às requisições com as entidades de um SyntheticGraph."""
+
+    prefixes = {"works": "W", "authors": "A", "institutions": "I"}
+
+    def __init__(self, graph, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.graph = graph
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def delay_and_fail(self):
+        """Simulated latency; True if this request should fail."""
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    def handle(self, path, query):
+        """(status, body) for a GET request."""
+        kind = path.strip("/").split("/")[0]
+        if kind == "__stats":
+            return 200, dict(self.stats)
+        if kind not in self.prefixes:
+            return 404, {"error": f"unknown endpoint {path}"}
+
+        self.count(kind)
+        if self.delay_and_fail():
+            self.count("errors")
+            return 429 if self._rng.random() < 0.5 else 503, {"error": "simulated"}
+
+        params = {key: values[-1] for key, values in query.items()}
+        filters = parse_filter(params.get("filter", ""))
+        per_page = min(int(params.get("per-page", 25)), max_per_page)
+        graph = self.graph
+
+        if "sample" in params:
+            rng = random.Random(int(params.get("seed", 0)))
+            indexes = rng.sample(
+                range(graph.size(kind)), min(int(params["sample"]), graph.size(kind))
+            )
+        elif "openalex" in filters:
+            indexes = []
+            for value in dict.fromkeys(filters["openalex"].split("|")):
+                index = entity_index(value, self.prefixes[kind])
+                if index is not None and index < graph.size(kind):
+                    indexes.append(index)
+        elif kind == "works" and "author.id" in filters:
+            found = set()
+            for value in filters["author.id"].split("|"):
+                index = entity_index(value, "A")
+                if index is not None and index < graph.authors_count:
+                    found.update(graph.author_works[index])
+            indexes = sorted(found)
+        else:
+            indexes = list(range(graph.size(kind)))
+
+        if kind == "works" and "publication_year" in filters:
+            matches = year_matcher(filters["publication_year"])
+            indexes = [i for i in indexes if matches(graph.years[i])]
+
+        if params.get("group_by") == "publication_year" and kind == "works":
+            years = Counter(graph.years[i] for i in indexes)
+            return 200, {
+                "meta": {"count": len(indexes), "groups_count": len(years)},
+                "results": [],
+                "group_by": [
+                    {"key": str(year), "key_display_name": str(year), "count": c}
+                    for year, c in years.most_common()
+                ],
+            }
+
+        cursor = params.get("cursor")
+        offset = int(cursor[1:]) if cursor and cursor != "*" else 0
+        page = indexes[offset : offset + per_page]
+        next_cursor = None
+        if cursor is not None and offset + per_page < len(indexes):
+            next_cursor = f"c{offset + per_page}"
+
+        results = [graph.entity(kind, index) for index in page]
+        if params.get("select"):
+            fields = params["select"].split(",")
+            results = [
+                {field: entity[field] for field in fields if field in entity}
+                for entity in results
+            ]
+
+        return 200, {
+            "meta": {
+                "count": len(indexes),
+                "per_page": per_page,
+                "next_cursor": next_cursor,
+            },
+            "results": results,
+        }
+
+
+def make_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, como a API real: o pool de conexões do cliente é usado
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            status, body = mock.handle(url.path, parse_qs(url.query))
+            payload = OpenalexJson.dumps(body)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if status in (429, 503):
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def serve(mock, host="127.0.0.1", port=0):
+    """Start the server on a background thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), make_handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--works", type=int, default=10000)
+    parser.add_argument("--authors", type=int, default=None)
+    parser.add_argument("--institutions", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8555, help="0 = porta livre.")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Atraso fixo em segundos."
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Atraso extra aleatório máximo."
+    )
+    parser.add_argument(
+        "--error_rate", type=float, default=0.0, help="Fração de respostas 429/503."
+    )
+    args = parser.parse_args()
+
+    graph = SyntheticGraph(args.works, args.authors, args.institutions, args.seed)
+    mock = MockOpenalex(graph, args.latency, args.jitter, args.error_rate, args.seed)
+    server = serve(mock, args.host, args.port)
+    # A primeira linha é lida pelo bench_collectors.py para achar a porta
+    print(f"http://{args.host}:{server.server_port}", flush=True)
+    print(
+        f"{graph.works_count} trabalhos, {graph.authors_count} autores, "
+        f"{graph.institutions_count} instituições",
+        flush=True,
+    )
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
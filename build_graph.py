@@ -0,0 +1,57 @@
+import argparse
+import os
+import time
+
+from OpenalexGraph import RELATIONS, TRANSPOSED, build_graph
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converte as tabelas de arestas de uma coleta em um grafo CSR mapeável em memória."
+    )
+    parser.add_argument(
+        "folder",
+        help="Pasta da coleta (com openalex_citations.csv, openalex_related_works.csv e openalex_authors.csv, ou as tabelas do author_graph).",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Diretório do grafo (padrão: openalex_graph/ dentro da pasta da coleta).",
+    )
+    parser.add_argument(
+        "--relations",
+        type=str,
+        default=",".join([*RELATIONS, *TRANSPOSED]),
+        help="Relações a gerar, separadas por vírgula (padrão: todas).",
+    )
+    parser.add_argument(
+        "--max_authors",
+        type=int,
+        default=None,
+        help="Na relação 'coauthors', ignora os trabalhos com mais autores que isso (padrão: sem limite).",
+    )
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        print(f"Erro: A pasta '{args.folder}' não foi encontrada.")
+        return
+
+    relations = [relation for relation in args.relations.split(",") if relation]
+    unknown = set(relations) - {*RELATIONS, *TRANSPOSED}
+    if unknown:
+        parser.error(f"relações desconhecidas: {', '.join(sorted(unknown))}")
+
+    start = time.perf_counter()
+    meta = build_graph(
+        args.folder, args.output, relations=relations, max_authors=args.max_authors
+    )
+    if not meta["relations"]:
+        print("Nenhuma tabela de arestas encontrada na pasta.")
+        return
+    output = args.output or os.path.join(args.folder, "openalex_graph")
+    print(f"Grafo gravado em {output} em {time.perf_counter() - start:.1f} s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,52 @@
-import csv
+import argparse
 import os
-from collections import defaultdict
+
+from OpenalexCoauthors import CoauthorStats
+from OpenalexNameIndex import NameIndex
 
 INPUT_FILE = "output_data/authorships.csv"
 
+# Resultados mostrados por busca no modo interativo
+SEARCH_LIMIT = 20
+
 
-def analyze_coauthors():
-    if not os.path.exists(INPUT_FILE):
-        print(f"Erro: O arquivo '{INPUT_FILE}' não foi encontrado.")
+def analyze_coauthors(input_file=INPUT_FILE, top=None, max_authors=None):
+    if not os.path.exists(input_file):
+        print(f"Erro: O arquivo '{input_file}' não foi encontrado.")
         print(
             "Certifique-se de rodar o coletor (author_graph_based_collector_v2.py) primeiro."
         )
         return
 
-    print(f"Lendo dados de: {INPUT_FILE} ...")
-
-    works_map = defaultdict(list)
-    names_map = {}
+    print(f"Lendo dados de: {input_file} ...")
+    print("Calculando conexões de coautoria...")
 
     try:
-        with open(INPUT_FILE, mode="r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-
-            for row in reader:
-                work_id = row["work_id"]
-                author_id = row["author_id"]
-                author_name = row["author_name"]
-
-                works_map[work_id].append(author_id)
-
-                if author_id not in names_map:
-                    names_map[author_id] = author_name
-
+        stats = CoauthorStats(input_file, max_authors=max_authors)
     except KeyError as e:
         print(f"Erro de formato no CSV: Coluna {e} não encontrada.")
         return
 
-    coauthors_map = defaultdict(set)
-    all_authors = set()
-
-    print("Calculando conexões de coautoria...")
-
-    for work_id, authors_list in works_map.items():
-        for author_id in authors_list:
-            all_authors.add(author_id)
-
-        if len(authors_list) < 2:
-            continue
-
-        for author_a in authors_list:
-            for author_b in authors_list:
-                if author_a != author_b:
-                    coauthors_map[author_a].add(author_b)
-
-    results = []
-    for author_id, coauth_set in coauthors_map.items():
-        qtd = len(coauth_set)
-        name = names_map.get(author_id, "Desconhecido")
-        results.append((qtd, name, author_id))
+    print(
+        f"{len(stats.author_ids)} autores, {stats.works} trabalhos e "
+        f"{stats.edges} pares distintos de coautores."
+    )
+    if stats.skipped_works:
+        print(
+            f"{stats.skipped_works} trabalhos com mais de {max_authors} autores "
+            "foram ignorados no cálculo das coautorias."
+        )
+        only_capped = len(stats.only_in_capped_works())
+        if only_capped:
+            print(
+                f"{only_capped} autores só têm coautores nesses trabalhos: ficam "
+                "fora do ranking e da lista de autores sem coautoria."
+            )
 
-    results.sort(key=lambda x: x[0], reverse=True)
+    results = [
+        (int(stats.degree[index]), stats.names[index], stats.author_ids[index])
+        for index in stats.top(top)
+    ]
 
     print("\n" + "=" * 80)
     print(
@@ -72,11 +59,12 @@ def analyze_coauthors():
         print(f"{i:<5} | {qtd:<15} | {display_name:<40} | {auth_id}")
 
     print("=" * 80)
-    print(f"Total de autores analisados com pelo menos 1 coautor: {len(results)}")
+    with_coauthors = int((stats.degree > 0).sum())
+    print(f"Total de autores analisados com pelo menos 1 coautor: {with_coauthors}")
 
-    authors_without_coauthors = all_authors - set(coauthors_map.keys())
+    authors_without_coauthors = stats.without_coauthors()
 
-    if authors_without_coauthors:
+    if len(authors_without_coauthors):
         print("\n" + "=" * 80)
         print(f"AUTORES SEM COAUTORIA (Total: {len(authors_without_coauthors)})")
         print("=" * 80)
@@ -84,9 +72,9 @@ def analyze_coauthors():
         print("=" * 80)
 
         authors_list = []
-        for author_id in authors_without_coauthors:
-            name = names_map.get(author_id, "Desconhecido")
-            authors_list.append((name, author_id))
+        for index in authors_without_coauthors:
+            name = stats.names[index] or "Desconhecido"
+            authors_list.append((name, stats.author_ids[index]))
         authors_list.sort(key=lambda x: x[0].lower())
 
         for name, auth_id in authors_list:
@@ -100,26 +88,61 @@ def analyze_coauthors():
         print("Todos os autores participaram de pelo menos um trabalho com coautores.")
         print("=" * 80)
 
+    # Índice dos nomes (sem acentos), gravado ao lado do CSV para as próximas
+    # sessões; a busca só mostra autores com coautores, os mais conectados antes
+    name_index = NameIndex.open(input_file, stats.names)
+    degree = stats.degree
+
     while True:
-        search = (
-            input(
-                "\nDigite parte do nome de um autor para buscar (ou ENTER para sair): "
-            )
-            .strip()
-            .lower()
-        )
+        search = input(
+            "\nDigite parte do nome de um autor para buscar (ou ENTER para sair): "
+        ).strip()
         if not search:
             break
 
-        found = False
-        for qtd, name, auth_id in results:
-            if search in name.lower():
-                print(f" -> {name} ({auth_id}) tem {qtd} coautores distintos.")
-                found = True
+        matches = name_index.search(
+            search,
+            key=lambda index: (-degree[index], index),
+            include=lambda index: degree[index] > 0,
+            limit=SEARCH_LIMIT + 1,
+        )
+        for index in matches[:SEARCH_LIMIT]:
+            print(
+                f" -> {stats.names[index]} ({stats.author_ids[index]}) "
+                f"tem {degree[index]} coautores distintos."
+            )
+        if len(matches) > SEARCH_LIMIT:
+            print(f"    ... mostrando só os {SEARCH_LIMIT} primeiros; refine a busca.")
 
-        if not found:
+        if not matches:
             print("Autor não encontrado na lista de coautorias.")
 
 
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ranking de autores pelo número de coautores distintos."
+    )
+    parser.add_argument(
+        "input_file",
+        nargs="?",
+        default=INPUT_FILE,
+        help=f"Tabela de autorias (authorships.csv ou openalex_authors.csv). Padrão: {INPUT_FILE}.",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=None,
+        help="Mostra só os N autores com mais coautores (padrão: todos).",
+    )
+    parser.add_argument(
+        "--max_authors",
+        type=int,
+        default=None,
+        help="Trabalhos com mais autores que isso não contam coautorias, para que artigos de grandes colaborações não dominem o ranking (padrão: sem limite).",
+    )
+    args = parser.parse_args()
+    analyze_coauthors(args.input_file, top=args.top, max_authors=args.max_authors)
+
+
 if __name__ == "__main__":
-    analyze_coauthors()
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import os
+
+from OpenalexWriter import expand_abstracts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converte em texto os resumos de uma coleta feita com --profile inverted_abstract."
+    )
+    parser.add_argument(
+        "works_csv",
+        help="Tabela de trabalhos da coleta (openalex_works.csv ou works.csv).",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Arquivo de saída (padrão: mesmo nome com o sufixo '_text').",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.works_csv):
+        print(f"Erro: O arquivo '{args.works_csv}' não foi encontrado.")
+        return
+
+    output = args.output
+    if output is None:
+        root, extension = os.path.splitext(args.works_csv)
+        output = f"{root}_text{extension}"
+
+    print(f"Lendo dados de: {args.works_csv} ...")
+    count = expand_abstracts(args.works_csv, output)
+    print(f"{count} resumos convertidos em: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,29 +2,46 @@ import argparse
 import sys
 import importlib
 
+import OpenalexUtils
+from OpenalexCache import EntityCache
+from OpenalexMetrics import Metrics
+from OpenalexRateLimiter import RateLimiter
 
-def run_author_based(record_limit, checkpoint_size, initial_work_id):
+
+def run_author_based(record_limit, checkpoint_size, initial_work_id, **options):
     module = importlib.import_module("AuthorBasedCollector")
     if hasattr(module, "main"):
-        module.main(record_limit, checkpoint_size, initial_work_id)
+        module.main(record_limit, checkpoint_size, initial_work_id, **options)
 
 
-def run_citation_based(record_limit, checkpoint_size, initial_work_id):
+def run_citation_based(record_limit, checkpoint_size, initial_work_id, **options):
     module = importlib.import_module("CitationBasedCollector")
     if hasattr(module, "main"):
-        module.main(record_limit, checkpoint_size, initial_work_id)
+        module.main(record_limit, checkpoint_size, initial_work_id, **options)
 
 
-def run_author_limit(record_limit, checkpoint_size, initial_work_id):
+def run_author_limit(record_limit, checkpoint_size, initial_work_id, **options):
     module = importlib.import_module("AuthorLimitCollector")
     if hasattr(module, "main"):
-        module.main(record_limit, checkpoint_size, initial_work_id)
+        module.main(record_limit, checkpoint_size, initial_work_id, **options)
 
 
-def run_author_graph(record_limit, checkpoint_size, initial_work_id):
+def run_author_graph(record_limit, checkpoint_size, initial_work_id, **options):
     module = importlib.import_module("author_graph_based_collector")
     if hasattr(module, "main"):
-        module.main(record_limit, checkpoint_size, initial_work_id)
+        module.main(record_limit, checkpoint_size, initial_work_id, **options)
+
+
+def run_sharded(record_limit, checkpoint_size, initial_work_id, **options):
+    module = importlib.import_module("ShardedCollector")
+    if hasattr(module, "main"):
+        module.main(record_limit, checkpoint_size, initial_work_id, **options)
+
+
+def run_snapshot(record_limit, initial_work_id, **options):
+    module = importlib.import_module("SnapshotCollector")
+    if hasattr(module, "main"):
+        module.main(record_limit, initial_work_id, **options)
 
 
 def main():
@@ -34,8 +51,8 @@ def main():
 
     parser.add_argument(
         "method",
-        choices=["author", "citation", "author_limit", "author_graph"],
-        help="Escolha o método de coleta: 'author' para coleta baseada em autor, 'citation' para coleta baseada em citação, 'author_limit' para coleta baseada em autor com limite no número de autores, ou 'author_graph' para coleta baseada em grafo de autores (BFS).",
+        choices=["author", "citation", "author_limit", "author_graph", "snapshot"],
+        help="Escolha o método de coleta: 'author' para coleta baseada em autor, 'citation' para coleta baseada em citação, 'author_limit' para coleta baseada em autor com limite no número de autores, 'author_graph' para coleta baseada em grafo de autores (BFS), ou 'snapshot' para leitura offline do snapshot do OpenAlex.",
     )
 
     parser.add_argument(
@@ -49,7 +66,7 @@ def main():
         "--checkpoint_size",
         type=int,
         default=500,
-        help="Tamanho do checkpoint (padrão: 500).",
+        help="Tamanho do checkpoint (padrão: 500). O método 'snapshot' não usa checkpoints e ignora esta opção.",
     )
 
     parser.add_argument(
@@ -59,18 +76,268 @@ def main():
         help="ID do trabalho inicial ou ID/URL do autor inicial (padrão: W4398186459). Para 'author_graph', pode ser um ID de autor (começa com 'A') ou URL de autor.",
     )
 
+    parser.add_argument(
+        "--max_in_flight",
+        type=int,
+        default=1,
+        help="Número máximo de lotes/requisições simultâneas à API (padrão: 1, coleta sequencial).",
+    )
+
+    parser.add_argument(
+        "--parallel_pages",
+        type=int,
+        default=1,
+        help="Buscas de trabalhos de autores com mais de 1000 resultados são divididas em até este número de faixas de ano de publicação, paginadas ao mesmo tempo (padrão: 1, paginação sequencial).",
+    )
+
+    parser.add_argument(
+        "--api_base_url",
+        type=str,
+        default=None,
+        help="URL base alternativa da API, por exemplo um servidor mock local (padrão: https://api.openalex.org).",
+    )
+
+    parser.add_argument(
+        "--mailto",
+        type=str,
+        default=None,
+        help="E-mail enviado à API para usar o 'polite pool' do OpenAlex.",
+    )
+
+    parser.add_argument(
+        "--pool_size",
+        type=int,
+        default=10,
+        help="Número máximo de conexões keep-alive mantidas com a API (padrão: 10).",
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60,
+        help="Tempo máximo em segundos de espera por uma resposta da API (padrão: 60).",
+    )
+
+    parser.add_argument(
+        "--rate_limit",
+        type=float,
+        default=10,
+        help="Máximo de requisições por segundo à API (padrão: 10).",
+    )
+
+    parser.add_argument(
+        "--daily_limit",
+        type=int,
+        default=100000,
+        help="Máximo de requisições por dia (UTC) à API (padrão: 100000).",
+    )
+
+    parser.add_argument(
+        "--rate_limit_file",
+        type=str,
+        default=None,
+        help="Arquivo de estado do limitador de taxa; coletas paralelas que usam o mesmo arquivo dividem o mesmo limite.",
+    )
+
+    parser.add_argument(
+        "--cache_path",
+        type=str,
+        default=None,
+        help="Arquivo SQLite usado como cache local de trabalhos, autores e instituições (padrão: sem cache).",
+    )
+
+    parser.add_argument(
+        "--cache_ttl_days",
+        type=float,
+        default=30,
+        help="Validade, em dias, das entradas do cache (padrão: 30).",
+    )
+
+    parser.add_argument(
+        "--cache_max_mb",
+        type=int,
+        default=2048,
+        help="Tamanho máximo do cache em MB; as entradas menos usadas são removidas (padrão: 2048).",
+    )
+
+    parser.add_argument(
+        "--output_format",
+        choices=["csv", "parquet", "arrow"],
+        default="csv",
+        help="Formato das tabelas geradas: 'csv', 'parquet' ou 'arrow' (Arrow IPC). Os formatos colunares precisam do pyarrow (padrão: csv).",
+    )
+
+    parser.add_argument(
+        "--priority",
+        choices=["cited_by_count", "fwci", "frequency"],
+        default=None,
+        help="Troca a busca em largura por uma busca best-first: os IDs da fila são ordenados pela soma do critério escolhido nos trabalhos em que apareceram ('cited_by_count', 'fwci' ou 'frequency', o número de trabalhos que citam o trabalho ou têm o autor). Padrão: fila FIFO.",
+    )
+
+    parser.add_argument(
+        "--profile",
+        choices=["full", "inverted_abstract", "no_abstract", "graph"],
+        default="full",
+        help="Perfil de saída: quais tabelas são geradas e quais campos dos trabalhos são pedidos à API ('full', 'inverted_abstract', igual ao 'full' mas com o resumo gravado como índice invertido e convertido em texto depois com export_abstracts.py, 'no_abstract' ou 'graph', só autorias e citações). Padrão: full.",
+    )
+
+    parser.add_argument(
+        "--plan_author_batches",
+        action="store_true",
+        help="Nas coletas 'author' e 'author_limit', monta os lotes de autores pelo works_count de cada um (buscado em lote na API), para que cada lote encha uma página de 200 trabalhos sem cursores longos. Padrão: lotes fixos de 50 autores.",
+    )
+
+    parser.add_argument(
+        "--metrics_prom",
+        type=str,
+        default=None,
+        help="Arquivo no formato texto do Prometheus (para o textfile collector do node exporter) regravado a cada relatório de progresso com o tempo por etapa e as estatísticas das requisições; com --shards, um arquivo por processo (sufixo _shardN). As mesmas métricas são sempre acrescentadas ao openalex_metrics.jsonl da pasta de saída.",
+    )
+
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Número de processos da coleta 'author' ou 'citation'; cada um busca os IDs do seu shard e no final as tabelas são juntadas (padrão: 1).",
+    )
+
+    parser.add_argument(
+        "--snapshot_dir",
+        type=str,
+        default=None,
+        help="Diretório do snapshot do OpenAlex (raiz ou 'data/works'), obrigatório para o método 'snapshot'.",
+    )
+
+    parser.add_argument(
+        "--seed_file",
+        type=str,
+        default=None,
+        help="Arquivo com IDs de trabalhos e autores semente, um por linha, para o método 'snapshot' (padrão: usa --initial_work_id).",
+    )
+
+    parser.add_argument(
+        "--snapshot_filter",
+        type=str,
+        default=None,
+        help="Filtro dos trabalhos do snapshot, na sintaxe do 'filter' da API (ex.: 'type:article,publication_year:2020-2023').",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Número de processos que leem partições do snapshot em paralelo (padrão: número de CPUs).",
+    )
+
     args = parser.parse_args()
 
-    if args.method == "author":
-        run_author_based(args.record_limit, args.checkpoint_size, args.initial_work_id)
+    if args.method == "snapshot" and not args.snapshot_dir:
+        parser.error("o método 'snapshot' precisa de --snapshot_dir")
+    if args.shards > 1 and args.method not in ("author", "citation"):
+        parser.error("--shards só vale para os métodos 'author' e 'citation'")
+    if args.shards > 1 and args.priority:
+        parser.error("--priority não pode ser usado com --shards")
+    if args.plan_author_batches and args.method not in ("author", "author_limit"):
+        parser.error(
+            "--plan_author_batches só vale para os métodos 'author' e 'author_limit'"
+        )
+
+    if args.method == "snapshot":
+        # Leitura local: não usa a API, então nenhum cliente é criado
+        run_snapshot(
+            args.record_limit,
+            args.initial_work_id,
+            snapshot_dir=args.snapshot_dir,
+            seed_file=args.seed_file,
+            snapshot_filter=args.snapshot_filter,
+            workers=args.workers,
+            output_format=args.output_format,
+            profile=args.profile,
+            metrics_prom=args.metrics_prom,
+        )
+        return
+
+    if args.api_base_url:
+        OpenalexUtils.set_api_base_url(args.api_base_url)
+
+    # Um único cliente (e pool de conexões) compartilhado por toda a coleta
+    client = OpenalexUtils.OpenAlexClient(
+        mailto=args.mailto,
+        pool_size=max(args.pool_size, args.max_in_flight * args.parallel_pages),
+        timeout=(10, args.timeout),
+        rate_limiter=RateLimiter(
+            rate=args.rate_limit,
+            daily_limit=args.daily_limit,
+            state_file=args.rate_limit_file,
+        ),
+        cache=(
+            EntityCache(
+                args.cache_path,
+                ttl_days=args.cache_ttl_days,
+                max_bytes=args.cache_max_mb * 1024**2,
+            )
+            if args.cache_path
+            else None
+        ),
+        parallel_pages=args.parallel_pages,
+        metrics=Metrics(prometheus_file=args.metrics_prom),
+    )
+
+    options = {
+        "client": client,
+        "max_in_flight": args.max_in_flight,
+        "output_format": args.output_format,
+        "priority": args.priority,
+        "profile": args.profile,
+    }
+    if args.plan_author_batches:
+        options["plan_author_batches"] = True
+
+    if args.shards > 1:
+        # Cada processo cria o próprio cliente a partir destas opções
+        run_sharded(
+            args.record_limit,
+            args.checkpoint_size,
+            args.initial_work_id,
+            method=args.method,
+            shards=args.shards,
+            client_options={
+                "base_url": args.api_base_url,
+                "mailto": args.mailto,
+                "pool_size": max(
+                    args.pool_size, args.max_in_flight * args.parallel_pages
+                ),
+                "timeout": args.timeout,
+                "rate_limit": args.rate_limit,
+                "daily_limit": args.daily_limit,
+                "rate_limit_file": args.rate_limit_file,
+                "cache_path": args.cache_path,
+                "cache_ttl_days": args.cache_ttl_days,
+                "cache_max_mb": args.cache_max_mb,
+                "parallel_pages": args.parallel_pages,
+                "metrics_prom": args.metrics_prom,
+            },
+            max_in_flight=args.max_in_flight,
+            output_format=args.output_format,
+            profile=args.profile,
+            plan_author_batches=args.plan_author_batches,
+        )
+    elif args.method == "author":
+        run_author_based(
+            args.record_limit, args.checkpoint_size, args.initial_work_id, **options
+        )
     elif args.method == "citation":
         run_citation_based(
-            args.record_limit, args.checkpoint_size, args.initial_work_id
+            args.record_limit, args.checkpoint_size, args.initial_work_id, **options
         )
     elif args.method == "author_limit":
-        run_author_limit(args.record_limit, args.checkpoint_size, args.initial_work_id)
+        run_author_limit(
+            args.record_limit, args.checkpoint_size, args.initial_work_id, **options
+        )
     elif args.method == "author_graph":
-        run_author_graph(args.record_limit, args.checkpoint_size, args.initial_work_id)
+        run_author_graph(
+            args.record_limit, args.checkpoint_size, args.initial_work_id, **options
+        )
     else:
         print("Método inválido escolhido.")
         sys.exit(1)
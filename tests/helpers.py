@@ -0,0 +1,110 @@
+import csv
+import os
+import signal
+import subprocess
+import sys
+import time
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(tests_dir)
+sys.path.insert(0, os.path.join(repo_dir, "benchmarks"))
+
+from mock_openalex import MockOpenalex, SyntheticGraph, serve  # noqa: E402
+
+
+class SparseGraph(SyntheticGraph):
+    """SyntheticGraph em que cada trabalho cita no máximo `references` outros.
+
+    Com poucas citações por trabalho, um ID perdido pela coleta dificilmente é
+    redescoberto por outro trabalho, então as perdas aparecem nos testes.
+    """
+
+    def __init__(self, works, references, seed):
+        self.references = references
+        super().__init__(works, seed=seed)
+
+    def work(self, index):
+        work = super().work(index)
+        work["referenced_works"] = work["referenced_works"][: self.references]
+        work["referenced_works_count"] = len(work["referenced_works"])
+        return work
+
+
+class MockApi:
+    """Servidor mock do OpenAlex em uma thread, para as coletas dos testes."""
+
+    def __init__(self, works=300, latency=0.0, references=None, seed=7):
+        if references is None:
+            self.graph = SyntheticGraph(works, seed=seed)
+        else:
+            self.graph = SparseGraph(works, references, seed)
+        self.server = serve(MockOpenalex(self.graph, latency=latency))
+        # Conexões cortadas pelas coletas interrompidas não são erros do teste
+        self.server.handle_error = lambda request, client_address: None
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reachable_works(self, seed=0):
+        """IDs of the works a citation crawl from work `seed` reaches."""
+        seen = {seed}
+        pending = [seed]
+        while pending:
+            work = self.graph.work(pending.pop())
+            for cited in work["referenced_works"]:
+                index = int(cited.rsplit("W", 1)[1]) - 1
+                if index not in seen:
+                    seen.add(index)
+                    pending.append(index)
+        return {f"https://openalex.org/W{index + 1}" for index in seen}
+
+
+def main_command(api, method, *args):
+    return [
+        sys.executable,
+        os.path.join(repo_dir, "main.py"),
+        method,
+        "--api_base_url",
+        api.url,
+        "--rate_limit",
+        "1000",
+        *args,
+    ]
+
+
+def run_main(api, cwd, method, *args):
+    subprocess.run(
+        main_command(api, method, *args),
+        cwd=cwd,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def kill_main(api, cwd, method, *args, when):
+    """Start main.py and SIGKILL it (and its shards) once `when()` is true."""
+    process = subprocess.Popen(
+        main_command(api, method, *args),
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while not when():
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise AssertionError("a coleta terminou antes de ser interrompida")
+            time.sleep(0.02)
+    finally:
+        if process.poll() is None:
+            os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+def read_column(filename, column):
+    with open(filename, newline="", encoding="utf-8") as f:
+        return [row[column] for row in csv.DictReader(f)]
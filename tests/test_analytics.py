@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy
+
+    from OpenalexAnalytics import citation_metrics, write_work_metrics
+    from OpenalexGraph import build_graph
+except ImportError:  # Dependência opcional (uv sync --extra analysis)
+    numpy = None
+
+
+def write_table(filename, header, rows):
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(",".join(header) + "\n")
+        for row in rows:
+            f.write(",".join(f"https://openalex.org/{value}" for value in row) + "\n")
+
+
+@unittest.skipIf(numpy is None, "precisa do numpy")
+class CitationMetricsTest(unittest.TestCase):
+    def test_saved_graph_gives_same_metrics_as_table(self):
+        with tempfile.TemporaryDirectory() as folder:
+            write_table(
+                os.path.join(folder, "openalex_citations.csv"),
+                ["work_id", "cited_work_id"],
+                [("W1", "W2"), ("W2", "W3")],
+            )
+            # Trabalhos que só aparecem em related_works ficam fora do PageRank
+            write_table(
+                os.path.join(folder, "openalex_related_works.csv"),
+                ["work_id", "related_work_id"],
+                [("W1", "W8"), ("W2", "W9")],
+            )
+
+            def metrics_table(name):
+                output = os.path.join(folder, name)
+                write_work_metrics(output, citation_metrics(folder))
+                with open(output, encoding="utf-8") as f:
+                    return f.read()
+
+            from_table = metrics_table("from_table.csv")
+            build_graph(folder)
+            from_graph = metrics_table("from_graph.csv")
+
+        self.assertEqual(len(from_table.splitlines()), 4)
+        self.assertEqual(from_graph, from_table)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import csv
+import os
+import pickle
+import tempfile
+import unittest
+from collections import deque
+
+from OpenalexCheckpoints import CheckpointJournal, output_offsets, truncate_outputs
+from OpenalexIds import IdSet, decode_id
+from SnapshotCollector import merge_shard, shard_filenames
+
+
+class TruncateOutputsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def write(self, name, data):
+        with open(self.path(name), "wb") as f:
+            f.write(data)
+        return self.path(name)
+
+    def test_truncates_csv_to_offset(self):
+        path = self.write("works.csv", b"id\nW1\n")
+        offsets = output_offsets([path])
+        with open(path, "ab") as f:
+            f.write(b"W2\n")
+
+        self.assertEqual(truncate_outputs([path], offsets), 1)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"id\nW1\n")
+
+    def test_removes_empty_file_without_offset(self):
+        # Arquivo vazio deixado por uma coleta interrompida antes do flush
+        path = self.write("works.csv", b"")
+
+        self.assertEqual(truncate_outputs([path], {}), 1)
+        self.assertFalse(os.path.exists(path))
+
+    def test_removes_parts_after_offset(self):
+        parts = self.path("works")
+        os.makedirs(parts)
+        for index in range(3):
+            self.write(f"works/part-{index:05d}.parquet", b"x")
+
+        self.assertEqual(truncate_outputs([parts], {parts: 2}), 1)
+        self.assertEqual(
+            sorted(os.listdir(parts)), ["part-00000.parquet", "part-00001.parquet"]
+        )
+
+
+class LegacyCheckpointTest(unittest.TestCase):
+    def test_loads_full_pickle_checkpoint(self):
+        # Formato gravado antes do journal: URLs em deque e set, sem `enqueued`
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint_file = os.path.join(tmp, "openalex_checkpoint.pkl")
+            with open(checkpoint_file, "wb") as f:
+                pickle.dump(
+                    {
+                        "queue": deque(["https://openalex.org/W3", "W4"]),
+                        "visited": {"https://openalex.org/W1", "W2"},
+                        "count": 2,
+                        "citations_count": 5,
+                    },
+                    f,
+                )
+            output = os.path.join(tmp, "openalex_works.csv")
+            with open(output, "w") as f:
+                f.write("id\nW1\nW2\nW9\n")
+
+            journal = CheckpointJournal(checkpoint_file, outputs=[output])
+            state = journal.load()
+
+            queue = [decode_id(code, short=True) for code in state["queue"]]
+            self.assertEqual(queue, ["W3", "W4"])
+            self.assertIsInstance(state["visited"], IdSet)
+            self.assertEqual(
+                set(state["visited"]),
+                {"https://openalex.org/W1", "https://openalex.org/W2"},
+            )
+            self.assertEqual(state["enqueued"], 2)
+            self.assertEqual(state["citations_count"], 5)
+            # Sem os tamanhos das saídas, as tabelas ficam como estão
+            self.assertEqual(journal.restore_outputs(state), 0)
+            self.assertEqual(os.path.getsize(output), 12)
+
+
+class MergeShardTest(unittest.TestCase):
+    def test_merge_into_empty_file_writes_header(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            shard_dir = os.path.join(tmp, "shard")
+            os.makedirs(shard_dir)
+            for filename in shard_filenames(shard_dir).values():
+                with open(filename, "w", encoding="utf-8") as f:
+                    f.write("header\nrow\n")
+            filename = os.path.join(tmp, "openalex_citations.csv")
+            open(filename, "w").close()
+
+            merge_shard(shard_dir, {"citations": filename}, counts={})
+
+            with open(filename, newline="", encoding="utf-8") as f:
+                self.assertEqual(list(csv.reader(f)), [["header"], ["row"]])
+            self.assertFalse(os.path.exists(shard_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
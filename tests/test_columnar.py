@@ -0,0 +1,105 @@
+import gc
+import os
+import tempfile
+import unittest
+import warnings
+
+try:
+    import pyarrow.dataset
+    import pyarrow.parquet
+
+    from OpenalexColumnar import ColumnarSink, table_dir, table_dir_offset
+except ImportError:  # Dependência opcional (uv sync --extra columnar)
+    pyarrow = None
+
+from OpenalexCheckpoints import truncate_outputs
+
+
+def citation_rows(start, count):
+    return [
+        {"work_id": f"https://openalex.org/W{i}", "cited_work_id": "W0"}
+        for i in range(start, start + count)
+    ]
+
+
+@unittest.skipIf(pyarrow is None, "precisa do pyarrow")
+class ColumnarSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.filenames = {"citations": os.path.join(self.tmp.name, "citations.csv")}
+        self.dir = table_dir(self.filenames["citations"], "parquet")
+
+    def sink(self, **options):
+        options.setdefault("row_group_size", 100)
+        return ColumnarSink(self.filenames, "parquet", **options)
+
+    def parts(self):
+        return sorted(
+            name for name in os.listdir(self.dir) if name.startswith("part-")
+        )
+
+    def work_ids(self):
+        table = pyarrow.dataset.dataset(self.dir, format="parquet").to_table()
+        return table.column("work_id").to_pylist()
+
+    def test_checkpoints_do_not_close_parts(self):
+        with self.sink() as sink:
+            for start in range(0, 1000, 10):
+                sink.write_rows("citations", citation_rows(start, 10))
+                sink.flush()
+
+        self.assertEqual(self.parts(), ["part-00000.parquet"])
+        metadata = pyarrow.parquet.read_metadata(
+            os.path.join(self.dir, self.parts()[0])
+        )
+        self.assertEqual(metadata.num_rows, 1000)
+        self.assertEqual(metadata.num_row_groups, 10)
+
+    def test_parts_roll_by_row_count(self):
+        with self.sink(part_rows=300) as sink:
+            for start in range(0, 1000, 50):
+                sink.write_rows("citations", citation_rows(start, 50))
+                sink.flush()
+
+        self.assertEqual(len(self.parts()), 4)
+        expected = [row["work_id"] for row in citation_rows(0, 1000)]
+        self.assertEqual(self.work_ids(), expected)
+
+    def interrupted(self, part_rows):
+        """Write 250 rows, checkpoint, write 200 more and stop without closing."""
+        sink = self.sink(part_rows=part_rows)
+        sink.write_rows("citations", citation_rows(0, 250))
+        sink.flush()
+        offsets = {self.dir: table_dir_offset(self.dir)}
+        sink.write_rows("citations", citation_rows(250, 200))
+        sink.flush()
+        # Coleta interrompida: a parte aberta nunca é fechada
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", ResourceWarning)
+            del sink
+            gc.collect()
+        return offsets
+
+    def resume(self, offsets, part_rows):
+        truncate_outputs([self.dir], offsets)
+        with self.sink(part_rows=part_rows) as sink:
+            sink.write_rows("citations", citation_rows(250, 200))
+        return self.work_ids()
+
+    def test_resume_from_open_part_log(self):
+        offsets = self.interrupted(part_rows=1000)
+        expected = [row["work_id"] for row in citation_rows(0, 450)]
+        self.assertEqual(self.resume(offsets, part_rows=1000), expected)
+        self.assertEqual(self.parts(), ["part-00000.parquet"])
+
+    def test_resume_after_part_closed_past_checkpoint(self):
+        # A parte 0 fecha (400 linhas) depois do checkpoint das 250 primeiras
+        offsets = self.interrupted(part_rows=400)
+        expected = [row["work_id"] for row in citation_rows(0, 450)]
+        self.assertEqual(self.resume(offsets, part_rows=400), expected)
+        self.assertEqual(self.parts(), ["part-00000.parquet", "part-00001.parquet"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import random
+import tempfile
+import unittest
+
+from OpenalexCheckpoints import CheckpointJournal
+from OpenalexFrontier import PriorityFrontier
+
+
+def drain(frontier):
+    items = []
+    while frontier:
+        items.append(frontier.popleft())
+    return items
+
+
+class PriorityFrontierTest(unittest.TestCase):
+    def test_ties_break_on_id_not_arrival(self):
+        frontier = PriorityFrontier()
+        for item in ("W3", "W1", "W2"):
+            frontier.append(item, 1.0)
+        # W3 volta a aparecer com pontuação 0: não sobe nem muda de lugar
+        frontier.append("W3", 0.0)
+
+        self.assertEqual(
+            drain(frontier),
+            [f"https://openalex.org/W{number}" for number in (1, 2, 3)],
+        )
+
+    def test_restored_frontier_pops_in_same_order(self):
+        rng = random.Random(3)
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = CheckpointJournal(os.path.join(tmp, "checkpoint.pkl"))
+            frontier = PriorityFrontier()
+            for step in range(2000):
+                item = f"W{rng.randrange(1, 300)}"
+                frontier.append(item, float(rng.randrange(3)))
+                if step % 7 == 0 and frontier:
+                    frontier.popleft()
+                if step % 500 == 0:
+                    journal.append(journal.delta(frontier, [], {}, {}))
+            journal.append(journal.delta(frontier, [], {}, {}))
+
+            restored = PriorityFrontier.from_checkpoint(journal.load())
+
+        self.assertEqual(drain(restored), drain(frontier))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,20 @@
+import unittest
+
+from OpenalexNameIndex import NameIndex
+
+
+class NameIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = NameIndex(["Maria Silva", "Arnaldo Costa", "José Müller"])
+
+    def test_short_query_matches_inside_words(self):
+        self.assertEqual(self.index.search("ar"), [1, 0])
+        self.assertEqual(self.index.search("ü"), [2])
+
+    def test_long_query_matches_inside_words(self):
+        self.assertEqual(self.index.search("aria"), [0])
+        self.assertEqual(self.index.search("jose mu"), [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
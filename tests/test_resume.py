@@ -0,0 +1,86 @@
+import glob
+import os
+import tempfile
+import unittest
+
+from tests.helpers import MockApi, kill_main, read_column, run_main
+
+SHARDED_ARGS = [
+    "--initial_work_id",
+    "W2",
+    "--record_limit",
+    "100000",
+    "--checkpoint_size",
+    "10",
+    "--shards",
+    "2",
+]
+
+
+class ShardedResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.api = MockApi(works=600, latency=0.03, references=3)
+        self.addCleanup(self.api.close)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_citation_crawl_killed_and_resumed_collects_every_work(self):
+        folder = os.path.join(self.tmp.name, "W2_citations_based_database")
+
+        def mid_crawl():
+            # Interrompe no meio da coleta, com os shards trocando IDs
+            journals = glob.glob(f"{folder}/openalex_shards/*/*.journal")
+            return len(journals) == 2 and all(
+                os.path.getsize(journal) > 6000 for journal in journals
+            )
+
+        kill_main(self.api, self.tmp.name, "citation", *SHARDED_ARGS, when=mid_crawl)
+        run_main(self.api, self.tmp.name, "citation", *SHARDED_ARGS)
+
+        works = read_column(f"{folder}/openalex_works.csv", "id")
+        self.assertEqual(len(works), len(set(works)))
+        self.assertEqual(set(works), self.api.reachable_works(seed=1))
+
+
+class PriorityResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.api = MockApi(works=1500, latency=0.01)
+        self.addCleanup(self.api.close)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def crawl(self, name, killed):
+        cwd = os.path.join(self.tmp.name, name)
+        os.makedirs(cwd)
+        folder = os.path.join(cwd, "W2_citations_based_database")
+        args = [
+            "--initial_work_id",
+            "W2",
+            "--record_limit",
+            "1200",
+            "--checkpoint_size",
+            "50",
+            "--priority",
+            "cited_by_count",
+        ]
+        if killed:
+            journal = f"{folder}/openalex_checkpoint.pkl.journal"
+            kill_main(
+                self.api,
+                cwd,
+                "citation",
+                *args,
+                when=lambda: os.path.exists(journal)
+                and os.path.getsize(journal) > 60000,
+            )
+        run_main(self.api, cwd, "citation", *args)
+        return read_column(f"{folder}/openalex_works.csv", "id")
+
+    def test_resumed_priority_crawl_matches_uninterrupted(self):
+        self.assertEqual(
+            self.crawl("killed", killed=True), self.crawl("full", killed=False)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,21 @@
+import unittest
+
+from OpenalexUtils import _parse_abstract_sorted, parse_abstract_inverted_index
+
+
+class ParseAbstractTest(unittest.TestCase):
+    def test_contiguous_positions(self):
+        index = {"b": [1], "a": [0, 2]}
+        self.assertEqual(parse_abstract_inverted_index(index), "a b a")
+
+    def test_negative_position_matches_sorted(self):
+        index = {"a": [0], "b": [-1], "c": [1]}
+        self.assertEqual(parse_abstract_inverted_index(index), "b a c")
+        index = {"a": [0, -2], "b": [1]}
+        self.assertEqual(
+            parse_abstract_inverted_index(index), _parse_abstract_sorted(index)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
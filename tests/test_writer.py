@@ -0,0 +1,61 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from OpenalexWriter import TABLE_FIELDNAMES, DatasetSink
+
+WORK = {
+    "id": "https://openalex.org/W1",
+    "title": "Um trabalho",
+    "authorships": [
+        {
+            "author_position": "first",
+            "author": {"id": "https://openalex.org/A1", "display_name": "Autor 1"},
+            "institutions": [],
+            "countries": ["BR"],
+        }
+    ],
+    "referenced_works": ["https://openalex.org/W2"],
+}
+
+
+class DatasetSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.filenames = {
+            table: os.path.join(self.tmp.name, f"{table}.csv")
+            for table in ("works", "authors", "citations")
+        }
+
+    def read(self, table):
+        with open(self.filenames[table], newline="", encoding="utf-8") as f:
+            return list(csv.reader(f))
+
+    def test_resume_from_empty_file_writes_header(self):
+        # Coleta interrompida antes do primeiro flush: arquivos criados vazios
+        for filename in self.filenames.values():
+            open(filename, "w").close()
+
+        with DatasetSink(self.filenames) as sink:
+            sink.write([WORK])
+
+        for table in self.filenames:
+            rows = self.read(table)
+            self.assertEqual(rows[0], TABLE_FIELDNAMES[table])
+            self.assertEqual(len(rows), 2)
+
+    def test_append_keeps_single_header(self):
+        with DatasetSink(self.filenames) as sink:
+            sink.write([WORK])
+        with DatasetSink(self.filenames) as sink:
+            sink.write([WORK])
+
+        rows = self.read("citations")
+        self.assertEqual(rows[0], TABLE_FIELDNAMES["citations"])
+        self.assertEqual(len(rows), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()